@@ -0,0 +1,291 @@
+import json
+import os
+import time
+from typing import Union
+import weakref
+
+from flask import Flask, Response, redirect, request, send_from_directory, stream_with_context
+from flask_cors import CORS
+
+from api.events import EventBroker
+from api.responses import LeagueResponses, json_response
+from config.constants import (
+    EVENT_RETRY_AFTER,
+    HISTORY_DEFAULT_RANGE,
+    OPTIMIZER_MAX_K,
+    OPTIMIZER_TOP_K,
+    SIMULATION_MAX_WORKERS,
+    VALUATION_MAX_PAGE_SIZE,
+    VALUATION_PAGE_SIZE,
+)
+from data.league_snapshot import SharedLeague
+from data.refresher import LeagueRefresher
+from models.league import League
+from models.optimizer import optimize_moves
+from models.simulation import CATEGORIES
+from models.valuation import SORT_KEYS, get_valuation_table
+
+
+WEB_DIST_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web", "dist")
+
+
+# Responses keyed by the League they came from, and dropped along with it
+_responses: 'weakref.WeakKeyDictionary[League, LeagueResponses]' = weakref.WeakKeyDictionary()
+
+
+def get_responses(league: Union[League, SharedLeague]) -> LeagueResponses:
+    """A league's responses; those of a league adopted from the shared snapshot were rendered by the publisher"""
+    if isinstance(league, SharedLeague):
+        if league.rendered is not None:
+            return league.rendered
+        league = league.league
+    responses = _responses.get(league)
+    if responses is None:
+        responses = _responses.setdefault(league, LeagueResponses(league))
+    return responses
+
+
+def get_league_objects(league: Union[League, SharedLeague]) -> League:
+    """The League itself, e.g. for the optimizer, unpickled on first use if adopted from the shared snapshot"""
+    return league.league if isinstance(league, SharedLeague) else league
+
+
+def warm_caches(refresher: LeagueRefresher):
+    """Computes the responses derived from every built league up front, e.g. in the gunicorn
+    master before forking, so the workers share them instead of each computing their own"""
+    for league in refresher.leagues:
+        if league is not None:
+            league.get_free_agents()
+            get_responses(league).render()
+    get_valuation_table()
+
+
+def warming_response(league_index: int) -> Response:
+    """Answers right away while a league is still being built, instead of blocking on it"""
+    body = json.dumps({"status": "warming", "league_index": league_index})
+    return Response(body, status=202, mimetype="application/json", headers={"Retry-After": "1"})
+
+
+def create_app(refresher: LeagueRefresher, simulation_workers: int = SIMULATION_MAX_WORKERS) -> Flask:
+    # Initialize flask app
+    app = Flask(
+        __name__,
+        static_folder=os.path.join(WEB_DIST_DIRECTORY, "assets"),
+        template_folder=WEB_DIST_DIRECTORY,
+    )
+    CORS(app)
+    # e.g. for the gunicorn post_fork hook, which starts each worker's refresher
+    app.extensions["refresher"] = refresher
+
+    # Matchup updates are pushed to open dashboards as patches, diffed once per refresh
+    events = EventBroker()
+
+    def publish_events(league_id: str, league: Union[League, SharedLeague]):
+        events.publish(league_id, league.version, get_responses(league).events_state())
+
+    refresher.add_listener(publish_events)
+    # followers serve the responses the publisher rendered into the shared snapshot
+    refresher.set_renderer(get_responses)
+
+
+    # Serve the main React app (index.html)
+    @app.route("/")
+    def serve_react():
+        return send_from_directory(app.template_folder, "index.html")
+
+    # Serve static files (CSS, JS, images, etc.)
+    @app.route("/assets/<path:path>")
+    def serve_static(path):
+        return send_from_directory(app.static_folder, path)
+
+
+    # Refresh status
+    @app.route("/api/status")
+    def get_status():
+        return json.dumps({**refresher.to_dict(), "event_subscribers": events.to_dict(), "event_streams": events.n_open})
+
+
+    # Every projected player ranked by category z-scores, e.g. ?sort=weekly_value&punt=FT%,TOV&page=2
+    @app.route("/api/valuations")
+    def get_valuations():
+        sort = request.args.get("sort", "value")
+        punt = [category for category in request.args.get("punt", "").split(",") if category]
+        if sort not in SORT_KEYS + CATEGORIES or not set(punt) <= set(CATEGORIES):
+            body = json.dumps({"error": "invalid sort or punt", "sort_keys": SORT_KEYS + CATEGORIES, "categories": CATEGORIES})
+            return Response(body, status=400, mimetype="application/json")
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = min(max(request.args.get("per_page", VALUATION_PAGE_SIZE, type=int), 1), VALUATION_MAX_PAGE_SIZE)
+        total, players = get_valuation_table(
+            punt=punt,
+            sort=sort,
+            descending=request.args.get("order", "desc") != "asc",
+            offset=(page - 1) * per_page,
+            limit=per_page,
+        )
+        return json.dumps({"page": page, "per_page": per_page, "total": total, "punt": punt, "players": players})
+
+
+    # General endpoint for all data
+    @app.route("/api/<league_index>")
+    def get_all(league_index):
+        try:
+            league = refresher.get_league(int(league_index))
+            if league is None:
+                return warming_response(int(league_index))
+            return json_response(get_responses(league).league(), request)
+        except IndexError:
+            return json.dumps({})
+
+
+    # Matchup win probabilities from simulated weeks
+    @app.route("/api/<league_index>/simulations")
+    def get_simulations(league_index):
+        try:
+            league = refresher.get_league(int(league_index))
+            if league is None:
+                return warming_response(int(league_index))
+            return json_response(get_responses(league).simulations(max_workers=simulation_workers), request)
+        except IndexError:
+            return json.dumps({})
+
+
+    # Server-sent events: a snapshot of every team's matchup stats, then JSON patches after each
+    # refresh. Reconnecting clients resume from Last-Event-ID (or ?since=) without a new snapshot.
+    @app.route("/api/<league_index>/events")
+    def get_events(league_index):
+        try:
+            league_id, league = refresher.get_entry(int(league_index))
+        except IndexError:
+            return json.dumps({})
+        if league_id is None:
+            return warming_response(int(league_index))
+        stream = events.get_stream(league_id)
+        if league is not None:
+            # leagues built before the app was created are published here on first use
+            stream.publish(league.version, get_responses(league).events_state())
+        if not events.acquire():
+            body = json.dumps({"error": "too many event streams", "max_streams": events.max_streams})
+            return Response(body, status=503, mimetype="application/json", headers={"Retry-After": str(EVENT_RETRY_AFTER)})
+        since = request.headers.get("Last-Event-ID", request.args.get("since"))
+        response = Response(
+            stream_with_context(stream.stream(since)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        # the server closes the response when the client goes away, even if it was never iterated
+        response.call_on_close(events.release)
+        return response
+
+
+    # Get team by team name
+    @app.route("/api/<league_index>/team/<team_name>")
+    def get_team(league_index, team_name):
+        try:
+            league = refresher.get_league(int(league_index))
+            if league is None:
+                return warming_response(int(league_index))
+            team = get_responses(league).team_by_name(team_name)
+            if team is None:
+                return json.dumps({})
+            return json_response(team, request)
+        except IndexError:
+            return json.dumps({})
+
+
+    # Get team by team key
+    @app.route("/api/<league_index>/team_key/<team_key>")
+    def get_team_by_key(league_index, team_key):
+        try:
+            league = refresher.get_league(int(league_index))
+            if league is None:
+                return warming_response(int(league_index))
+            team = get_responses(league).team(team_key)
+            if team is None:
+                return json.dumps({})
+            return json_response(team, request)
+        except IndexError:
+            return json.dumps({})
+
+
+    # Best add/drops and daily lineups for a team against its current opponent
+    @app.route("/api/<league_index>/team_key/<team_key>/moves")
+    def get_moves(league_index, team_key):
+        k = request.args.get("k", str(OPTIMIZER_TOP_K))
+        if not k.isdigit() or not 1 <= int(k) <= OPTIMIZER_MAX_K:
+            body = json.dumps({"error": f"k must be an integer from 1 to {OPTIMIZER_MAX_K}"})
+            return Response(body, status=400, mimetype="application/json")
+        try:
+            league = refresher.get_league(int(league_index))
+            if league is None:
+                return warming_response(int(league_index))
+            league = get_league_objects(league)
+            team = league.get_team_by_team_id(team_key)
+            if team is None or league.get_opponent(team_key) is None:
+                return json.dumps({})
+            free_agents = refresher.load_free_agents(league)
+            if not free_agents.done() or free_agents.exception() is not None:
+                return warming_response(int(league_index))
+            baseline, moves = optimize_moves(league, team, int(k))
+            return json.dumps({"baseline": baseline.to_dict(), "moves": [move.to_dict() for move in moves]})
+        except IndexError:
+            return json.dumps({})
+
+
+    # Time series of a team's matchup stats and points, from start to end (unix timestamps)
+    @app.route("/api/<league_index>/history/team_key/<team_key>")
+    def get_team_history(league_index, team_key):
+        try:
+            league_id = refresher.league_ids[int(league_index)]
+        except IndexError:
+            return json.dumps({})
+        if refresher.history is None:
+            return json.dumps({})
+        # team keys are '<league_id>.t.<n>'
+        prefix, _, number = team_key.rpartition(".t.")
+        if not number.isdigit():
+            body = json.dumps({"error": "malformed team key", "team_key": team_key})
+            return Response(body, status=400, mimetype="application/json")
+        if prefix != league_id:
+            body = json.dumps({"error": "not a team of this league", "team_key": team_key})
+            return Response(body, status=404, mimetype="application/json")
+        end = request.args.get("end", time.time(), type=float)
+        start = request.args.get("start", end - HISTORY_DEFAULT_RANGE, type=float)
+        return json.dumps(refresher.history.team_history(league_id, team_key, start, end))
+
+
+    # Time series of a rostered player's projections and games, from start to end (unix timestamps)
+    @app.route("/api/<league_index>/history/player/<int:player_id>")
+    def get_player_history(league_index, player_id):
+        try:
+            league_id = refresher.league_ids[int(league_index)]
+        except IndexError:
+            return json.dumps({})
+        if refresher.history is None:
+            return json.dumps({})
+        end = request.args.get("end", time.time(), type=float)
+        start = request.args.get("start", end - HISTORY_DEFAULT_RANGE, type=float)
+        return json.dumps(refresher.history.player_history(league_id, player_id, start, end))
+
+
+    # Get rostered player by Yahoo player id
+    @app.route("/api/<league_index>/player/<player_id>")
+    def get_player(league_index, player_id):
+        try:
+            league = refresher.get_league(int(league_index))
+            if league is None:
+                return warming_response(int(league_index))
+            player = get_responses(league).player(player_id)
+            if player is None:
+                return json.dumps({})
+            return json_response(player, request)
+        except IndexError:
+            return json.dumps({})
+
+
+    # Catch-all route for React (handles React Router paths)
+    @app.route("/<path:path>")
+    def catch_all(path):
+        return redirect("/")
+
+
+    return app
@@ -0,0 +1,265 @@
+import json
+import secrets
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import weakref
+
+from config.constants import EVENT_CLIENT_QUEUE_SIZE, EVENT_HEARTBEAT_INTERVAL, EVENT_HISTORY_SIZE, EVENT_MAX_STREAMS
+from models.league import League
+from models.team import Team
+
+
+HEARTBEAT = b': heartbeat\n\n'
+
+
+def _escape(key: str) -> str:
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def json_patch(old: Any, new: Any, path: str = '') -> List[Dict]:
+    """RFC 6902 operations turning old into new; lists that change length are replaced whole"""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(old, dict):
+        patch = [{"op": "remove", "path": f"{path}/{_escape(key)}"} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                patch.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+            else:
+                patch.extend(json_patch(old[key], value, f"{path}/{_escape(key)}"))
+        return patch
+    if isinstance(old, list) and len(old) == len(new):
+        return [op for i, (a, b) in enumerate(zip(old, new)) for op in json_patch(a, b, f"{path}/{i}")]
+    return [] if old == new else [{"op": "replace", "path": path, "value": new}]
+
+
+def get_team_state(team: Team) -> Dict:
+    """The part of a team a live matchup dashboard shows"""
+    return {
+        "team_name": team.team_name,
+        "team_points": team.team_points,
+        "games_played": team.games_played,
+        "games_remaining": team.games_remaining,
+        "current_matchup_stats": team.current_matchup_stats.to_dict(),
+        "projected_matchup_stats": team.projected_matchup_stats.to_dict(),
+    }
+
+
+# Teams are reused across refreshes while unchanged, and so are their states
+_team_states: 'weakref.WeakKeyDictionary[Team, Dict]' = weakref.WeakKeyDictionary()
+
+
+def get_league_state(league: League) -> Dict:
+    """What a live matchup dashboard shows of a league; an unchanged team's state is the same object"""
+    teams = {}
+    for team in league.teams:
+        state = _team_states.get(team)
+        if state is None:
+            state = _team_states.setdefault(team, get_team_state(team))
+        teams[team.team_key] = state
+    return {
+        "current_week": league.current_week,
+        "current_day": league.current_day,
+        "matchups": [[matchup.team1.team_key, matchup.team2.team_key] for matchup in league.matchups],
+        "teams": teams,
+    }
+
+
+def _frame(event: str, event_id: str, payload) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(payload)}\n\n".encode('utf-8')
+
+
+class Subscriber:
+    """One client's bounded queue of frames, dropped and marked stale once it falls EVENT_CLIENT_QUEUE_SIZE behind"""
+
+    def __init__(self, max_size: int = EVENT_CLIENT_QUEUE_SIZE):
+        self.max_size = max_size
+        self.frames: Deque[bytes] = deque()
+        self.stale = False
+        self._condition = threading.Condition()
+
+
+    def put(self, frame: bytes):
+        with self._condition:
+            if self.stale:
+                return
+            if len(self.frames) >= self.max_size:
+                self.frames.clear()
+                self.stale = True
+            else:
+                self.frames.append(frame)
+            self._condition.notify()
+
+
+    def get(self, timeout: float) -> Tuple[bool, List[bytes]]:
+        """Waits for frames; returns whether the client went stale, and the frames to send"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.frames or self.stale, timeout)
+            frames = list(self.frames)
+            self.frames.clear()
+            return self.stale, frames
+
+
+    def reset(self, frames: List[bytes]):
+        with self._condition:
+            self.frames = deque(frames)
+            self.stale = False
+
+
+class LeagueEventStream:
+    """Matchup state of one league, and the patches between its published snapshots, each serialized once"""
+
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE):
+        self.epoch = secrets.token_hex(4)
+        self.version: Optional[int] = None
+        self._state: Dict = {}
+        self._snapshot: Optional[bytes] = None
+        # (version, frame) of recent patches; frame is None when nothing the stream shows changed
+        self._patches: Deque[Tuple[int, Optional[bytes]]] = deque(maxlen=history_size)
+        # the version the oldest kept patch applies to
+        self._base_version: Optional[int] = None
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+
+    def publish(self, version: int, state: Dict):
+        """Takes a league's version and state from get_league_state; older versions are ignored"""
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                return
+
+            frame, first = None, self.version is None
+            if first:
+                self._base_version = version
+            else:
+                if len(self._patches) == self._patches.maxlen:
+                    self._base_version = self._patches[0][0]
+                patch = self._diff(state)
+                if patch:
+                    frame = _frame('patch', self._event_id(version), patch)
+                self._patches.append((version, frame))
+
+            self.version, self._state, self._snapshot = version, state, None
+            if first:
+                # clients that subscribed while the league was warming start from its first snapshot
+                frame = self._get_snapshot()
+            if frame is not None:
+                for subscriber in self._subscribers:
+                    subscriber.put(frame)
+
+
+    def _diff(self, state: Dict) -> List[Dict]:
+        old = self._state
+        patch = json_patch(
+            {key: value for key, value in old.items() if key != "teams"},
+            {key: value for key, value in state.items() if key != "teams"},
+        )
+        for key in old["teams"]:
+            if key not in state["teams"]:
+                patch.append({"op": "remove", "path": f"/teams/{_escape(key)}"})
+        for key, team_state in state["teams"].items():
+            if key not in old["teams"]:
+                patch.append({"op": "add", "path": f"/teams/{_escape(key)}", "value": team_state})
+            elif old["teams"][key] is not team_state:
+                patch.extend(json_patch(old["teams"][key], team_state, f"/teams/{_escape(key)}"))
+        return patch
+
+
+    def _event_id(self, version: int) -> str:
+        return f"{self.epoch}:{version}"
+
+
+    def _get_snapshot(self) -> bytes:
+        if self._snapshot is None:
+            self._snapshot = _frame('snapshot', self._event_id(self.version), self._state)
+        return self._snapshot
+
+
+    def _catch_up(self, since: Optional[str]) -> List[bytes]:
+        """Frames bringing a client at event id since up to date, with the stream lock held"""
+        if self.version is None:
+            return []
+        epoch, _, version = (since or '').partition(':')
+        if epoch != self.epoch or not version.isdigit() or not self._base_version <= int(version) <= self.version:
+            return [self._get_snapshot()]
+        return [frame for v, frame in self._patches if v > int(version) and frame is not None]
+
+
+    def subscribe(self, since: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber()
+        with self._lock:
+            subscriber.reset(self._catch_up(since))
+            self._subscribers.append(subscriber)
+        return subscriber
+
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+
+    def resync(self, subscriber: Subscriber):
+        """Replaces a stale subscriber's dropped backlog with the current snapshot"""
+        with self._lock:
+            subscriber.reset([self._get_snapshot()])
+
+
+    def stream(self, since: Optional[str] = None, heartbeat: float = EVENT_HEARTBEAT_INTERVAL) -> Iterator[bytes]:
+        """Server-sent event frames for one client, until the client disconnects"""
+        subscriber = self.subscribe(since)
+        try:
+            while True:
+                stale, frames = subscriber.get(heartbeat)
+                if stale:
+                    self.resync(subscriber)
+                    continue
+                yield from frames or [HEARTBEAT]
+        finally:
+            self.unsubscribe(subscriber)
+
+
+    @property
+    def n_subscribers(self) -> int:
+        return len(self._subscribers)
+
+
+class EventBroker:
+    """One event stream per league id, fed by the refresher, streaming to at most max_streams clients at once"""
+
+    def __init__(self, max_streams: int = EVENT_MAX_STREAMS):
+        self.max_streams = max_streams
+        self.n_open = 0
+        self._streams: Dict[str, LeagueEventStream] = {}
+        self._lock = threading.Lock()
+
+
+    def acquire(self) -> bool:
+        """Takes a slot for a client's stream, or returns False if all max_streams are taken"""
+        with self._lock:
+            if self.n_open >= self.max_streams:
+                return False
+            self.n_open += 1
+            return True
+
+
+    def release(self):
+        with self._lock:
+            self.n_open -= 1
+
+
+    def get_stream(self, league_id: str) -> LeagueEventStream:
+        with self._lock:
+            stream = self._streams.get(league_id)
+            if stream is None:
+                stream = self._streams[league_id] = LeagueEventStream()
+            return stream
+
+
+    def publish(self, league_id: str, version: int, state: Dict):
+        self.get_stream(league_id).publish(version, state)
+
+
+    def to_dict(self):
+        return {league_id: stream.n_subscribers for league_id, stream in self._streams.items()}
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import json
+import pickle
+from typing import Dict, Optional
+import weakref
+
+from flask import Request, Response
+
+from api.events import get_league_state
+from config.constants import SIMULATION_MAX_WORKERS
+from models.league import League
+from models.simulation import simulate_matchups
+from models.team import Team
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class SerializedResponse:
+    """JSON body serialized once, with its ETag and pre-compressed variants, pickled out of band"""
+    __slots__ = ('body', 'etag', '_encoded')
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload).encode('utf-8')
+        self.etag = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self._encoded = {}
+
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == 'br':
+                body = brotli.compress(self.body)
+            else:
+                body = gzip.compress(self.body, compresslevel=6)
+            self._encoded[encoding] = body
+        return body
+
+
+    def __reduce_ex__(self, protocol):
+        # compressed once here rather than by every process that reads the snapshot
+        for encoding in ENCODINGS:
+            self.encoded(encoding)
+        buffer = pickle.PickleBuffer if protocol >= 5 else bytes
+        encoded = {encoding: buffer(body) for encoding, body in self._encoded.items()}
+        return _restore_serialized_response, (buffer(self.body), self.etag, encoded)
+
+
+def _restore_serialized_response(body, etag: str, encoded: Dict) -> SerializedResponse:
+    serialized = SerializedResponse.__new__(SerializedResponse)
+    serialized.body, serialized.etag, serialized._encoded = body, etag, encoded
+    return serialized
+
+
+# Teams are reused across refreshes while unchanged, so their bodies are kept per Team
+_team_responses: 'weakref.WeakKeyDictionary[Team, SerializedResponse]' = weakref.WeakKeyDictionary()
+
+
+def _get_team_response(team: Team) -> SerializedResponse:
+    serialized = _team_responses.get(team)
+    if serialized is None:
+        serialized = _team_responses.setdefault(team, SerializedResponse(team.to_dict()))
+    return serialized
+
+
+class LeagueResponses:
+    """Every response derived from one League, serialized on first use, or all at once when pickled"""
+
+    def __init__(self, league: League):
+        self.version = league.version
+        self._league = weakref.ref(league)
+        self._body: Optional[SerializedResponse] = None
+        self._teams: Optional[Dict[str, SerializedResponse]] = None
+        # team name -> team key
+        self._team_keys: Optional[Dict[str, str]] = None
+        self._players: Optional[Dict[str, SerializedResponse]] = None
+        self._simulations: Optional[SerializedResponse] = None
+        self._events_state: Optional[Dict] = None
+
+
+    def league(self) -> SerializedResponse:
+        if self._body is None:
+            self._body = SerializedResponse(self._league().to_dict())
+        return self._body
+
+
+    def _get_teams(self) -> Dict[str, SerializedResponse]:
+        if self._teams is None:
+            teams = self._league().teams
+            self._team_keys = {team.team_name: team.team_key for team in teams}
+            self._teams = {team.team_key: _get_team_response(team) for team in teams}
+        return self._teams
+
+
+    def team(self, team_key: str) -> Optional[SerializedResponse]:
+        return self._get_teams().get(team_key)
+
+
+    def team_by_name(self, team_name: str) -> Optional[SerializedResponse]:
+        teams = self._get_teams()
+        return teams.get(self._team_keys.get(team_name))
+
+
+    def _get_players(self) -> Dict[str, SerializedResponse]:
+        if self._players is None:
+            self._players = {
+                player_id: SerializedResponse(player.to_dict())
+                for player_id, player in self._league().players_by_id.items()
+            }
+        return self._players
+
+
+    def player(self, player_id: str) -> Optional[SerializedResponse]:
+        """A rostered player, by Yahoo player id"""
+        return self._get_players().get(str(player_id))
+
+
+    def simulations(self, max_workers: int = SIMULATION_MAX_WORKERS) -> SerializedResponse:
+        """Simulates the league's matchups once per League snapshot"""
+        if self._simulations is None:
+            simulations = simulate_matchups(self._league().matchups, max_workers=max_workers)
+            self._simulations = SerializedResponse([simulation.to_dict() for simulation in simulations])
+        return self._simulations
+
+
+    def events_state(self) -> Dict:
+        if self._events_state is None:
+            self._events_state = get_league_state(self._league())
+        return self._events_state
+
+
+    def render(self):
+        """Serializes every response now, e.g. before forking or publishing"""
+        self.league()
+        self._get_teams()
+        self._get_players()
+        # in process: a pool started here would be left behind in the gunicorn master
+        self.simulations(max_workers=1)
+        self.events_state()
+
+
+    def __getstate__(self):
+        self.render()
+        state = dict(self.__dict__)
+        state['_league'] = None
+        return state
+
+
+def _choose_encoding(request: Request) -> Optional[str]:
+    if brotli is not None and 'br' in request.accept_encodings:
+        return 'br'
+    if 'gzip' in request.accept_encodings:
+        return 'gzip'
+    return None
+
+
+def json_response(serialized: SerializedResponse, request: Request) -> Response:
+    """Serves a pre-serialized body, answering If-None-Match with a bodiless 304"""
+    if serialized.etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        encoding = _choose_encoding(request)
+        # a body read from a shared snapshot is a view of the mapping, which WSGI servers don't take
+        response = Response(bytes(serialized.encoded(encoding)), mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(serialized.etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
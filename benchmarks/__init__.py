@@ -0,0 +1,16 @@
+"""Benchmarks run offline by default: upstream pages are replayed from the fixtures checked in
+under data/fixtures, and the disk caches go to a scratch directory rather than data/cache, so
+results never depend on, or overwrite, what a local server has cached. Run with HTTP_MODE=live
+to fetch the real pages instead.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+
+os.environ.setdefault("HTTP_MODE", "replay")
+if "CACHE_DIRECTORY" not in os.environ:
+    # inherited by forked workers and server subprocesses, and removed by the parent on exit
+    os.environ["CACHE_DIRECTORY"] = tempfile.mkdtemp(prefix="benchmarks-cache-")
+    atexit.register(shutil.rmtree, os.environ["CACHE_DIRECTORY"], ignore_errors=True)
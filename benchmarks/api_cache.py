@@ -0,0 +1,79 @@
+"""Counts upstream calls and times League refreshes through the Yahoo API cache.
+
+Simulates a run of background refreshes on a fake clock, then a restart from the disk cache 30s later,
+then a burst of concurrent calls for the same endpoint.
+
+    python -m benchmarks.api_cache --teams 14 --latency 0.05 --refreshes 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.fake_league import FakeLeague
+from config.constants import LEAGUE_REFRESH_INTERVAL
+from data.player_stats import stats_store
+from data.schedule import schedule_store
+from data.yahoo_api import CachedLeague
+from models.league import League
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def timed_refresh(name: str, fake: FakeLeague, api_league):
+    n_calls = fake.n_calls
+    start = time.perf_counter()
+    League(api_league)
+    print(f"{name:<24} {time.perf_counter() - start:>6.2f}s {fake.n_calls - n_calls:>4} upstream calls")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--refreshes", type=int, default=4)
+    args = parser.parse_args()
+
+    # load projections and schedule up front so only API calls are timed
+    stats_store.snapshot()
+    schedule_store.snapshot()
+
+    fake = FakeLeague(n_teams=args.teams, latency=args.latency)
+    print(f"{args.teams} teams, {args.latency * 1000:.0f}ms per request")
+    timed_refresh("uncached", fake, fake)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_filename = os.path.join(directory, "league.pickle")
+        clock = FakeClock()
+        api_league = CachedLeague(fake, cache_filename=cache_filename, clock=clock)
+        for i in range(args.refreshes):
+            if i:
+                clock.now += LEAGUE_REFRESH_INTERVAL
+            timed_refresh(f"cached, refresh {i + 1}", fake, api_league)
+            api_league.save()
+        print(api_league.to_dict())
+
+        clock.now += 30
+        restarted = CachedLeague(fake, cache_filename=cache_filename, clock=clock)
+        timed_refresh("restart 30s later", fake, restarted)
+
+    api_league = CachedLeague(fake)
+    n_calls = fake.n_calls
+    threads = [threading.Thread(target=api_league.settings) for _ in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"32 concurrent settings() calls -> {fake.n_calls - n_calls} upstream call(s)")
+
+
+if __name__ == "__main__":
+    main()
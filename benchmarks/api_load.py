@@ -0,0 +1,47 @@
+"""Load test for /api/<league_index> against a fake league, through the Flask test client.
+
+Compares serializing the league on every request with the cached body, its gzip variant,
+and a conditional request answered with 304.
+
+    python -m benchmarks.api_load --teams 14 --requests 2000
+"""
+import argparse
+import json
+import time
+
+from api.app import create_app
+from benchmarks.fake_league import FakeGame
+from data.refresher import LeagueRefresher
+
+
+def requests_per_second(send, n_requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        send()
+    return n_requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    refresher = LeagueRefresher(FakeGame(n_teams=args.teams), api_cache_directory=None, history_directory=None)
+    refresher.refresh()
+    client = create_app(refresher).test_client()
+    league = refresher.leagues[0]
+    etag = client.get("/api/0").headers["ETag"]
+
+    scenarios = {
+        "json.dumps per request": lambda: json.dumps(league.to_dict()),
+        "cached body": lambda: client.get("/api/0"),
+        "cached gzip body": lambda: client.get("/api/0", headers={"Accept-Encoding": "gzip"}),
+        "If-None-Match (304)": lambda: client.get("/api/0", headers={"If-None-Match": etag}),
+    }
+    for name, send in scenarios.items():
+        print(f"{name:<24} {requests_per_second(send, args.requests):>8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
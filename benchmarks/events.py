@@ -0,0 +1,99 @@
+"""Compares polling the league JSON with pushed matchup patches, for many open dashboards.
+
+Every refresh a few teams' scores change. Polling re-sends the league to every client,
+serialized per request or once per refresh as /api/<league_index> does; pushing diffs the
+refresh once and hands the same patch frame to every subscriber. Also checks that applying
+each patch to the previous state gives the new state.
+
+    python -m benchmarks.events --teams 14 --clients 500 --refreshes 20
+"""
+import argparse
+import json
+import time
+
+from api.events import LeagueEventStream, get_league_state
+from api.responses import SerializedResponse
+from benchmarks.fake_league import FakeLeague
+from data.player_stats import stats_store
+from data.schedule import schedule_store
+from models.league import League
+
+
+def apply_patch(state, patch):
+    for operation in patch:
+        *parents, key = [part.replace('~1', '/').replace('~0', '~') for part in operation["path"].split('/')[1:]]
+        target = state
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if isinstance(target, list):
+            key = int(key)
+        if operation["op"] == "remove":
+            del target[key]
+        else:
+            target[key] = operation["value"]
+    return state
+
+
+def parse_frame(frame: bytes):
+    fields = dict(line.split(': ', 1) for line in frame.decode('utf-8').strip().split('\n'))
+    return fields["event"], json.loads(fields["data"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--refreshes", type=int, default=20)
+    parser.add_argument("--changed", type=int, default=2, help="teams whose scores change per refresh")
+    args = parser.parse_args()
+
+    stats_store.snapshot()
+    schedule_store.snapshot()
+    fake = FakeLeague(n_teams=args.teams)
+    league = League(fake)
+    stream = LeagueEventStream(history_size=args.refreshes)
+    stream.publish(league.version, get_league_state(league))
+    subscribers = [stream.subscribe() for _ in range(args.clients)]
+    _, state = parse_frame(subscribers[0].get(0)[1][0])
+    for subscriber in subscribers[1:]:
+        subscriber.get(0)
+
+    poll_time = cached_time = push_time = 0.0
+    poll_bytes = cached_bytes = push_bytes = 0
+    for refresh in range(args.refreshes):
+        for team_key in fake.team_keys[:args.changed]:
+            fake.scores[team_key] = fake._raw_team_stats()
+        league = League(fake, previous=league)
+
+        start = time.perf_counter()
+        for _ in range(args.clients):
+            poll_bytes += len(json.dumps(league.to_dict()).encode('utf-8'))
+        poll_time += time.perf_counter() - start
+        start = time.perf_counter()
+        cached_bytes += args.clients * len(SerializedResponse(league.to_dict()).body)
+        cached_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        stream.publish(league.version, get_league_state(league))
+        for subscriber in subscribers:
+            push_bytes += sum(len(frame) for frame in subscriber.get(0)[1])
+        push_time += time.perf_counter() - start
+
+    resumed = stream.subscribe(f"{stream.epoch}:{stream.version - args.refreshes}").get(0)[1]
+    for frame in resumed:
+        _, patch = parse_frame(frame)
+        apply_patch(state, patch)
+    _, expected = parse_frame(stream.subscribe().get(0)[1][0])
+
+    print(f"{args.teams} teams, {args.clients} clients, {args.refreshes} refreshes, {args.changed} teams changed each")
+    for name, seconds, n_bytes in (
+        ("full JSON per client", poll_time, poll_bytes),
+        ("cached full JSON", cached_time, cached_bytes),
+        ("shared patch frame", push_time, push_bytes),
+    ):
+        print(f"{name:<22} {seconds / args.refreshes * 1000:>9.1f}ms  {n_bytes / args.refreshes / 1e6:>8.2f}MB per refresh")
+    print(f"resumed {len(resumed)} patches, state matches snapshot: {state == expected}")
+
+
+if __name__ == "__main__":
+    main()
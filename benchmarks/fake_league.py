@@ -0,0 +1,193 @@
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from config.constants import PLAYER_STATS_FILENAME
+from utils.utils import get_adapted_team_abbreviation
+
+
+def load_player_pool() -> List[Dict]:
+    """Reads (name, team, positions) for every player in the projections file"""
+    pool = []
+    with open(PLAYER_STATS_FILENAME, mode="r") as file:
+        for line in file:
+            cells = line.strip().split("\t")
+            if len(cells) < 8 or not cells[0].isdigit():
+                continue
+            pool.append({
+                "name": cells[2],
+                "team": get_adapted_team_abbreviation(cells[4]),
+                "positions": cells[3].split(","),
+            })
+    return pool
+
+
+class FakeTeam:
+
+    def __init__(self, league: 'FakeLeague', team_key: str):
+        self._league = league
+        self.team_key = team_key
+
+
+    def roster(self):
+        self._league._sleep()
+        return self._league.rosters[self.team_key]
+
+
+class FakeLeague:
+    """Stand-in for yfa.League that serves generated data with artificial latency"""
+
+    def __init__(
+        self,
+        n_teams: int = 12,
+        roster_size: int = 13,
+        n_free_agents: int = 300,
+        latency: float = 0.0,
+        seed: int = 0,
+        current_day: Optional[int] = None,
+    ):
+        self.latency = latency
+        # the week is placed so that today is its current_day, or it is the calendar week
+        self.current_day = current_day
+        self.n_calls = 0
+        self._random = random.Random(seed)
+
+        pool = load_player_pool()
+        self._random.shuffle(pool)
+        self.team_keys = [f"454.l.{1000 + seed}.t.{i + 1}" for i in range(n_teams)]
+        self.rosters = {}
+        for i, team_key in enumerate(self.team_keys):
+            players = pool[i * roster_size:(i + 1) * roster_size]
+            self.rosters[team_key] = [self._raw_player(i * roster_size + j, p) for j, p in enumerate(players)]
+        self.scores = {team_key: self._raw_team_stats() for team_key in self.team_keys}
+        n_rostered = n_teams * roster_size
+        self.free_agent_pool = [
+            self._raw_player(n_rostered + i, p) for i, p in enumerate(pool[n_rostered:n_rostered + n_free_agents])
+        ]
+
+
+    def _sleep(self):
+        self.n_calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+    def _raw_player(self, player_id: int, player: Dict) -> Dict:
+        eligible_positions = player["positions"] + ["Util"]
+        return {
+            "player_id": 10000 + player_id,
+            "name": player["name"],
+            "status": "",
+            "position_type": "P",
+            "eligible_positions": eligible_positions,
+            "selected_position": eligible_positions[0],
+            "editorial_team_abbr": player["team"],
+        }
+
+
+    def _raw_team_stats(self) -> Dict:
+        fga = self._random.randint(80, 200)
+        fta = self._random.randint(20, 60)
+        values = {
+            "9004003": f"{int(fga * 0.47)}/{fga}",
+            "9007006": f"{int(fta * 0.78)}/{fta}",
+            "10": self._random.randint(10, 40),
+            "12": self._random.randint(200, 500),
+            "15": self._random.randint(80, 200),
+            "16": self._random.randint(40, 120),
+            "17": self._random.randint(5, 30),
+            "18": self._random.randint(5, 25),
+            "19": self._random.randint(20, 60),
+        }
+        remaining = self._random.randint(0, 30)
+        return {
+            "team_stats": {"stats": [
+                {"stat": {"stat_id": stat_id, "value": str(value)}} for stat_id, value in values.items()
+            ]},
+            "team_points": {"total": str(self._random.randint(0, 9))},
+            "team_remaining_games": {"total": {
+                "remaining_games": remaining,
+                "live_games": 0,
+                "completed_games": 40 - remaining,
+            }},
+        }
+
+
+    def settings(self):
+        self._sleep()
+        return {"name": "Fake League", "num_teams": len(self.team_keys), "max_weekly_adds": "4"}
+
+
+    def current_week(self):
+        self._sleep()
+        return 10
+
+
+    def week_date_range(self, week: int):
+        self._sleep()
+        current_day = date.today().weekday() if self.current_day is None else self.current_day
+        start = date.today() - timedelta(days=current_day)
+        return start, start + timedelta(days=6)
+
+
+    def teams(self):
+        self._sleep()
+        return {
+            team_key: {
+                "team_key": team_key,
+                "name": f"Team {i + 1}",
+                "waiver_priority": str(i + 1),
+                "roster_adds": {"coverage_type": "week", "coverage_value": "10", "value": "1"},
+            }
+            for i, team_key in enumerate(self.team_keys)
+        }
+
+
+    def matchups(self, week=None):
+        self._sleep()
+        matchups = {}
+        for i in range(0, len(self.team_keys) - 1, 2):
+            matchups[str(i // 2)] = {"matchup": {"0": {"teams": {
+                str(j): {"team": [[{"team_key": team_key}], self.scores[team_key]]}
+                for j, team_key in enumerate(self.team_keys[i:i + 2])
+            }}}}
+        matchups["count"] = len(matchups)
+        return {"fantasy_content": {"league": [{}, {"scoreboard": {"0": {"matchups": matchups}}}]}}
+
+
+    def positions(self):
+        self._sleep()
+        counts = {"PG": 1, "SG": 1, "G": 1, "SF": 1, "PF": 1, "F": 1, "C": 2, "Util": 2, "BN": 3, "IL": 2, "IL+": 1}
+        return {
+            position: {"count": count} if position in ("BN", "IL", "IL+") else {"position_type": "P", "count": count}
+            for position, count in counts.items()
+        }
+
+
+    def free_agents(self, position: str):
+        self._sleep()
+        return [
+            {key: player[key] for key in ("player_id", "name", "position_type", "eligible_positions", "status")}
+            for player in self.free_agent_pool
+            if position == "P" or position in player["eligible_positions"]
+        ]
+
+
+    def to_team(self, team_key: str) -> FakeTeam:
+        return FakeTeam(self, team_key)
+
+
+class FakeGame:
+    """Stand-in for yfa.Game that hands out FakeLeagues"""
+
+    def __init__(self, n_leagues: int = 1, **league_kwargs):
+        self.leagues = [FakeLeague(seed=i, **league_kwargs) for i in range(n_leagues)]
+
+
+    def league_ids(self, year: int):
+        return [f"454.l.{1000 + i}" for i in range(len(self.leagues))]
+
+
+    def to_league(self, league_id: str) -> FakeLeague:
+        return self.leagues[int(league_id.split(".")[-1]) - 1000]
@@ -0,0 +1,95 @@
+"""Times writes and range queries on the history store over a simulated season.
+
+Appends a snapshot of a fake league every 15 minutes for a whole season, sealing each week
+as the next one starts, then times range queries for one team and one player.
+
+    python -m benchmarks.history --teams 14 --weeks 22
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_league import FakeLeague
+from data.history import COLUMNS, HistoryStore, get_team_number
+from models.league import League
+
+
+SNAPSHOT_INTERVAL = 15 * 60
+SNAPSHOTS_PER_WEEK = 7 * 24 * 60 * 60 // SNAPSHOT_INTERVAL
+
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def row_bytes(table: str) -> int:
+    return sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for dtype, shape in COLUMNS[table].values())
+
+
+def timed(name: str, query, n_runs: int = 20):
+    start = time.perf_counter()
+    for _ in range(n_runs):
+        rows = query()
+    elapsed = (time.perf_counter() - start) / n_runs
+    print(f"{name:<32} {elapsed * 1000:>8.2f}ms {len(rows['timestamps']):>7} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--weeks", type=int, default=22)
+    args = parser.parse_args()
+
+    league = League(FakeLeague(n_teams=args.teams))
+    league_id = league.teams[0].team_key.rsplit(".t.", 1)[0]
+    team_key = league.teams[0].team_key
+    player_id = int(league.teams[0].roster[0].player_id)
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(directory)
+        # warm up, then simulate the season through the low-level append to skip building Leagues
+        store.record(league_id, league, timestamp=0)
+        teams = {
+            "team": np.array([get_team_number(team.team_key) for team in league.teams]),
+            "team_points": np.zeros(len(league.teams)),
+            "current_matchup_stats": np.array([team.current_matchup_stats.to_array() for team in league.teams]),
+            "projected_matchup_stats": np.array([team.projected_matchup_stats.to_array() for team in league.teams]),
+        }
+        players = [player for team in league.teams for player in team.roster]
+        players = {
+            "player": np.array([int(player.player_id) for player in players]),
+            "team": np.repeat(teams["team"], [len(team.roster) for team in league.teams]),
+            "stats": np.array([player.stats_vector for player in players]),
+            "games_remaining": np.array([player.games_remaining for player in players]),
+            "games_startable": np.array([player.games_startable for player in players]),
+        }
+
+        n_snapshots = args.weeks * SNAPSHOTS_PER_WEEK
+        start = time.perf_counter()
+        for i in range(1, n_snapshots):
+            teams["current_matchup_stats"] = teams["current_matchup_stats"] + rng.random(teams["current_matchup_stats"].shape)
+            store.append(league_id, i // SNAPSHOTS_PER_WEEK + 1, i * SNAPSHOT_INTERVAL, teams, players)
+        elapsed = time.perf_counter() - start
+        print(f"{n_snapshots} snapshots ({args.weeks} weeks), {len(teams['team'])} teams, {len(players['player'])} players")
+        print(f"append: {elapsed / n_snapshots * 1000:.2f}ms per snapshot, including sealing, {elapsed:.1f}s total")
+
+        raw_bytes = n_snapshots * (
+            len(teams["team"]) * row_bytes("teams") + len(players["player"]) * row_bytes("players")
+        )
+        print(f"on disk: {directory_size(directory) / 2 ** 20:.1f} MiB (~{raw_bytes / 2 ** 20:.0f} MiB uncompressed)")
+
+        season_end = n_snapshots * SNAPSHOT_INTERVAL
+        day = 24 * 60 * 60
+        timed("team, last day (open week)", lambda: store.team_history(league_id, team_key, season_end - day, season_end))
+        timed("team, a day in a sealed week", lambda: store.team_history(league_id, team_key, 3 * day, 4 * day))
+        timed("team, full season", lambda: store.team_history(league_id, team_key, 0, season_end), n_runs=3)
+        timed("player, last day (open week)", lambda: store.player_history(league_id, player_id, season_end - day, season_end))
+        timed("player, full season", lambda: store.player_history(league_id, player_id, 0, season_end), n_runs=3)
+
+
+if __name__ == "__main__":
+    main()
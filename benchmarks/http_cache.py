@@ -0,0 +1,77 @@
+"""Times the shared HTTP client against a local server serving a schedule-sized page.
+
+Compares a bare requests.get per fetch with the client's cold fetch, a 304 revalidation and a
+TTL hit, and counts the bytes the server sent for each.
+
+    python -m benchmarks.http_cache --kib 600 --fetches 50
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import tempfile
+import threading
+import time
+
+import requests
+
+from data.http_client import HttpClient
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = b""
+    bytes_sent = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"page"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"page"')
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+        PageHandler.bytes_sent += len(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(name: str, fetch, n_fetches: int):
+    PageHandler.bytes_sent = 0
+    start = time.perf_counter()
+    for _ in range(n_fetches):
+        fetch()
+    elapsed = (time.perf_counter() - start) / n_fetches
+    print(f"{name:<20} {elapsed * 1000:>8.2f} ms/fetch {PageHandler.bytes_sent / n_fetches / 1024:>8.0f} KiB/fetch")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kib", type=int, default=600)
+    parser.add_argument("--fetches", type=int, default=50)
+    args = parser.parse_args()
+
+    PageHandler.body = b"<tr><td>x</td></tr>" * (args.kib * 1024 // 19)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/schedule"
+
+    with tempfile.TemporaryDirectory() as directory:
+        cold_directories = (f"{directory}/cold/{i}" for i in range(args.fetches))
+        client = HttpClient("live", f"{directory}/cache", f"{directory}/fixtures")
+        client.get(url)
+
+        timed("bare requests.get", lambda: requests.get(url).content, args.fetches)
+        timed("client, cold", lambda: HttpClient("live", next(cold_directories)).get(url), args.fetches)
+        timed("client, 304", lambda: client.get(url, ttl=0), args.fetches)
+        timed("client, ttl hit", lambda: client.get(url, ttl=60), args.fetches)
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Times a cold `python -X importtime -c "import models.league"` on the baseline commit and this tree.
+
+Each tree is copied to a temporary directory without any bytecode, and imported with
+PYTHONDONTWRITEBYTECODE, so every run compiles the repo's modules like a fresh checkout does.
+The time is -X importtime's cumulative figure for models.league. The baseline loads the
+projections and fetches the schedule while importing, so it needs network access.
+
+    python -m benchmarks.import_time --runs 5 --baseline 36ca447
+"""
+import argparse
+import io
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from typing import List, Optional, Tuple
+
+
+BASELINE = "36ca447"
+IGNORED = shutil.ignore_patterns(".git", "__pycache__", "*.pyc", "web", "cache", "tests")
+
+
+def export_commit(commit: str, directory: str):
+    archive = subprocess.run(["git", "archive", commit], capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def time_import(directory: str) -> Tuple[Optional[float], str]:
+    """Cumulative import time of models.league in seconds, or None and why the import failed"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "PYTHONPATH": directory}
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import models.league"],
+        cwd=directory, env=env, capture_output=True, text=True,
+    )
+    lines = output.stderr.strip().splitlines()
+    if output.returncode != 0:
+        errors = [line for line in lines if not line.startswith("import time:")]
+        return None, errors[-1] if errors else f"exit status {output.returncode}"
+    for line in lines:
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "models.league":
+            return int(fields[1]) / 1e6, ""
+    return None, "models.league not in the -X importtime output"
+
+
+def report(name: str, directory: str, runs: int):
+    timings: List[float] = []
+    for _ in range(runs):
+        elapsed, error = time_import(directory)
+        if elapsed is None:
+            print(f"{name:<24} failed: {error}")
+            return
+        timings.append(elapsed)
+    print(f"{name:<24} median {statistics.median(timings) * 1000:>8.1f}ms  min {min(timings) * 1000:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as directory:
+        baseline, current = os.path.join(directory, "baseline"), os.path.join(directory, "current")
+        export_commit(args.baseline, baseline)
+        shutil.copytree(root, current, ignore=IGNORED)
+        print(f"cold `import models.league`, {args.runs} runs")
+        report(f"baseline ({args.baseline})", baseline, args.runs)
+        report("this tree", current, args.runs)
+
+
+if __name__ == "__main__":
+    main()
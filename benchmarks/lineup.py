@@ -0,0 +1,47 @@
+"""Times the daily slot assignment solver over a full league-week.
+
+Solves every team's lineups for all days of the week, first with an empty assignment cache
+and then with the cache warm, as on the next refresh. The league is pinned to the first day
+of the week, against the checked-in schedule, so the counts don't depend on the weekday.
+
+    python -m benchmarks.lineup --teams 14
+"""
+import argparse
+import time
+
+from benchmarks.fake_league import FakeLeague
+from data.schedule import schedule_store
+from models.league import League
+from models.lineup import assign_slots, get_active_slots, set_startable_games
+
+
+def solve_week(league: League) -> float:
+    schedule = schedule_store.value
+    slots = get_active_slots(league.positions)
+    start = time.perf_counter()
+    for team in league.teams:
+        set_startable_games(team.roster, schedule, 0, slots)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    args = parser.parse_args()
+
+    schedule_store.snapshot()
+    league = League(FakeLeague(n_teams=args.teams, current_day=0))
+    schedule = schedule_store.value
+    print(f"{args.teams} teams, {schedule.n_days} days, {len(get_active_slots(league.positions))} active slots")
+
+    assign_slots.cache_clear()
+    print(f"{'cold cache':<12} {solve_week(league) * 1000:>8.2f}ms")
+    print(f"{'warm cache':<12} {solve_week(league) * 1000:>8.2f}ms  {assign_slots.cache_info()}")
+
+    scheduled = sum(player.games_scheduled for team in league.teams for player in team.roster)
+    startable = sum(player.games_startable for team in league.teams for player in team.roster)
+    print(f"games scheduled {scheduled}, startable {startable} ({1 - startable / scheduled:.0%} overcount avoided)")
+
+
+if __name__ == "__main__":
+    main()
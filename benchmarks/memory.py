@@ -0,0 +1,86 @@
+"""Measures the memory held by League objects built from a fake league, using tracemalloc.
+
+Measures this tree, then the same fake leagues on the commit before the models were slotted,
+exported to a temporary directory and run in a subprocess. That commit fetches the schedule
+when it loads it, falling back to data/cache/schedule.pickle, so it is given this tree's copy.
+
+    python -m benchmarks.memory --leagues 10 --teams 14 --baseline 5e17789^
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from typing import Tuple
+
+from benchmarks.fake_league import FakeLeague
+from config.constants import SCHEDULE_CACHE_FILENAME
+from data.player_stats import stats_store
+from data.schedule import schedule_store
+from models.league import League
+
+
+# the parent of the commit that gave Player, Team and Stats __slots__
+BASELINE = "5e17789^"
+
+
+def measure(n_leagues: int, n_teams: int) -> Tuple[int, int]:
+    """Bytes held by n_leagues Leagues, and their number of players"""
+    # keep the shared datasets, player id index and fake payloads out of the measurement
+    stats_store.value, schedule_store.value
+    fakes = [FakeLeague(n_teams=n_teams, seed=i) for i in range(n_leagues)]
+    for fake in fakes:
+        League(fake)
+    gc.collect()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    leagues = [League(fake) for fake in fakes]
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before, sum(len(team.roster) for league in leagues for team in league.teams)
+
+
+def measure_baseline(commit: str, n_leagues: int, n_teams: int) -> Tuple[int, int]:
+    with tempfile.TemporaryDirectory() as directory:
+        archive = subprocess.run(["git", "archive", commit], capture_output=True, check=True).stdout
+        subprocess.run(["tar", "-x", "-C", directory], input=archive, check=True)
+        os.makedirs(os.path.join(directory, "data", "cache"), exist_ok=True)
+        shutil.copyfile(SCHEDULE_CACHE_FILENAME, os.path.join(directory, "data", "cache", "schedule.pickle"))
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--measure", "--leagues", str(n_leagues), "--teams", str(n_teams)],
+            cwd=directory, env={**os.environ, "PYTHONPATH": directory}, capture_output=True, text=True, check=True,
+        )
+    return tuple(json.loads(output.stdout.strip().splitlines()[-1]))
+
+
+def report(name: str, n_bytes: int, n_players: int, n_leagues: int):
+    print(f"{name:<24} {n_bytes / n_leagues / 1024:>8.1f} KiB per league, {n_bytes / n_players:>5.0f} bytes per player")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", type=int, default=10)
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--baseline", default=BASELINE)
+    # run by the baseline's subprocess
+    parser.add_argument("--measure", action="store_true")
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.leagues, args.teams)))
+        return
+    n_bytes, n_players = measure(args.leagues, args.teams)
+    baseline_bytes, baseline_players = measure_baseline(args.baseline, args.leagues, args.teams)
+    print(f"{args.leagues} leagues, {args.teams} teams, {n_players} players")
+    report(f"baseline ({args.baseline})", baseline_bytes, baseline_players, args.leagues)
+    report("this tree", n_bytes, n_players, args.leagues)
+
+
+if __name__ == "__main__":
+    main()
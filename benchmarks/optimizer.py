@@ -0,0 +1,60 @@
+"""Times the add/drop and lineup optimizer on a fake league and free-agent pool.
+
+Compares the batched pass over every add/drop with rebuilding a Team per candidate, the
+straightforward alternative, timed on a sample of candidates and extrapolated. The rebuild
+only recomputes projected totals, with no daily lineups or category odds.
+
+    python -m benchmarks.optimizer --teams 14 --free-agents 300
+"""
+import argparse
+import time
+
+from benchmarks.fake_league import FakeLeague
+from data.schedule import schedule_store
+from models.league import League
+from models.optimizer import optimize_moves
+from models.team import Team
+
+
+def rebuild_team(team: Team, add, drop) -> Team:
+    roster = [add if player is drop else player for player in team.roster]
+    return Team(
+        team.team_key, team.team_name, roster, team.waiver_priority, team.roster_adds,
+        team.current_matchup_stats, team.team_points, team.games_played, team.games_remaining,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--free-agents", type=int, default=300)
+    args = parser.parse_args()
+
+    schedule_store.snapshot()
+    league = League(FakeLeague(n_teams=args.teams, n_free_agents=args.free_agents))
+    free_agents = league.get_free_agents()
+    n_candidates = len(free_agents) * len(league.teams[0].roster)
+    print(f"{args.teams} teams, {len(free_agents)} free agents, ~{n_candidates} add/drops per team")
+
+    team = league.teams[0]
+    sample = [(add, drop) for add in free_agents[:20] for drop in team.roster]
+    start = time.perf_counter()
+    for add, drop in sample:
+        rebuild_team(team, add, drop)
+    per_candidate = (time.perf_counter() - start) / len(sample)
+    print(f"{'Team per candidate':<24} {per_candidate * n_candidates * 1000:>8.1f}ms per team (extrapolated)")
+
+    start = time.perf_counter()
+    for team in league.teams:
+        optimize_moves(league, team)
+    elapsed = time.perf_counter() - start
+    print(f"{'batched optimizer':<24} {elapsed / len(league.teams) * 1000:>8.1f}ms per team, {elapsed:.2f}s league")
+
+    baseline, moves = optimize_moves(league, league.teams[0], k=3)
+    print(f"baseline expected category score {baseline.expected_category_score:.2f}")
+    for move in moves:
+        print(f"  add {move.add.player_name}, drop {move.drop.player_name}: {move.gain:+.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Times extracting the schedule grid from a saved copy of the schedule page.
+
+Compares the old BeautifulSoup tree walk with the event-based ScheduleGridParser, reporting
+parse time and tracemalloc peak memory for each.
+
+    python -m benchmarks.parse_schedule path/to/advanced-nba-schedule-grid.html
+"""
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from data.schedule import generate_schedule
+from utils.utils import get_nba_team_abbreviation
+
+
+def legacy_generate_schedule(html_filename: str):
+    with open(html_filename, mode="rb") as file:
+        content = file.read()
+
+    soup = BeautifulSoup(content, "html.parser")
+    for script in soup(['script', 'head', 'input', 'th']):
+        script.extract()
+    soup = soup.find('table')
+
+    raw_schedule = {}
+    for row in soup.find_all('tr'):
+        cells = row.find_all(lambda tag: tag.name == "td" and tag.get("class") != ["cell-bg-1", "mw100"])
+        if len(cells) == 0:
+            continue
+        team_name = get_nba_team_abbreviation(cells[0].text.strip())
+        if team_name is None:
+            continue
+        raw_schedule[team_name] = [1 if td.text.strip() else 0 for td in cells[2:]]
+    return raw_schedule
+
+
+def measure(label: str, function, html_filename: str, repeat: int):
+    tracemalloc.start()
+    result = function(html_filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(html_filename)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<16} {elapsed * 1000:>8.1f}ms {peak / 1024:>10.0f} KiB peak")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("html", help="saved copy of the schedule grid page")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    legacy = measure("BeautifulSoup", legacy_generate_schedule, args.html, args.repeat)
+    streaming = measure("event parser", generate_schedule, args.html, args.repeat)
+    print(f"{len(streaming)} teams, same grid: {legacy == streaming}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Times parsing a synthetic projections file, built by repeating player_stats.txt.
+
+Compares the old readline/regex parser, the streaming iter_stats_records parser, and
+load_stats_table with a cold and a warm binary cache.
+
+    python -m benchmarks.parse_stats --players 5000
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from config.constants import PLAYER_STATS_FILENAME
+from data.player_stats import iter_stats_records, load_stats_table
+from utils.utils import clean_text
+
+
+def write_synthetic_file(filename: str, n_players: int):
+    with open(PLAYER_STATS_FILENAME, mode="r") as file:
+        lines = file.read().splitlines()
+    header, blocks = lines[0], []
+    for i, line in enumerate(lines):
+        if line[:1].isdigit() and "\t" in line:
+            blocks.append(lines[i:i + 10])
+
+    with open(filename, mode="w") as file:
+        file.write(header + "\n")
+        for i in range(n_players):
+            cells = blocks[i % len(blocks)][0].split("\t")
+            cells[0], cells[2] = str(i + 1), f"{cells[2]} {i // len(blocks)}"
+            file.write("\n".join(["\t".join(cells)] + blocks[i % len(blocks)][1:]) + "\n")
+
+
+def legacy_parse(filename: str) -> int:
+    n_players = 0
+    with open(filename, mode="r") as file:
+        while True:
+            line = file.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line.startswith("R#"):
+                continue
+            headers = line.split("\t")
+            clean_text(headers[2])
+            re.findall(r"[\d\.]+", headers[7])
+            for i in range(9):
+                line = file.readline().strip()
+                if i == 0:
+                    re.findall(r"[\d\.]+", line)
+                elif i < 8:
+                    float(line)
+            n_players += 1
+    return n_players
+
+
+def streaming_parse(filename: str) -> int:
+    with open(filename, mode="r") as file:
+        return sum(1 for _ in iter_stats_records(file))
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    function()
+    print(f"{label:<20} {(time.perf_counter() - start) * 1000:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "player_stats.txt")
+        table_filename = os.path.join(directory, "player_stats.npy")
+        write_synthetic_file(filename, args.players)
+
+        print(f"{args.players} players, {os.path.getsize(filename) / 1024:.0f} KiB")
+        timed("legacy parser", lambda: legacy_parse(filename))
+        timed("streaming parser", lambda: streaming_parse(filename))
+        timed("table, cold cache", lambda: load_stats_table(filename, table_filename))
+        timed("table, warm cache", lambda: load_stats_table(filename, table_filename))
+
+
+if __name__ == "__main__":
+    main()
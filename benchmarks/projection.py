@@ -0,0 +1,50 @@
+"""Times the matchup projection for every team in a fake league.
+
+Compares the old fold over Stats.__add__/Stats.__mul__ with the players x stats matrix
+product used by Team._generate_matchup_stats.
+
+    python -m benchmarks.projection --teams 14 --repeat 200
+"""
+import argparse
+import time
+
+from benchmarks.fake_league import FakeLeague
+from models.league import League
+from models.stats import Stats
+
+
+def fold_matchup_stats(team) -> Stats:
+    future_stats = Stats()
+    for player in team.roster:
+        future_stats = future_stats + (player.stats * player.games_remaining)
+    return team.current_matchup_stats + future_stats
+
+
+def time_projection(league: League, project, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for team in league.teams:
+            project(team)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    league = League(FakeLeague(n_teams=args.teams))
+    for team in league.teams:
+        # players without projections can't go through the Stats fold
+        team.roster = [player for player in team.roster if player.stats is not None]
+
+    fold = time_projection(league, fold_matchup_stats, args.repeat)
+    matrix = time_projection(league, lambda team: team._generate_matchup_stats(team.current_matchup_stats), args.repeat)
+    print(f"{args.teams} teams, per league projection")
+    print(f"Stats fold:     {fold * 1e6:.0f}us")
+    print(f"matrix product: {matrix * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
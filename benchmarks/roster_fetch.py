@@ -0,0 +1,32 @@
+"""Times League construction against a fake yfa.League with artificial latency.
+
+    python -m benchmarks.roster_fetch --teams 14 --latency 0.2
+"""
+import argparse
+import time
+
+from benchmarks.fake_league import FakeLeague
+from models.league import League
+
+
+def time_league_build(n_teams: int, latency: float, max_workers: int) -> float:
+    fake = FakeLeague(n_teams=n_teams, latency=latency)
+    start = time.perf_counter()
+    League(fake, max_workers=max_workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.teams} teams, {args.latency * 1000:.0f}ms per request")
+    for max_workers in (1, 4, args.teams):
+        elapsed = time_league_build(args.teams, args.latency, max_workers)
+        print(f"max_workers={max_workers:<3} {elapsed:.2f}s ({elapsed / args.latency:.1f}x latency)")
+
+
+if __name__ == "__main__":
+    main()
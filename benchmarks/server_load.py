@@ -0,0 +1,183 @@
+"""Load test of the development server against production gunicorn, over real sockets.
+
+Serves a fake league with `flask --debug run` (the old start.sh, without the reloader) and
+with gunicorn.conf.py, then drives each with concurrent keep-alive clients, wrk-style, over
+a mix of endpoints for a fixed duration, and reports throughput and latency percentiles.
+Each server is loaded twice: alone, then while --streams clients hold /events streams open,
+like dashboards left open, each of which keeps a server thread for as long as it's connected.
+The load generator runs on the same machine, so with few cores it competes with the server
+processes for CPU, which mostly shows up in the tail latencies.
+
+    python -m benchmarks.server_load --clients 16 --duration 10 --workers 3 --streams 64
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+import numpy as np
+from flask import Flask
+
+from api.app import create_app, warm_caches
+from benchmarks.fake_league import FakeGame
+from data.refresher import LeagueRefresher
+
+
+APP_FACTORY = "benchmarks.server_load:create_fake_app()"
+
+
+def create_fake_app() -> Flask:
+    refresher = LeagueRefresher(FakeGame(n_teams=14), api_cache_directory=None, history_directory=None)
+    refresher.refresh()
+    warm_caches(refresher)
+    return create_app(refresher)
+
+
+def get_paths(port: int) -> List[str]:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", "/api/0")
+    league = json.loads(connection.getresponse().read())
+    team_keys = [team["team_key"] for matchup in league["matchups"] for team in matchup.values()]
+    connection.close()
+    return (
+        ["/api/0"] * 4
+        + [f"/api/0/team_key/{team_key}" for team_key in team_keys]
+        + ["/api/0/simulations", "/api/valuations?page=2&punt=TOV", f"/api/0/team_key/{team_keys[0]}/moves"]
+    )
+
+
+def wait_until_ready(port: int, timeout: float = 120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api/0")
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Server on port {port} did not start")
+
+
+def run_client(port: int, paths: List[str], offset: int, stop: threading.Event, latencies: List[float], errors: List[int]):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    i = offset
+    while not stop.is_set():
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def load(port: int, n_clients: int, duration: float) -> Tuple[float, np.ndarray, int]:
+    paths = get_paths(port)
+    # warm every endpoint once, e.g. the simulations and free agents of the snapshot
+    for path in paths:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while True:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 202:
+                break
+            time.sleep(0.1)
+        connection.close()
+
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=run_client, args=(port, paths, i * 7, stop, latencies, errors))
+        for i in range(n_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / duration, np.array(latencies) * 1000, len(errors)
+
+
+def open_streams(port: int, n_streams: int) -> Tuple[List[http.client.HTTPConnection], int]:
+    """Event streams left open without reading them, and how many the server turned away"""
+    connections, n_refused = [], 0
+    for _ in range(n_streams):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request("GET", "/api/0/events")
+        response = connection.getresponse()
+        if response.status == 200:
+            connections.append(connection)
+        else:
+            response.read()
+            connection.close()
+            n_refused += 1
+    return connections, n_refused
+
+
+def report(name: str, throughput: float, latencies: np.ndarray, errors: int):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{name:<44} {throughput:>8.0f} req/s  p50 {p50:>7.1f}ms  p99 {p99:>7.1f}ms  errors {errors}")
+
+
+def serve(command: List[str], port: int, n_clients: int, n_streams: int, duration: float, name: str):
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    streams = []
+    try:
+        wait_until_ready(port)
+        report(name, *load(port, n_clients, duration))
+        streams, n_refused = open_streams(port, n_streams)
+        report(f"{name}, {len(streams)} streams ({n_refused} refused)", *load(port, n_clients, duration))
+    finally:
+        for connection in streams:
+            connection.close()
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--streams", type=int, default=64)
+    parser.add_argument("--port", type=int, default=5101)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.duration:.0f}s per run, {os.cpu_count()} cpus")
+    serve(
+        [sys.executable, "-m", "flask", "--app", APP_FACTORY, "--debug", "run", "--no-reload", "-p", str(args.port)],
+        args.port, args.clients, args.streams, args.duration, "flask --debug run",
+    )
+    serve(
+        [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{args.port + 1}",
+            "--workers", str(args.workers), APP_FACTORY,
+        ],
+        args.port + 1, args.clients, args.streams, args.duration, f"gunicorn {args.workers} workers",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Times Monte Carlo simulation of every matchup in a fake league, in process and over pools
+of each size. A pool's first (cold) run also starts its processes; the warm run shows what
+serving pays once it is up, and only beats in process given as many spare cores.
+
+    python -m benchmarks.simulation --teams 14 --simulations 100000
+"""
+import argparse
+import os
+import time
+
+from benchmarks.fake_league import FakeLeague
+from models.league import League
+from models.simulation import simulate_matchups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--simulations", type=int, default=100000)
+    args = parser.parse_args()
+
+    league = League(FakeLeague(n_teams=args.teams))
+    print(f"{len(league.matchups)} matchups, {args.simulations} simulated weeks each, {os.cpu_count()} cpus")
+
+    for max_workers in (1, 2, 4):
+        for run in ("cold", "warm"):
+            start = time.perf_counter()
+            simulations = simulate_matchups(league.matchups, args.simulations, seed=0, max_workers=max_workers)
+            print(f"max_workers={max_workers} {run:<5} {time.perf_counter() - start:.3f}s")
+
+    print(simulations[0].to_dict())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Compares worker processes that each refresh their own leagues with one shared snapshot.
+
+Forks --workers processes from a parent that has loaded (and, when shared, published) the
+projections and schedule, as the gunicorn master does. Independently, every worker builds
+every league on each refresh. Shared, one worker is elected publisher and refreshes, and the
+others adopt each version from the mapped snapshot. Either way, every worker then serves all
+of each league's responses (league, teams, players, simulations and event state): rendered
+by each worker when independent, read from the mapping when shared. Reports upstream calls,
+the workers' private memory and how long publishing and adopting a version take.
+
+    python -m benchmarks.snapshot --workers 4 --leagues 3 --teams 12 --refreshes 3
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict
+
+from api.app import create_app, get_responses
+from benchmarks.fake_league import FakeGame
+from data.http_client import http_client
+from data.player_stats import stats_store
+from data.refresher import LeagueRefresher
+from data.schedule import schedule_store
+from models.league import reset_roster_executors
+from models.simulation import reset_executors
+
+
+def private_memory() -> int:
+    """Bytes of this process's pages that no other process shares (USS)"""
+    with open("/proc/self/smaps_rollup") as file:
+        fields = dict(line.split(":", 1) for line in file if ":" in line)
+    return sum(int(fields[field].split()[0]) * 1024 for field in ("Private_Clean", "Private_Dirty"))
+
+
+def refresh(refresher: LeagueRefresher):
+    # expire the API cache, as the TTLs do between real refreshes
+    for api_league in refresher._api_leagues.values():
+        api_league.invalidate()
+    refresher.refresh()
+
+
+def count_calls(refresher: LeagueRefresher) -> int:
+    return sum(api_league._backend.n_calls for api_league in refresher._api_leagues.values())
+
+
+def serve(refresher: LeagueRefresher):
+    for league in refresher.leagues:
+        if league is not None:
+            get_responses(league).render()
+
+
+def worker(args, refresher: LeagueRefresher, results):
+    memory = private_memory()
+    # as gunicorn.conf.py's post_fork does
+    reset_roster_executors()
+    reset_executors()
+    http_client.session.close()
+    refresher.after_fork()
+    result: Dict = {"publish": [], "adopt": []}
+    if refresher.snapshots is None or refresher.snapshots.leagues.try_acquire_publisher():
+        refresher.is_publisher = refresher.snapshots is not None
+        for _ in range(args.refreshes):
+            start = time.perf_counter()
+            refresh(refresher)
+            serve(refresher)
+            result["publish"].append(time.perf_counter() - start)
+    else:
+        # every build is published, so the last version is one per league and refresh
+        while refresher.snapshots.version < 1 + args.refreshes * args.leagues:
+            if refresher.snapshots.has_new_version:
+                start = time.perf_counter()
+                refresher._adopt_snapshot()
+                serve(refresher)
+                result["adopt"].append(time.perf_counter() - start)
+            time.sleep(0.001)
+    result["calls"] = count_calls(refresher)
+    result["memory"] = private_memory() - memory
+    results.put(result)
+
+
+def run(args, snapshot_directory) -> Dict:
+    # set up like wsgi.py and gunicorn.conf.py, minus the initial build
+    refresher = LeagueRefresher(
+        FakeGame(n_leagues=args.leagues, n_teams=args.teams),
+        api_cache_directory=None,
+        history_directory=None,
+        eager_indexes=None,
+        snapshot_directory=snapshot_directory,
+    )
+    # registers the app's renderer, whose responses the shared snapshot carries
+    create_app(refresher, simulation_workers=1)
+    refresher.discover()
+    if snapshot_directory is not None:
+        refresher.publish_snapshot()
+    gc.freeze()
+
+    results = multiprocessing.get_context("fork").Queue()
+    workers = [
+        multiprocessing.get_context("fork").Process(target=worker, args=(args, refresher, results))
+        for _ in range(args.workers)
+    ]
+    for process in workers:
+        process.start()
+    outcomes = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    return {
+        "calls": sum(outcome["calls"] for outcome in outcomes),
+        "memory": sum(outcome["memory"] for outcome in outcomes),
+        "refresh": [t for outcome in outcomes for t in outcome["publish"]],
+        "adopt": [t for outcome in outcomes for t in outcome["adopt"]],
+        "follower_memory": [outcome["memory"] for outcome in outcomes if outcome["adopt"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--leagues", type=int, default=3)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--refreshes", type=int, default=3)
+    args = parser.parse_args()
+
+    stats_store.snapshot()
+    schedule_store.snapshot()
+    print(f"{args.workers} workers, {args.leagues} leagues of {args.teams} teams, {args.refreshes} refreshes")
+
+    independent = run(args, None)
+    with tempfile.TemporaryDirectory() as directory:
+        shared = run(args, directory)
+        payload_sizes = [
+            os.path.getsize(os.path.join(directory, channel, name))
+            for channel in ("leagues", "data") for name in os.listdir(os.path.join(directory, channel))
+            if name.startswith("snapshot.")
+        ]
+
+    for name, outcome in (("independent", independent), ("shared snapshot", shared)):
+        print(
+            f"{name:<16} {outcome['calls']:>6} upstream calls  {outcome['memory'] / 1e6:>7.1f}MB private memory"
+            f"  {sum(outcome['refresh']) / len(outcome['refresh']) * 1000:>7.1f}ms per refresh"
+        )
+    adopt, follower_memory = shared["adopt"], shared["follower_memory"]
+    print(f"largest payload {max(payload_sizes) / 1e3:.0f}kB, adopted {len(adopt)} times, {sum(adopt) / len(adopt) * 1000:.1f}ms each")
+    print(f"each follower {sum(follower_memory) / len(follower_memory) / 1e6:.1f}MB private memory, independent worker {independent['memory'] / args.workers / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Times startup against a fake account in several leagues with artificial latency.
+
+Compares building every League one after another before serving (the old main.py) with a
+concurrent refresh of all leagues, and with lazy start, where only league 0 is built eagerly
+and the app answers warming responses until a league is ready.
+
+    python -m benchmarks.startup --leagues 6 --teams 12 --latency 0.05
+"""
+import argparse
+import time
+
+from api.app import create_app
+from benchmarks.fake_league import FakeGame
+from data.player_stats import stats_store
+from data.refresher import LeagueRefresher
+from data.schedule import schedule_store
+from models.league import League
+
+
+def wait_until_ready(client, league_index: int, start: float) -> float:
+    while client.get(f"/api/{league_index}").status_code == 202:
+        time.sleep(0.005)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", type=int, default=6)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # load projections and schedule up front so only league construction is timed
+    stats_store.snapshot()
+    schedule_store.snapshot()
+    game = FakeGame(n_leagues=args.leagues, n_teams=args.teams, latency=args.latency)
+    print(f"{args.leagues} leagues, {args.teams} teams, {args.latency * 1000:.0f}ms per request")
+
+    start = time.perf_counter()
+    for league_id in game.league_ids(year=0):
+        League(game.to_league(league_id))
+    print(f"{'sequential, all leagues':<32} {time.perf_counter() - start:>6.2f}s before serving")
+
+    start = time.perf_counter()
+    LeagueRefresher(game, api_cache_directory=None, eager_indexes=None, history_directory=None).refresh()
+    print(f"{'concurrent refresh, all leagues':<32} {time.perf_counter() - start:>6.2f}s before serving")
+
+    start = time.perf_counter()
+    refresher = LeagueRefresher(game, api_cache_directory=None, history_directory=None)
+    refresher.start()
+    client = create_app(refresher).test_client()
+    first_response = client.get(f"/api/{args.leagues - 1}")
+    print(f"{'lazy start, first response':<32} {time.perf_counter() - start:>6.2f}s ({first_response.status_code})")
+    print(f"{'lazy start, league 0 ready':<32} {wait_until_ready(client, 0, start):>6.2f}s")
+    print(f"{'lazy start, last league ready':<32} {wait_until_ready(client, args.leagues - 1, start):>6.2f}s")
+    refresher.stop()
+
+
+if __name__ == "__main__":
+    main()
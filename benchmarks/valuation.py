@@ -0,0 +1,75 @@
+"""Times the player valuation engine over the full projection table.
+
+Compares computing the z-scores with a Python loop per player against the vectorized build,
+then times a cached lookup and a page of the sorted table, as served per request.
+
+    python -m benchmarks.valuation --repeat 20
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from config.constants import VALUATION_POOL_SIZE
+from data.player_stats import stats_store
+from data.schedule import schedule_store
+from models.simulation import CATEGORIES
+from models.stats import N_STATS
+from models.valuation import PlayerValuations, get_current_day, get_player_valuations
+
+
+def loop_z_scores(per_game: np.ndarray, pool_size: int) -> list:
+    """The same two-pass z-scores, one player and category at a time"""
+    def z_scores(pool):
+        rows = []
+        fg_pct = sum(per_game[i][1] for i in pool) / sum(per_game[i][0] for i in pool)
+        ft_pct = sum(per_game[i][3] for i in pool) / sum(per_game[i][2] for i in pool)
+        for stats in per_game:
+            rows.append([stats[1] - fg_pct * stats[0], stats[3] - ft_pct * stats[2], *stats[4:10], -stats[10]])
+        columns = [[rows[i][c] for i in pool] for c in range(len(CATEGORIES))]
+        means, deviations = [statistics.fmean(c) for c in columns], [statistics.pstdev(c) or 1 for c in columns]
+        return [[(v - m) / d for v, m, d in zip(row, means, deviations)] for row in rows]
+
+    first = z_scores(range(len(per_game)))
+    pool = sorted(range(len(per_game)), key=lambda i: -sum(first[i]))[:pool_size]
+    return z_scores(pool)
+
+
+def best_of(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    _, (player_stats, player_teams, _) = stats_store.snapshot()
+    schedule = schedule_store.value
+    names = list(player_stats)
+    teams = [player_teams[name] for name in names]
+    per_game = np.array([player_stats[name].to_array() for name in names]).reshape(-1, N_STATS)
+    valuations = get_player_valuations()
+    print(f"{len(names)} players, {len(CATEGORIES)} categories")
+
+    rows = per_game.tolist()
+    print(f"{'python loop':<16} {best_of(lambda: loop_z_scores(rows, VALUATION_POOL_SIZE), args.repeat):>8.2f}ms")
+    print(f"{'vectorized':<16} {best_of(lambda: PlayerValuations(names, teams, per_game), args.repeat):>8.2f}ms")
+    print(f"{'cached':<16} {best_of(get_player_valuations, args.repeat):>8.4f}ms")
+
+    current_day = get_current_day(schedule)
+    page = lambda: valuations.table(schedule, current_day, punt=('FT%', 'TOV'), sort='weekly_value', offset=50)
+    print(f"{'page of table':<16} {best_of(page, args.repeat):>8.2f}ms")
+
+    expected = np.array(loop_z_scores(rows, VALUATION_POOL_SIZE))
+    print(f"max difference from loop {np.abs(expected - valuations.z_scores).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
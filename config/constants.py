@@ -1,4 +1,5 @@
 from enum import Enum
+import os
 
 
 # League Constants
@@ -10,6 +11,121 @@ LEAGUE_INDEX = 0
 # Filenames
 OAUTH2_JSON_FILENAME = 'oauth2.json'
 PLAYER_STATS_FILENAME = 'data/player_stats.txt'
+CACHE_DIRECTORY = os.environ.get('CACHE_DIRECTORY', 'data/cache')
+PLAYER_STATS_TABLE_FILENAME = f'{CACHE_DIRECTORY}/player_stats.npy'
+SCHEDULE_CACHE_FILENAME = f'{CACHE_DIRECTORY}/schedule.pickle'
+# Saved copy of the schedule grid page, read instead of SCHEDULE_URL when set
+SCHEDULE_HTML_FILENAME = os.environ.get('SCHEDULE_HTML_FILENAME')
+PROJECTIONS_REQUEST_BODY_FILENAME = 'data/stats_request_body'
+HISTORY_DIRECTORY = 'data/history'
+
+
+# Upstream URLs
+SCHEDULE_URL = 'https://hashtagbasketball.com/advanced-nba-schedule-grid'
+PROJECTIONS_URL = 'https://hashtagbasketball.com/fantasy-basketball-projections'
+PROJECTIONS_TABLE_ID = 'ContentPlaceHolder1_GridView1'
+# Fetch projections from PROJECTIONS_URL on every stats refresh instead of reading PLAYER_STATS_FILENAME
+FETCH_PROJECTIONS = os.environ.get('FETCH_PROJECTIONS', '0') == '1'
+
+
+# Upstream HTTP Settings
+HTTP_MODE = os.environ.get('HTTP_MODE', 'live')  # live, record or replay
+HTTP_CACHE_DIRECTORY = f'{CACHE_DIRECTORY}/http'
+HTTP_FIXTURES_DIRECTORY = os.environ.get('HTTP_FIXTURES_DIRECTORY', 'data/fixtures')
+HTTP_TIMEOUT = 30  # seconds
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_POOL_SIZE = 4
+SCHEDULE_TTL = 6 * 60 * 60  # seconds
+PROJECTIONS_TTL = 12 * 60 * 60  # seconds
+
+
+# Yahoo API Request Settings
+ROSTER_FETCH_MAX_WORKERS = 8
+ROSTER_FETCH_TIMEOUT = 10  # seconds
+YAHOO_API_TIMEOUT = 10  # seconds per request, instead of rauth's default of five minutes
+LEAGUE_BUILD_MAX_WORKERS = 4
+YAHOO_API_CACHE_DIRECTORY = f'{CACHE_DIRECTORY}/yahoo'
+# Seconds each endpoint's response is reused. Anything that changes during a week is kept
+# shorter than LEAGUE_REFRESH_INTERVAL, so every background refresh still sees fresh data.
+# current_week changes at the week boundary, so it is kept no longer than the scoreboard;
+# week_date_range is per week and never changes.
+YAHOO_API_TTLS = {
+    'settings': 24 * 60 * 60,
+    'current_week': 60,
+    'week_date_range': 24 * 60 * 60,
+    'teams': 5 * 60,
+    'matchups': 60,
+    'roster': 5 * 60,
+    'positions': 24 * 60 * 60,
+    'free_agents': 5 * 60,
+}
+
+
+# Production Server Settings (gunicorn.conf.py)
+SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:5001')
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+# threads per worker; every open event stream holds one of them
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 32))
+SERVER_TIMEOUT = 30  # seconds
+# every worker is already a process, so simulations run in the request's thread instead of a pool per worker
+SERVER_SIMULATION_WORKERS = 1
+
+
+# Shared Snapshot Settings (production server workers)
+SNAPSHOT_DIRECTORY = f'{CACHE_DIRECTORY}/snapshot'
+SNAPSHOT_POLL_INTERVAL = 1  # seconds between workers' checks for a new snapshot or a vacant publisher role
+SNAPSHOT_KEEP_VERSIONS = 2  # payload files kept on disk, for readers mapping the previous version
+
+
+# Background Refresh Settings
+LEAGUE_REFRESH_INTERVAL = 15 * 60  # seconds
+# player stats and schedule reload on the first league refresh after this hour each day
+DATA_REFRESH_HOUR = 3
+DATA_REFRESH_TIMEZONE = 'US/Eastern'
+
+
+# Lineup Settings
+SLOT_ASSIGNMENT_CACHE_SIZE = 1 << 14
+
+
+# Lineup Optimizer Settings
+FREE_AGENT_POSITION = 'P'  # position type shared by every NBA player, i.e. all free agents
+OPTIMIZER_TOP_K = 10
+# the most moves a request may ask for, as each one is re-solved with position eligibility
+OPTIMIZER_MAX_K = 50
+# Candidates per returned move that are re-solved with position eligibility before the final ranking
+OPTIMIZER_SHORTLIST_FACTOR = 5
+# Roster slots that never play; players in injured list slots don't take a roster spot either
+INJURED_LIST_POSITIONS = ('IL', 'IL+')
+INACTIVE_POSITIONS = ('BN',) + INJURED_LIST_POSITIONS
+
+
+# Player Valuation Settings
+VALUATION_POOL_SIZE = 156  # players the z-scores are normalized over, i.e. every roster spot in a 12 team league
+VALUATION_PAGE_SIZE = 50
+VALUATION_MAX_PAGE_SIZE = 500
+
+
+# Live Update Settings
+EVENT_HISTORY_SIZE = 32  # patches kept per league for clients resuming from an older version
+EVENT_CLIENT_QUEUE_SIZE = 16  # frames a slow client may fall behind before it is resynced with a snapshot
+EVENT_HEARTBEAT_INTERVAL = 15  # seconds, keeps idle connections open and detects dropped clients
+# every open stream holds one of a worker's SERVER_THREADS, so streams past this get a 503 instead
+EVENT_MAX_STREAMS = int(os.environ.get('EVENT_MAX_STREAMS', max(SERVER_THREADS // 4, 1)))
+EVENT_RETRY_AFTER = 10  # seconds a client turned away with a 503 waits before trying again
+
+
+# League History Settings
+HISTORY_DEFAULT_RANGE = 7 * 24 * 60 * 60  # seconds served when a history request gives no start
+
+
+# Matchup Simulation Settings
+SIMULATIONS_PER_MATCHUP = 20000
+SIMULATION_BATCH_SIZE = 50000
+# 1 simulates in the request's thread; a pool only pays off with spare cores, and is forked
+# from a multithreaded server process
+SIMULATION_MAX_WORKERS = int(os.environ.get('SIMULATION_MAX_WORKERS', 1))
 
 
 # Yahoo API Stat IDs
@@ -0,0 +1,311 @@
+from contextlib import contextmanager
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from config.constants import HISTORY_DIRECTORY
+from models.league import League
+from models.stats import N_STATS, STAT_FIELDS
+from utils.utils import atomic_write
+
+
+logger = logging.getLogger(__name__)
+
+# Columns of each table: name, dtype and per-row shape. Rows are appended in timestamp order.
+TABLES = {
+    'teams': (
+        ('timestamp', '<f8', ()),
+        ('team', '<i2', ()),
+        ('team_points', '<f4', ()),
+        ('current_matchup_stats', '<f4', (N_STATS,)),
+        ('projected_matchup_stats', '<f4', (N_STATS,)),
+    ),
+    'players': (
+        ('timestamp', '<f8', ()),
+        ('player', '<i4', ()),
+        ('team', '<i2', ()),
+        ('stats', '<f4', (N_STATS,)),
+        ('games_remaining', '<i1', ()),
+        ('games_startable', '<i1', ()),
+    ),
+}
+COLUMNS = {table: {name: (dtype, shape) for name, dtype, shape in columns} for table, columns in TABLES.items()}
+
+
+def get_team_number(team_key: str) -> int:
+    """Team keys are '<league_id>.t.<n>', so a league's teams are told apart by n"""
+    return int(team_key.rsplit('.', 1)[1])
+
+
+class OpenSegment:
+    """The current week: one raw file per column, appended to and read through memory maps"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+
+    def _filename(self, table: str, column: str) -> str:
+        return os.path.join(self.directory, table, f'{column}.bin')
+
+
+    def append(self, table: str, rows: Dict[str, np.ndarray]):
+        os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+        for column, (dtype, _) in COLUMNS[table].items():
+            with open(self._filename(table, column), mode='ab') as file:
+                file.write(np.ascontiguousarray(rows[column], dtype=dtype).tobytes())
+
+
+    def n_rows(self, table: str) -> int:
+        """Rows present in every column, so a torn append is never read"""
+        n_rows = []
+        for column, (dtype, shape) in COLUMNS[table].items():
+            filename = self._filename(table, column)
+            size = os.path.getsize(filename) if os.path.exists(filename) else 0
+            n_rows.append(size // (np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))))
+        return min(n_rows)
+
+
+    def column(self, table: str, column: str, n_rows: int) -> np.ndarray:
+        dtype, shape = COLUMNS[table][column]
+        if n_rows == 0:
+            return np.empty((0, *shape), dtype=dtype)
+        return np.memmap(self._filename(table, column), dtype=dtype, mode='r', shape=(n_rows, *shape))
+
+
+    def columns(self, table: str, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        n_rows = self.n_rows(table)
+        return {column: self.column(table, column, n_rows) for column in columns}
+
+
+class SealedSegment:
+    """A finished week, compressed into one .npz; each column is only inflated when read"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+
+    def columns(self, table: str, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        with np.load(self.filename) as archive:
+            return {column: archive[f'{table}.{column}'] for column in columns}
+
+
+class HistoryStore:
+    """Append-only, columnar history of league snapshots, one segment per league and week"""
+
+    def __init__(self, directory: str = HISTORY_DIRECTORY):
+        self.directory = directory
+        # league id -> (identity of the index.json it was read from, index)
+        self._indexes: Dict[str, Tuple[Optional[Tuple[int, int]], Dict]] = {}
+
+
+    def _league_directory(self, league_id: str) -> str:
+        return os.path.join(self.directory, league_id)
+
+
+    @contextmanager
+    def _lock(self, league_id: str, shared: bool = False) -> Iterator[None]:
+        """Locks a league's files, shared to read them and exclusive to write them. Each holder
+        opens the lock file anew, so threads are kept apart just like other processes writing
+        the same directory, e.g. the gunicorn master and a worker taking over as publisher"""
+        directory = self._league_directory(league_id)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'lock'), mode='a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+
+    def _index_filename(self, league_id: str) -> str:
+        return os.path.join(self._league_directory(league_id), 'index.json')
+
+
+    def _index_identity(self, league_id: str) -> Optional[Tuple[int, int]]:
+        # every write replaces the file, so a new inode or mtime means another process wrote it
+        try:
+            stat = os.stat(self._index_filename(league_id))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+
+    def _index(self, league_id: str) -> Dict:
+        """Week number -> {first, last, sealed}, kept in index.json next to the segments"""
+        identity = self._index_identity(league_id)
+        cached = self._indexes.get(league_id)
+        if cached is None or cached[0] != identity:
+            index = {}
+            if identity is not None:
+                with open(self._index_filename(league_id), mode='r') as file:
+                    index = {int(week): entry for week, entry in json.load(file).items()}
+            cached = self._indexes[league_id] = (identity, index)
+        return cached[1]
+
+
+    def _write_index(self, league_id: str):
+        filename = self._index_filename(league_id)
+        index = self._index(league_id)
+        with atomic_write(filename, mode='w') as file:
+            json.dump(index, file)
+        self._indexes[league_id] = (self._index_identity(league_id), index)
+
+
+    def _segment(self, league_id: str, week: int):
+        if self._index(league_id)[week]['sealed']:
+            return SealedSegment(os.path.join(self._league_directory(league_id), f'week_{week}.npz'))
+        return OpenSegment(os.path.join(self._league_directory(league_id), f'week_{week}'))
+
+
+    def record(self, league_id: str, league: League, timestamp: Optional[float] = None):
+        """Appends one snapshot of every team and rostered player"""
+        timestamp = time.time() if timestamp is None else timestamp
+        teams, players = league.teams, [player for team in league.teams for player in team.roster]
+        team_numbers = np.array([get_team_number(team.team_key) for team in league.teams])
+        self.append(
+            league_id,
+            league.current_week,
+            timestamp,
+            {
+                'team': team_numbers,
+                'team_points': np.array([float(team.team_points) for team in teams]),
+                'current_matchup_stats': np.array([team.current_matchup_stats.to_array() for team in teams]),
+                'projected_matchup_stats': np.array([team.projected_matchup_stats.to_array() for team in teams]),
+            },
+            {
+                'player': np.array([int(player.player_id) for player in players]),
+                'team': np.repeat(team_numbers, [len(team.roster) for team in teams]),
+                'stats': np.array([player.stats_vector for player in players]).reshape(-1, N_STATS),
+                'games_remaining': np.array([player.games_remaining for player in players]),
+                'games_startable': np.array([player.games_startable for player in players]),
+            },
+        )
+
+
+    def append(
+        self,
+        league_id: str,
+        week: int,
+        timestamp: float,
+        teams: Dict[str, np.ndarray],
+        players: Dict[str, np.ndarray],
+    ):
+        with self._lock(league_id):
+            index = self._index(league_id)
+            last = max((entry['last'] for entry in index.values()), default=timestamp)
+            timestamp = max(timestamp, last)
+            for open_week in [w for w, entry in index.items() if w < week and not entry['sealed']]:
+                self._seal(league_id, open_week)
+
+            entry = index.setdefault(week, {'first': timestamp, 'last': timestamp, 'sealed': False})
+            if entry['sealed']:
+                raise ValueError(f"Week {week} of {league_id} is already sealed")
+            segment = self._segment(league_id, week)
+            for table, rows in (('teams', teams), ('players', players)):
+                n_rows = len(next(iter(rows.values())))
+                segment.append(table, {'timestamp': np.full(n_rows, timestamp), **rows})
+            entry['last'] = timestamp
+            self._write_index(league_id)
+
+
+    def seal(self, league_id: str, week: int):
+        with self._lock(league_id):
+            self._seal(league_id, week)
+            self._write_index(league_id)
+
+
+    def _seal(self, league_id: str, week: int):
+        segment = self._segment(league_id, week)
+        arrays = {
+            f'{table}.{column}': np.asarray(values)
+            for table in TABLES for column, values in segment.columns(table, COLUMNS[table]).items()
+        }
+        filename = os.path.join(self._league_directory(league_id), f'week_{week}.npz')
+        with atomic_write(filename) as file:
+            np.savez_compressed(file, **arrays)
+        self._index(league_id)[week]['sealed'] = True
+        shutil.rmtree(segment.directory)
+
+
+    def read(
+        self,
+        league_id: str,
+        table: str,
+        columns: Iterable[str],
+        start: float,
+        end: float,
+        key: Optional[Tuple[str, int]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Columns of the rows with start <= timestamp <= end, optionally where key column == value"""
+        columns = ['timestamp', *columns]
+        parts = {column: [] for column in columns}
+        # shared, so a week isn't sealed, and its open segment removed, while it is read
+        with self._lock(league_id, shared=True):
+            weeks = sorted(
+                week for week, entry in self._index(league_id).items()
+                if entry['first'] <= end and entry['last'] >= start
+            )
+            for week in weeks:
+                values = self._segment(league_id, week).columns(table, set(columns) | ({key[0]} if key is not None else set()))
+                timestamps = values['timestamp']
+                lo, hi = np.searchsorted(timestamps, start, side='left'), np.searchsorted(timestamps, end, side='right')
+                mask = slice(None) if key is None else np.asarray(values[key[0]][lo:hi]) == key[1]
+                for column in columns:
+                    parts[column].append(np.asarray(values[column][lo:hi])[mask])
+        return {
+            column: np.concatenate(arrays) if arrays else np.empty((0, *COLUMNS[table][column][1]))
+            for column, arrays in parts.items()
+        }
+
+
+    def team_history(self, league_id: str, team_key: str, start: float, end: float) -> Dict:
+        rows = self.read(
+            league_id, 'teams', ('team_points', 'current_matchup_stats', 'projected_matchup_stats'),
+            start, end, ('team', get_team_number(team_key)),
+        )
+        return {
+            "team_key": team_key,
+            "timestamps": rows['timestamp'].tolist(),
+            "team_points": rows['team_points'].astype(np.float64).round(2).tolist(),
+            "current_matchup_stats": _stats_columns(rows['current_matchup_stats']),
+            "projected_matchup_stats": _stats_columns(rows['projected_matchup_stats']),
+        }
+
+
+    def player_history(self, league_id: str, player_id: int, start: float, end: float) -> Dict:
+        rows = self.read(
+            league_id, 'players', ('team', 'stats', 'games_remaining', 'games_startable'),
+            start, end, ('player', int(player_id)),
+        )
+        return {
+            "player_id": int(player_id),
+            "timestamps": rows['timestamp'].tolist(),
+            "team_keys": [f"{league_id}.t.{n}" for n in rows['team'].tolist()],
+            "stats": _stats_columns(rows['stats']),
+            "games_remaining": rows['games_remaining'].tolist(),
+            "games_startable": rows['games_startable'].tolist(),
+        }
+
+
+class HistoryRecorder:
+    """Appends each built league to a HistoryStore, logging failures instead of raising them"""
+
+    def __init__(self, store: HistoryStore):
+        self.store = store
+
+
+    def record(self, league_id: str, league: League):
+        try:
+            self.store.record(league_id, league)
+        except Exception:
+            # history is best effort, the league is already published
+            logger.exception("Recording history of league %s failed", league_id)
+
+
+def _stats_columns(matrix: np.ndarray) -> Dict:
+    # stored as float32, so round in float64 to drop the float32 noise
+    matrix = matrix.astype(np.float64).round(2)
+    return {field: matrix[:, i].tolist() for i, field in enumerate(STAT_FIELDS)}
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Optional, TextIO
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.constants import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_CACHE_DIRECTORY,
+    HTTP_FIXTURES_DIRECTORY,
+    HTTP_MODE,
+    HTTP_POOL_SIZE,
+    HTTP_RETRIES,
+    HTTP_TIMEOUT,
+)
+from utils.utils import atomic_write
+
+
+CHUNK_SIZE = 1 << 16
+
+# Response headers kept alongside a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+logger = logging.getLogger(__name__)
+
+
+class HttpResponse:
+    """A successful response whose body lives on disk, in the cache or a fixture"""
+    __slots__ = ('url', 'headers', 'path', 'fetched_at', 'from_cache')
+
+    def __init__(self, url: str, headers: Dict[str, str], path: str, fetched_at: float, from_cache: bool = False):
+        self.url = url
+        self.headers = headers
+        self.path = path
+        self.fetched_at = fetched_at
+        self.from_cache = from_cache
+
+
+    @property
+    def encoding(self) -> str:
+        _, _, charset = self.headers.get('Content-Type', '').partition('charset=')
+        return charset.split(';')[0].strip() or 'utf-8'
+
+
+    @property
+    def content(self) -> bytes:
+        with open(self.path, mode='rb') as file:
+            return file.read()
+
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+
+    def open(self) -> TextIO:
+        """Opens the body as text, leaving line endings untouched"""
+        return open(self.path, mode='r', encoding=self.encoding, errors='replace', newline='')
+
+
+class ResponseStore:
+    """Directory of response bodies plus JSON metadata, keyed by request"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+
+    def _paths(self, key: str):
+        return os.path.join(self.directory, f'{key}.body'), os.path.join(self.directory, f'{key}.json')
+
+
+    def get(self, key: str) -> Optional[HttpResponse]:
+        body_path, meta_path = self._paths(key)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, mode='r') as file:
+            meta = json.load(file)
+        return HttpResponse(meta['url'], meta['headers'], body_path, meta['fetched_at'], from_cache=True)
+
+
+    def put(self, key: str, url: str, headers: Dict[str, str], chunks: Iterable[bytes]) -> HttpResponse:
+        os.makedirs(self.directory, exist_ok=True)
+        body_path, meta_path = self._paths(key)
+        with atomic_write(body_path) as file:
+            for chunk in chunks:
+                file.write(chunk)
+        return self._write_meta(key, url, headers)
+
+
+    def touch(self, key: str) -> HttpResponse:
+        """Marks a cached response as just revalidated"""
+        response = self.get(key)
+        return self._write_meta(key, response.url, response.headers)
+
+
+    def copy_to(self, key: str, other: 'ResponseStore'):
+        os.makedirs(other.directory, exist_ok=True)
+        for src, dst in zip(self._paths(key), other._paths(key)):
+            shutil.copyfile(src, dst)
+
+
+    def _write_meta(self, key: str, url: str, headers: Dict[str, str]) -> HttpResponse:
+        body_path, meta_path = self._paths(key)
+        fetched_at = time.time()
+        with atomic_write(meta_path, mode='w') as file:
+            json.dump({'url': url, 'headers': headers, 'fetched_at': fetched_at}, file)
+        return HttpResponse(url, headers, body_path, fetched_at)
+
+
+class HttpClient:
+    """Shared HTTP client for upstream pages: pooled, retrying, and cached on disk with revalidation"""
+
+    def __init__(
+        self,
+        mode: str = HTTP_MODE,
+        cache_directory: str = HTTP_CACHE_DIRECTORY,
+        fixtures_directory: str = HTTP_FIXTURES_DIRECTORY,
+        timeout: float = HTTP_TIMEOUT,
+    ):
+        if mode not in ('live', 'record', 'replay'):
+            raise ValueError(f"Unknown HTTP mode {mode}")
+        # 'record' also saves every response as a fixture, 'replay' serves only from fixtures
+        self.mode = mode
+        self.timeout = timeout
+        self.cache = ResponseStore(cache_directory)
+        self.fixtures = ResponseStore(fixtures_directory)
+
+        retry = Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'POST']),
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, ttl: float = 0) -> HttpResponse:
+        return self.request('GET', url, headers=headers, ttl=ttl)
+
+
+    def post(self, url: str, data: str, headers: Optional[Dict[str, str]] = None, ttl: float = 0) -> HttpResponse:
+        return self.request('POST', url, data=data, headers=headers, ttl=ttl)
+
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        ttl: float = 0,
+    ) -> HttpResponse:
+        key = self._key(method, url, data)
+        if self.mode == 'replay':
+            response = self.fixtures.get(key)
+            if response is None:
+                raise FileNotFoundError(f"No recorded response for {method} {url}")
+            return response
+
+        cached = self.cache.get(key)
+        if cached is not None and time.time() - cached.fetched_at < ttl:
+            return cached
+
+        headers = dict(headers or {})
+        if cached is not None:
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        try:
+            with self.session.request(
+                method, url, data=data, headers=headers, timeout=self.timeout, stream=True
+            ) as upstream:
+                if upstream.status_code == 304 and cached is not None:
+                    response = self.cache.touch(key)
+                else:
+                    upstream.raise_for_status()
+                    response = self.cache.put(
+                        key,
+                        url,
+                        {name: upstream.headers[name] for name in CACHED_HEADERS if name in upstream.headers},
+                        upstream.iter_content(chunk_size=CHUNK_SIZE),
+                    )
+        except requests.RequestException:
+            if cached is None:
+                raise
+            logger.warning("%s %s failed, serving cached copy", method, url, exc_info=True)
+            return cached
+
+        if self.mode == 'record':
+            self.cache.copy_to(key, self.fixtures)
+        return response
+
+
+    def _key(self, method: str, url: str, data: Optional[str]) -> str:
+        digest = hashlib.sha256(f'{method} {url}'.encode('utf-8'))
+        if data is not None:
+            digest.update(data.encode('utf-8'))
+        return digest.hexdigest()
+
+
+http_client = HttpClient()
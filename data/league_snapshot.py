@@ -0,0 +1,134 @@
+import logging
+import os
+import pickle
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from data.player_stats import stats_store
+from data.schedule import schedule_store
+from data.snapshot import SnapshotFile
+from models.league import League
+
+
+logger = logging.getLogger(__name__)
+
+
+class SharedLeague:
+    """A League as written to the shared snapshot: rendered responses, and the League pickled out of band"""
+
+    def __init__(self, league: League, rendered: Any = None):
+        self.version = league.version
+        self.n_teams_rebuilt, self.n_teams_reused = league.n_teams_rebuilt, league.n_teams_reused
+        self.rendered = rendered
+        self._league: Optional[League] = league
+        self._pickled = None
+        self._lock = threading.Lock()
+
+
+    @property
+    def league(self) -> League:
+        with self._lock:
+            if self._league is None:
+                self._league = pickle.loads(self._pickled)
+            return self._league
+
+
+    def __getstate__(self):
+        with self._lock:
+            if self._pickled is None:
+                self._pickled = pickle.dumps(self._league, protocol=pickle.HIGHEST_PROTOCOL)
+        return {
+            "version": self.version,
+            "n_teams": (self.n_teams_rebuilt, self.n_teams_reused),
+            "rendered": self.rendered,
+            "pickled": pickle.PickleBuffer(self._pickled),
+        }
+
+
+    def __setstate__(self, state):
+        self.version, self.rendered, self._pickled = state["version"], state["rendered"], state["pickled"]
+        self.n_teams_rebuilt, self.n_teams_reused = state["n_teams"]
+        self._league = None
+        self._lock = threading.Lock()
+
+
+class LeagueSnapshots:
+    """Publishes leagues, with the projections and schedule they were built from, to SnapshotFiles and reads them back"""
+
+    def __init__(self, directory: str):
+        self.leagues = SnapshotFile(os.path.join(directory, "leagues"))
+        # projections and schedule change daily, so they are published apart from the leagues
+        self.data = SnapshotFile(os.path.join(directory, "data"))
+        self.version = 0
+        self.data_version = 0
+        self._published_data_versions: Optional[Tuple[int, int]] = None
+        # makes what is published of each League alongside it, e.g. its serialized responses
+        self.renderer: Optional[Callable[[League], Any]] = None
+        # league id -> the SharedLeague last published for it
+        self._shared: Dict[str, SharedLeague] = {}
+        self._lock = threading.Lock()
+
+
+    def publish(
+        self,
+        entries: Iterable[Tuple[str, Optional[Union[League, SharedLeague]]]],
+        last_data_refresh_time: datetime,
+    ) -> int:
+        """Writes the leagues with their free agents as the next version, after the data if it changed"""
+        entries = tuple(entries)
+        for league_id, league in entries:
+            if isinstance(league, League):
+                try:
+                    # followers can't fetch them, so they are part of the snapshot
+                    league.get_free_agents()
+                except Exception:
+                    logger.exception("Loading free agents of league %s failed", league_id)
+
+        with self._lock:
+            stats, schedule = stats_store.snapshot(), schedule_store.snapshot()
+            if (stats[0], schedule[0]) != self._published_data_versions:
+                self.data_version = self.data.publish({"stats": stats, "schedule": schedule})
+                self._published_data_versions = (stats[0], schedule[0])
+            self.version = self.leagues.publish({
+                "league_ids": tuple(league_id for league_id, _ in entries),
+                "leagues": tuple(self._share(league_id, league) for league_id, league in entries),
+                "data_version": self.data_version,
+                "published_at": datetime.now(),
+                "last_data_refresh_time": last_data_refresh_time,
+            })
+            return self.version
+
+
+    def _share(self, league_id: str, league: Optional[Union[League, SharedLeague]]) -> Optional[SharedLeague]:
+        """Wraps a League for the snapshot once, so an unchanged one isn't rendered or pickled again"""
+        if league is None or isinstance(league, SharedLeague):
+            return league
+        shared = self._shared.get(league_id)
+        if shared is None or shared.version != league.version:
+            rendered = self.renderer(league) if self.renderer is not None else None
+            shared = self._shared[league_id] = SharedLeague(league, rendered)
+        return shared
+
+
+    @property
+    def has_new_version(self) -> bool:
+        return self.leagues.version != self.version
+
+
+    def read(self) -> Optional[Dict]:
+        """The latest snapshot, adopting its projections and schedule if they are newer"""
+        version, snapshot = self.leagues.read()
+        if snapshot is None:
+            return None
+        if snapshot["data_version"] > self.data_version:
+            data_version, data = self.data.read()
+            stats_store.adopt(*data["stats"])
+            schedule_store.adopt(*data["schedule"])
+            self.data_version = data_version
+        self.version = version
+        return snapshot
+
+
+    def after_fork(self):
+        self._lock = threading.Lock()
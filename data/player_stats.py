@@ -1,103 +1,234 @@
-import re
-from typing import Dict, List, Optional, Tuple
-
+import difflib
+import hashlib
+from itertools import islice
+import json
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
 import requests
 
-from config.constants import PLAYER_STATS_FILENAME
-from models.stats import Stats
-from utils.utils import clean_text, get_adapted_team_abbreviation, get_cleaned_player_name
+from config.constants import (
+    FETCH_PROJECTIONS,
+    PLAYER_STATS_FILENAME,
+    PLAYER_STATS_TABLE_FILENAME,
+)
+from data.projections import fetch_projections, is_update_panel_response, iter_projection_records
+from data.store import VersionedStore
+from models.stats import N_STATS, Stats
+from utils.utils import atomic_write, clean_text, get_adapted_team_abbreviation, get_cleaned_player_name, parse_shooting_ratio
+
+
+# Bump when the parsed table layout changes, so old binary caches are ignored
+STATS_TABLE_FORMAT = 1
+
+# Minimum difflib similarity for matching a Yahoo name to a projection name, compared without
+# generational suffixes. Different players come close (Jaylin and Jalen Williams, both on OKC,
+# score 0.897), so a match also needs the same NBA team.
+FUZZY_NAME_CUTOFF = 0.9
+FUZZY_NAME_CANDIDATES = 3
+NAME_SUFFIXES = frozenset(('Jr', 'Sr', 'II', 'III', 'IV', 'V'))
+
+
+logger = logging.getLogger(__name__)
+
+
+def iter_stats_records(file: TextIO) -> Iterator[Tuple[str, str, List[float]]]:
+    """Yields (cleaned name, team, stats) for each player of the hand-copied format, in a single pass"""
+    for line in file:
+        line = line.strip()
+        # skip header and blank lines
+        if not line or line.startswith("R#"):
+            continue
+
+        headers = line.split("\t")
+        name = clean_text(headers[2])
+        team = get_adapted_team_abbreviation(headers[4])
+        fga, fgm = parse_shooting_ratio(headers[7])
+
+        # float() ignores the trailing newlines, so these lines are never stripped
+        column_lines = list(islice(file, 9))
+        fta, ftm = parse_shooting_ratio(column_lines[0])
+        yield name, team, [fga, fgm, fta, ftm, *map(float, column_lines[1:8])]
+
+
+def _hash_file(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, mode="rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_stats_table(
+    filename: str = PLAYER_STATS_FILENAME,
+    table_filename: str = PLAYER_STATS_TABLE_FILENAME,
+) -> Tuple[List[str], List[str], np.ndarray]:
+    """Returns (names, teams, players x stats matrix) for the projections file, cached as a memory-mapped .npy"""
+    index_filename = os.path.splitext(table_filename)[0] + ".json"
+    mtime = os.stat(filename).st_mtime_ns
+
+    index = None
+    if os.path.exists(index_filename) and os.path.exists(table_filename):
+        with open(index_filename, mode="r") as file:
+            index = json.load(file)
+        if index.get("format") != STATS_TABLE_FORMAT or index.get("source") != filename:
+            index = None
+
+    if index is not None and index["mtime"] != mtime:
+        if index["sha256"] == _hash_file(filename):
+            # touched but unchanged
+            index["mtime"] = mtime
+            _write_json(index_filename, index)
+        else:
+            index = None
+
+    if index is not None:
+        return index["names"], index["teams"], np.load(table_filename, mmap_mode="r")
+
+    if is_update_panel_response(filename):
+        file = open(filename, mode="r", encoding="utf-8", newline="")
+        records = iter_projection_records(file)
+    else:
+        file = open(filename, mode="r")
+        records = iter_stats_records(file)
+
+    names, teams, rows = [], [], []
+    with file:
+        for name, team, stats in records:
+            names.append(name)
+            teams.append(team)
+            rows.append(stats)
+    matrix = np.array(rows, dtype=np.float64).reshape(-1, N_STATS)
+
+    os.makedirs(os.path.dirname(table_filename) or ".", exist_ok=True)
+    with atomic_write(table_filename) as file:
+        np.save(file, matrix)
+    _write_json(index_filename, {
+        "format": STATS_TABLE_FORMAT,
+        "source": filename,
+        "mtime": mtime,
+        "sha256": _hash_file(filename),
+        "names": names,
+        "teams": teams,
+    })
+    return names, teams, matrix
+
+
+def _write_json(filename: str, data: Dict):
+    with atomic_write(filename, mode="w") as file:
+        json.dump(data, file)
+
+
+def _get_name_key(name: str) -> str:
+    tokens = name.split()
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+class PlayerIdentityIndex:
+    """Maps Yahoo player ids to projection names for one version of the projections, falling back to fuzzy matches"""
+
+    def __init__(self, projection_names: Iterable[str], projection_teams: Iterable[str]):
+        self._projection_teams = dict(zip(projection_names, projection_teams))
+        self._projection_names_by_key: Dict[str, List[str]] = {}
+        for projection_name in self._projection_teams:
+            self._projection_names_by_key.setdefault(_get_name_key(projection_name), []).append(projection_name)
+        self._names_by_player_id: Dict[str, Optional[str]] = {}
+        self.unmatched: Dict[str, str] = {}
+        # Yahoo player id -> (Yahoo name, projection name it was matched to)
+        self.fuzzy_matched: Dict[str, Tuple[str, str]] = {}
+
+
+    def resolve(self, player_id: str, player_name: str, team: str = '') -> Optional[str]:
+        """Projection name of a Yahoo player, whose team is their Yahoo editorial_team_abbr"""
+        player_id = str(player_id)
+        try:
+            return self._names_by_player_id[player_id]
+        except KeyError:
+            pass
+
+        name = get_cleaned_player_name(player_name)
+        if name not in self._projection_teams:
+            team = get_adapted_team_abbreviation(team.upper())
+            keys = difflib.get_close_matches(
+                _get_name_key(name), self._projection_names_by_key, n=FUZZY_NAME_CANDIDATES, cutoff=FUZZY_NAME_CUTOFF
+            )
+            matches = [
+                candidate for key in keys for candidate in self._projection_names_by_key[key]
+                if team and self._projection_teams[candidate] == team
+            ]
+            if matches:
+                logger.warning("Matched %s (%s) to projections for %s", player_name, player_id, matches[0])
+                self.fuzzy_matched[player_id] = (player_name, matches[0])
+                name = matches[0]
+            else:
+                logger.warning("No projections for %s (%s)", player_name, player_id)
+                self.unmatched[player_id] = player_name
+                name = None
 
+        self._names_by_player_id[player_id] = name
+        return name
 
-def generate_stats() -> Tuple[Dict[str, Stats], Dict[str, str]]:
-    player_stats = {}
-    player_teams = {}
-    with open(PLAYER_STATS_FILENAME, mode="r") as file:
-        while True:
-            line = file.readline()
-            if not line:
-                break
-            line = line.strip()
 
-            # skip if header line
-            if line.startswith("R#"):
-                continue
+def get_projections_filename() -> str:
+    """Fetches fresh projections if enabled, falling back to player_stats.txt if none were ever fetched"""
+    if not FETCH_PROJECTIONS:
+        return PLAYER_STATS_FILENAME
+    try:
+        return fetch_projections()
+    except (requests.RequestException, OSError):
+        logger.warning("Fetching projections failed", exc_info=True)
+        return PLAYER_STATS_FILENAME
+
+
+def generate_stats() -> Tuple[Dict[str, Stats], Dict[str, str], PlayerIdentityIndex]:
+    names, teams, matrix = load_stats_table(get_projections_filename())
+    player_stats = {name: Stats.from_array(row) for name, row in zip(names, matrix)}
+    player_teams = dict(zip(names, teams))
+    return player_stats, player_teams, PlayerIdentityIndex(names, teams)
 
-            # process player header line
-            else:
-                headers = line.split("\t")
-                rank = int(headers[0])
-                adp = headers[1]
-                name = clean_text(headers[2])
-                pos = headers[3]
-                team = get_adapted_team_abbreviation(headers[4])
-                gp_proj = int(headers[5])
-                mpg = float(headers[6])
-                
-                fg_raw = re.findall(r"[\d\.]+", headers[7])
-                fg = fg_raw[0]
-                fgm = float(fg_raw[1])
-                fga = float(fg_raw[2])
-
-                stats = [fgm, fga]
-
-                for i in range(9):
-                    line = file.readline().strip()
-                    if i == 0:
-                        ft_raw = re.findall(r"[\d\.]+", line)
-                        ft = ft_raw[0]
-                        ftm = float(ft_raw[1])
-                        fta = float(ft_raw[2])
-                        stats.extend([ftm, fta])
-                    elif i < 8:
-                        stats.append(float(line))
-
-                player_stats[name] = Stats(*stats)
-                player_teams[name] = team
-
-    return player_stats, player_teams
-
-
-global player_stats, player_teams
-player_stats, player_teams = generate_stats()
+
+stats_store = VersionedStore(generate_stats)
 
 
 def get_player_team(player_name: str) -> Optional[str]:
     player_name = get_cleaned_player_name(player_name)
+    _, player_teams, _ = stats_store.value
     return player_teams.get(player_name, None)
 
 
 def get_player_stats(player_name: str) -> Optional[Stats]:
     player_name = get_cleaned_player_name(player_name)
+    player_stats, _, _ = stats_store.value
     return player_stats.get(player_name)
 
 
-def refresh_stats():
-    player_stats, player_teams = generate_stats()
-
-
-# def get_stats(): 
-#     # Define the URL and payload
-#     url = "https://hashtagbasketball.com/fantasy-basketball-projections"
-
-#     # Read the raw data from a file
-#     with open("data/stats_request_body", "r", encoding="utf-8") as file:
-#         body = file.read()
+def get_player_projection(player_id: str, player_name: str, team: str = '') -> Tuple[Optional[str], Optional[Stats]]:
+    """Returns the (team, stats) projected for a Yahoo player, resolved through their id"""
+    player_stats, player_teams, identity_index = stats_store.value
+    name = identity_index.resolve(player_id, player_name, team)
+    if name is None:
+        return None, None
+    return player_teams.get(name), player_stats.get(name)
 
-#     # Make the POST request
-#     headers = {
-#         "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-#         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0"
-#     }
-#     response = requests.post(url, data=body, headers=headers)
 
-#     # # Print the response
-#     # print(f"Status Code: {response.status_code}")
-#     # print(f"Response Body: {response.text}")
+def get_unmatched_players() -> Dict[str, str]:
+    """Yahoo players, by id, with no projections in the current version"""
+    _, _, identity_index = stats_store.value
+    return dict(identity_index.unmatched)
 
-#     output_file = "./response.html"
-#     with open(output_file, "w", encoding="utf-8") as file:
-#         file.write(response.text)
 
+def get_fuzzy_matched_players() -> Dict[str, Dict[str, str]]:
+    """Yahoo players, by id, whose projections were found under a different name"""
+    _, _, identity_index = stats_store.value
+    return {
+        player_id: {"name": name, "projection_name": projection_name}
+        for player_id, (name, projection_name) in list(identity_index.fuzzy_matched.items())
+    }
 
 
-# get_stats()
\ No newline at end of file
+def refresh_stats() -> int:
+    return stats_store.reload()
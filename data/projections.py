@@ -0,0 +1,172 @@
+import html
+import logging
+import re
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+from config.constants import (
+    PROJECTIONS_REQUEST_BODY_FILENAME,
+    PROJECTIONS_TABLE_ID,
+    PROJECTIONS_TTL,
+    PROJECTIONS_URL,
+)
+from data.http_client import http_client
+from utils.utils import clean_text, get_adapted_team_abbreviation, parse_shooting_ratio
+
+
+# Columns of the projections table: R#, ADP, PLAYER, POS, TEAM, GP, MPG, FG%, FT%, 3PM, PTS,
+# TREB, AST, STL, BLK, TO, TOTAL
+N_PROJECTION_COLUMNS = 17
+
+CHUNK_SIZE = 1 << 16
+
+CELL_PATTERN = re.compile(r"<td[^>]*>(.*?)</td>", re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+logger = logging.getLogger(__name__)
+
+
+class UpdatePanelReader:
+    """Streams the segments of an ASP.NET UpdatePanel delta, `length|type|id|content|` repeated, opened with newline=''"""
+
+    def __init__(self, file: TextIO):
+        self._file = file
+        self._buffer = ""
+
+
+    def __iter__(self) -> Iterator[Tuple[str, str, Iterator[str]]]:
+        """Yields (type, id, content chunks) per segment; unread content is skipped"""
+        while True:
+            length = self._read_field()
+            if length is None:
+                return
+            segment_type = self._read_field()
+            segment_id = self._read_field()
+            content = self._read_content(int(length))
+            yield segment_type, segment_id, content
+
+            for _ in content:
+                pass
+            if self._read(1) != "|":
+                raise ValueError("Malformed UpdatePanel response")
+
+
+    def _fill(self) -> bool:
+        chunk = self._file.read(CHUNK_SIZE)
+        self._buffer += chunk
+        return bool(chunk)
+
+
+    def _read_field(self) -> Optional[str]:
+        while "|" not in self._buffer:
+            if not self._fill():
+                if self._buffer.strip():
+                    raise ValueError("Truncated UpdatePanel response")
+                return None
+        field, _, self._buffer = self._buffer.partition("|")
+        return field
+
+
+    def _read(self, n: int) -> str:
+        while len(self._buffer) < n and self._fill():
+            pass
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+
+    def _read_content(self, length: int) -> Iterator[str]:
+        while length > 0:
+            if not self._buffer and not self._fill():
+                raise ValueError("Truncated UpdatePanel response")
+            chunk = self._read(min(length, len(self._buffer)))
+            length -= len(chunk)
+            yield chunk
+
+
+class ProjectionsTableScanner:
+    """Cuts the projections table into rows of cell text as the page is fed in chunks"""
+
+    def __init__(self, table_id: str = PROJECTIONS_TABLE_ID):
+        self._marker = f'id="{table_id}"'
+        self._buffer = ""
+        self._in_table = False
+        self.done = False
+
+
+    def feed(self, chunk: str) -> List[List[str]]:
+        """Returns the rows completed by this chunk"""
+        if self.done:
+            return []
+        self._buffer += chunk
+
+        if not self._in_table:
+            start = self._buffer.find(self._marker)
+            if start == -1:
+                # keep enough to find a marker split across chunks
+                self._buffer = self._buffer[-len(self._marker):]
+                return []
+            self._buffer = self._buffer[start:]
+            self._in_table = True
+
+        table_end = self._buffer.find("</table>")
+        if table_end != -1:
+            complete, self._buffer = self._buffer[:table_end], ""
+            self.done = True
+        else:
+            row_end = self._buffer.rfind("</tr>")
+            if row_end == -1:
+                return []
+            complete, self._buffer = self._buffer[:row_end], self._buffer[row_end:]
+
+        rows = []
+        for raw_row in complete.split("</tr>"):
+            # header rows only have <th> cells
+            cells = [
+                " ".join(html.unescape(TAG_PATTERN.sub("", cell)).split())
+                for cell in CELL_PATTERN.findall(raw_row)
+            ]
+            if cells:
+                rows.append(cells)
+        return rows
+
+
+def _to_record(cells: List[str]) -> Tuple[str, str, List[float]]:
+    fga, fgm = parse_shooting_ratio(cells[7])
+    fta, ftm = parse_shooting_ratio(cells[8])
+    return (
+        clean_text(cells[2]),
+        get_adapted_team_abbreviation(cells[4]),
+        [fga, fgm, fta, ftm, *map(float, cells[9:16])],
+    )
+
+
+def iter_projection_records(file: TextIO) -> Iterator[Tuple[str, str, List[float]]]:
+    """Yields (cleaned name, team, stats) per player, straight from an UpdatePanel response"""
+    scanner = ProjectionsTableScanner()
+    for segment_type, _, content in UpdatePanelReader(file):
+        if segment_type != 'updatePanel':
+            continue
+        for chunk in content:
+            for cells in scanner.feed(chunk):
+                # the header is repeated every so often as a row of <td> cells
+                if len(cells) == N_PROJECTION_COLUMNS and cells[0] != "R#":
+                    yield _to_record(cells)
+
+
+def is_update_panel_response(filename: str) -> bool:
+    """UpdatePanel deltas start with the length of their first segment, e.g. `1|#||4|`"""
+    with open(filename, mode="r", encoding="utf-8", newline="") as file:
+        length, separator, _ = file.read(16).partition("|")
+    return bool(separator) and length.isdigit()
+
+
+def fetch_projections() -> str:
+    """Posts the saved projections form and returns the file holding the UpdatePanel response"""
+    with open(PROJECTIONS_REQUEST_BODY_FILENAME, mode="r", encoding="utf-8") as file:
+        body = file.read()
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",
+        "X-MicrosoftAjax": "Delta=true",
+    }
+    return http_client.post(PROJECTIONS_URL, data=body, headers=headers, ttl=PROJECTIONS_TTL).path
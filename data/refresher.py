@@ -0,0 +1,421 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, time as day_time, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import yahoo_fantasy_api as yfa
+
+from config.constants import (
+    CURRENT_YEAR,
+    DATA_REFRESH_HOUR,
+    DATA_REFRESH_TIMEZONE,
+    HISTORY_DIRECTORY,
+    LEAGUE_BUILD_MAX_WORKERS,
+    LEAGUE_INDEX,
+    LEAGUE_REFRESH_INTERVAL,
+    SNAPSHOT_POLL_INTERVAL,
+    YAHOO_API_CACHE_DIRECTORY,
+)
+from data.history import HistoryRecorder, HistoryStore
+from data.league_snapshot import LeagueSnapshots, SharedLeague
+from data.player_stats import get_fuzzy_matched_players, get_unmatched_players, stats_store
+from data.schedule import schedule_store
+from data.yahoo_api import CachedLeague
+from models.league import League, advance_versions
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_next_data_refresh_time(after: datetime) -> datetime:
+    """The first DATA_REFRESH_HOUR in DATA_REFRESH_TIMEZONE after a naive local time"""
+    timezone = ZoneInfo(DATA_REFRESH_TIMEZONE)
+    after = after.astimezone(timezone)
+    next_time = datetime.combine(after.date(), day_time(DATA_REFRESH_HOUR), tzinfo=timezone)
+    if next_time <= after:
+        next_time = datetime.combine(after.date() + timedelta(days=1), day_time(DATA_REFRESH_HOUR), tzinfo=timezone)
+    return next_time
+
+
+class LeagueRefresher:
+    """Builds wanted leagues in a worker pool, optionally sharing them between processes through LeagueSnapshots"""
+
+    def __init__(
+        self,
+        game: yfa.Game,
+        year: int = CURRENT_YEAR,
+        league_interval: float = LEAGUE_REFRESH_INTERVAL,
+        api_cache_directory: Optional[str] = YAHOO_API_CACHE_DIRECTORY,
+        eager_indexes: Optional[Iterable[int]] = (LEAGUE_INDEX,),
+        max_workers: int = LEAGUE_BUILD_MAX_WORKERS,
+        history_directory: Optional[str] = HISTORY_DIRECTORY,
+        snapshot_directory: Optional[str] = None,
+    ):
+        self._game = game
+        self._year = year
+        self.league_interval = league_interval
+        self._api_cache_directory = api_cache_directory
+        self._api_leagues: Dict[str, CachedLeague] = {}
+        # None means every discovered league is built eagerly
+        self._eager_indexes = None if eager_indexes is None else tuple(eager_indexes)
+        # every built snapshot is also appended here, unless history_directory is None
+        self.history = HistoryStore(history_directory) if history_directory is not None else None
+        self._recorder = HistoryRecorder(self.history) if self.history is not None else None
+        # called with (league_id, league) after each league is published
+        self._listeners: List[Callable[[str, Union[League, SharedLeague]], None]] = []
+        # shares the leagues with refreshers in other processes, e.g. gunicorn workers: one of them
+        # publishes its builds, the others follow and pass it the leagues they are asked for
+        self.snapshots = LeagueSnapshots(snapshot_directory) if snapshot_directory is not None else None
+        if self.snapshots is not None:
+            # left by a previous run, for leagues it may not even have any more
+            self.snapshots.leagues.pop_requests()
+        self.is_publisher = False
+        # whether builds save the API caches and append to the history: in snapshot mode, only
+        # the publisher and the process that built the leagues before forking write them
+        self._writes_to_disk = True
+
+        # (league id, league) pairs, replaced as one tuple so a reader never pairs an id with
+        # another league's slot; the league is None until it is built
+        self._entries: Tuple[Tuple[str, Optional[Union[League, SharedLeague]]], ...] = ()
+        # whether _entries holds the account's leagues yet, which discovery in the thread fetches
+        self.is_discovered = False
+        self.last_refresh_time: Optional[datetime] = None
+        self.last_refresh_duration: Optional[float] = None
+        # player stats and schedule are loaded on first access, i.e. by the first build
+        self.last_data_refresh_time = datetime.now()
+        # league id -> its current week on the last refresh
+        self._weeks: Dict[str, int] = {}
+
+        self._refresh_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._wanted: Set[str] = set()
+        self._building: Dict[str, Future] = {}
+        # league ids a follower asked the publisher to build, which are warming until adopted
+        self._requested: Set[str] = set()
+        self._free_agent_loads: 'weakref.WeakKeyDictionary[League, Future]' = weakref.WeakKeyDictionary()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="league-build")
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+
+    @property
+    def league_ids(self) -> Tuple[str, ...]:
+        return tuple(league_id for league_id, _ in self._entries)
+
+
+    @property
+    def leagues(self) -> Tuple[Optional[Union[League, SharedLeague]], ...]:
+        return tuple(league for _, league in self._entries)
+
+
+    def discover(self) -> Tuple[str, ...]:
+        """Fetches the account's league ids, keeping already built leagues under their id"""
+        league_ids = tuple(self._game.league_ids(year=self._year))
+        with self._publish_lock:
+            if league_ids != self.league_ids:
+                leagues_by_id = dict(self._entries)
+                self._entries = tuple((league_id, leagues_by_id.get(league_id)) for league_id in league_ids)
+            self.is_discovered = True
+            if self._eager_indexes is None:
+                self._wanted.update(league_ids)
+            else:
+                self._wanted.update(league_ids[i] for i in self._eager_indexes if -len(league_ids) <= i < len(league_ids))
+        return league_ids
+
+
+    def get_entry(self, index: int) -> Tuple[Optional[str], Optional[Union[League, SharedLeague]]]:
+        """Returns the league id and league at index, the league None while it is warming and both
+        None until the leagues are discovered, starting the league's build if needed"""
+        if not self.is_discovered:
+            return None, None
+        league_id, league = self._entries[index]
+        if league is None:
+            if self.snapshots is not None and not self.is_publisher:
+                self.snapshots.leagues.request(league_id)
+                self._requested.add(league_id)
+            else:
+                self.materialize(league_id)
+        return league_id, league
+
+
+    def get_league(self, index: int) -> Optional[Union[League, SharedLeague]]:
+        return self.get_entry(index)[1]
+
+
+    def materialize(self, league_id: str) -> Future:
+        """Builds the league in the pool, or returns the build already in flight"""
+        with self._publish_lock:
+            self._wanted.add(league_id)
+            future = self._building.get(league_id)
+            if future is None:
+                future = self._executor.submit(self._build, league_id)
+                self._building[league_id] = future
+        return future
+
+
+    def load_free_agents(self, league: League) -> Future:
+        """Fetches a league's free agents in the pool, so requests never wait on Yahoo for them"""
+        if league.free_agents_loaded:
+            future = Future()
+            future.set_result(league.get_free_agents())
+            return future
+        with self._publish_lock:
+            future = self._free_agent_loads.get(league)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._executor.submit(league.get_free_agents)
+                self._free_agent_loads[league] = future
+        return future
+
+
+    def refresh(self, refresh_data: bool = False):
+        with self._refresh_lock:
+            start = time.perf_counter()
+            if refresh_data:
+                self._reload_data()
+
+            league_ids = self.discover()
+            leagues = self._build_wanted(league_ids)
+            if self._week_changed(leagues) and not refresh_data:
+                # the schedule grid starts on the Monday it was loaded, so a new week needs a new grid
+                logger.info("A new week started, reloading the player stats and schedule")
+                self._reload_data()
+                self._build_wanted(league_ids)
+
+            self.last_refresh_time = datetime.now()
+            self.last_refresh_duration = time.perf_counter() - start
+
+
+    def _reload_data(self):
+        reloads = {"schedule": schedule_store.reload_in_background(), "player stats": stats_store.reload_in_background()}
+        reloaded = True
+        for name, reload in reloads.items():
+            try:
+                reload.result()
+            except Exception:
+                # the leagues still refresh against the last good table, and the next refresh retries
+                logger.exception("Reloading %s failed", name)
+                reloaded = False
+        if reloaded:
+            self.last_data_refresh_time = datetime.now()
+
+
+    def _build_wanted(self, league_ids: Tuple[str, ...]) -> Dict[str, League]:
+        builds = {league_id: self.materialize(league_id) for league_id in league_ids if league_id in self._wanted}
+        return {league_id: build.result() for league_id, build in builds.items()}
+
+
+    def _week_changed(self, leagues: Dict[str, League]) -> bool:
+        """Whether any league's current week differs from the one it had on its last refresh"""
+        changed = False
+        for league_id, league in leagues.items():
+            week = self._weeks.get(league_id)
+            changed = changed or (week is not None and week != league.current_week)
+            self._weeks[league_id] = league.current_week
+        return changed
+
+
+    def _build(self, league_id: str) -> League:
+        try:
+            # teams whose projections or schedule changed get a new fingerprint and are rebuilt
+            api_league = self._get_api_league(league_id)
+            league = League(api_league, previous=self._get_published(league_id))
+            if self._writes_to_disk:
+                api_league.save()
+            self._publish(league_id, league)
+            if self._writes_to_disk and self._recorder is not None:
+                self._recorder.record(league_id, league)
+            self._notify(league_id, league)
+            if self.is_publisher:
+                self.publish_snapshot()
+            return league
+        except Exception:
+            # the league keeps its last good snapshot, and the next request or refresh retries
+            logger.exception("Building league %s failed", league_id)
+            raise
+        finally:
+            with self._publish_lock:
+                self._building.pop(league_id, None)
+
+
+    def add_listener(self, listener: Callable[[str, Union[League, SharedLeague]], None]):
+        """Listeners are also called with the SharedLeagues a follower adopts"""
+        self._listeners.append(listener)
+
+
+    def set_renderer(self, renderer: Callable[[League], Any]):
+        """Sets what is published with each League, e.g. its serialized responses, for followers to serve"""
+        if self.snapshots is not None:
+            self.snapshots.renderer = renderer
+
+
+    def _notify(self, league_id: str, league: League):
+        for listener in self._listeners:
+            try:
+                listener(league_id, league)
+            except Exception:
+                logger.exception("Notifying a listener of league %s failed", league_id)
+
+
+    def publish_snapshot(self) -> int:
+        """Publishes the current leagues as the shared snapshot's next version"""
+        return self.snapshots.publish(self._entries, self.last_data_refresh_time)
+
+
+    def _adopt_snapshot(self):
+        snapshot = self.snapshots.read()
+        if snapshot is None:
+            return
+        with self._publish_lock:
+            previous = dict(self._entries)
+            self._entries = tuple(zip(snapshot["league_ids"], snapshot["leagues"]))
+            self.is_discovered = True
+            # should this process take over as publisher, its builds must still be newer
+            advance_versions(max((league.version for _, league in self._entries if league is not None), default=0))
+            # kept refreshing should this process take over as publisher
+            self._wanted.update(league_id for league_id, league in self._entries if league is not None)
+        self.last_refresh_time = snapshot["published_at"]
+        self.last_data_refresh_time = snapshot["last_data_refresh_time"]
+        for league_id, league in zip(snapshot["league_ids"], snapshot["leagues"]):
+            previous_league = previous.get(league_id)
+            if league is not None and (previous_league is None or previous_league.version != league.version):
+                self._notify(league_id, league)
+
+
+    def _get_published(self, league_id: str) -> Optional[League]:
+        league = dict(self._entries).get(league_id)
+        # adopted before this process took over as publisher
+        return league.league if isinstance(league, SharedLeague) else league
+
+
+    def _publish(self, league_id: str, league: League):
+        with self._publish_lock:
+            self._entries = tuple(
+                (entry_id, league if entry_id == league_id else entry) for entry_id, entry in self._entries
+            )
+
+
+    def _get_api_league(self, league_id: str) -> CachedLeague:
+        """Wraps each league once, so its API cache outlives the League snapshots built from it"""
+        if league_id not in self._api_leagues:
+            cache_filename = None
+            if self._api_cache_directory is not None:
+                cache_filename = os.path.join(self._api_cache_directory, f"{league_id}.pickle")
+            api_league = CachedLeague(self._game.to_league(league_id), cache_filename=cache_filename)
+            self._api_leagues.setdefault(league_id, api_league)
+        return self._api_leagues[league_id]
+
+
+    def start(self, refresh_now: bool = True):
+        """Discovers, builds and keeps refreshing the leagues in the background, the first refresh after
+        league_interval with refresh_now False, e.g. when the leagues were just built before forking"""
+        if self._thread is not None:
+            return
+        if self.snapshots is not None:
+            self._thread = threading.Thread(target=self._follow, args=(refresh_now,), name="league-follower", daemon=True)
+            self._thread.start()
+            return
+        self._thread = threading.Thread(target=self._run, args=(refresh_now,), name="league-refresher", daemon=True)
+        self._thread.start()
+
+
+    def after_fork(self):
+        """Makes a refresher inherited by a forked worker usable: only the forking thread survives
+        a fork, so the pool, locks and connections of the parent are replaced with new ones"""
+        self._refresh_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        if self.snapshots is not None:
+            self.snapshots.after_fork()
+        self._building = {}
+        self._requested = set()
+        self._free_agent_loads = weakref.WeakKeyDictionary()
+        self._executor = ThreadPoolExecutor(max_workers=self._executor._max_workers, thread_name_prefix="league-build")
+        self._stop_event = threading.Event()
+        self._thread = None
+        # a forked follower leaves the shared files to the publisher, until it takes that role itself
+        self._writes_to_disk = self.snapshots is None
+        # pooled keep-alive connections of the OAuth session would otherwise be shared with the parent
+        session = getattr(getattr(self._game, 'sc', None), 'session', None)
+        if session is not None:
+            session.close()
+
+
+    def stop(self):
+        self._stop_event.set()
+
+
+    def _follow(self, refresh_now: bool):
+        """Adopts new snapshots until this process takes the publisher role, then serves requests"""
+        while True:
+            try:
+                if not self.is_publisher and self.snapshots.leagues.try_acquire_publisher():
+                    self.is_publisher = True
+                    self._writes_to_disk = True
+                    logger.info("Publishing the shared league snapshot from process %d", os.getpid())
+                    threading.Thread(target=self._run, args=(refresh_now,), name="league-refresher", daemon=True).start()
+                if self.is_publisher:
+                    for league_id in self.snapshots.leagues.pop_requests():
+                        self.materialize(league_id)
+                elif self.snapshots.has_new_version:
+                    self._adopt_snapshot()
+                # a follower taking over later refreshes right away, the last snapshot may be old
+                refresh_now = True
+            except Exception:
+                logger.exception("Following the shared league snapshot failed")
+            if self._stop_event.wait(SNAPSHOT_POLL_INTERVAL):
+                return
+
+
+    def _run(self, refresh_now: bool):
+        refresh_data = False
+        if not refresh_now and self._stop_event.wait(self.league_interval):
+            return
+        while True:
+            try:
+                self.refresh(refresh_data=refresh_data)
+            except Exception:
+                # keep serving the last good snapshot
+                logger.exception("League refresh failed")
+            if self._stop_event.wait(self.league_interval):
+                return
+            refresh_data = datetime.now().astimezone() >= get_next_data_refresh_time(self.last_data_refresh_time)
+
+
+    def to_dict(self):
+        entries = self._entries
+        return {
+            "n_leagues": len(entries),
+            "leagues": [
+                {
+                    "league_id": league_id,
+                    "status": (
+                        "ready" if league is not None
+                        else "warming" if league_id in self._building or league_id in self._requested
+                        else "cold"
+                    ),
+                    "version": league.version if league is not None else None,
+                    # teams built anew and reused unchanged from the previous version
+                    "n_teams_rebuilt": league.n_teams_rebuilt if league is not None else None,
+                    "n_teams_reused": league.n_teams_reused if league is not None else None,
+                }
+                for league_id, league in entries
+            ],
+            "last_refresh_time": str(self.last_refresh_time) if self.last_refresh_time else None,
+            "last_refresh_duration": self.last_refresh_duration,
+            "last_data_refresh_time": str(self.last_data_refresh_time),
+            # these load the tables on first access, which status must never wait on
+            "stats_version": stats_store.version if stats_store.is_loaded else None,
+            "unmatched_players": get_unmatched_players() if stats_store.is_loaded else None,
+            "fuzzy_matched_players": get_fuzzy_matched_players() if stats_store.is_loaded else None,
+            "schedule_version": schedule_store.version if schedule_store.is_loaded else None,
+            "api_cache": {league_id: api_league.to_dict() for league_id, api_league in self._api_leagues.items()},
+            "snapshot": {
+                "role": "publisher" if self.is_publisher else "follower",
+                "version": self.snapshots.version,
+                "pid": os.getpid(),
+            } if self.snapshots is not None else None,
+        }
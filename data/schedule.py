@@ -1,52 +1,190 @@
-from typing import List
-import requests
-from bs4 import BeautifulSoup
-
+from datetime import date, timedelta
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+from config.constants import SCHEDULE_CACHE_FILENAME, SCHEDULE_HTML_FILENAME, SCHEDULE_TTL, SCHEDULE_URL
+from data.http_client import http_client
+from data.store import VersionedStore
 from utils.utils import get_nba_team_abbreviation
 
 
-def generate_schedule():
-    """Gets raw html data and returns raw weekly schedule list"""
-    url = "https://hashtagbasketball.com/advanced-nba-schedule-grid"
-    page = requests.get(url)
-
-    soup = BeautifulSoup(page.content, "html.parser")
-    for script in soup(['script', 'head', 'input', 'th']):
-        script.extract()
-    soup = soup.find('table')
+# Elements whose contents are not part of the grid
+SKIPPED_TAGS = {'script', 'head', 'th'}
+
+# Class of the grid's non-game cells
+SKIPPED_CELL_CLASS = ['cell-bg-1', 'mw100']
+
+
+class ScheduleGridParser(HTMLParser):
+    """Extracts the cell text of the page's first table straight from parser events"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[str]] = []
+        self._skip_depth = 0
+        self._table_depth = 0
+        self.done = False
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_depth:
+            if tag in SKIPPED_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = 1
+            return
+        if self.done:
+            return
+
+        if tag == 'table':
+            self._table_depth += 1
+        elif self._table_depth == 0:
+            return
+        elif tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag == 'td' and self._row is not None:
+            self._end_cell()
+            cell_class = dict(attrs).get('class') or ''
+            # excluded cells are still parsed, their text just isn't kept
+            self._cell = [] if cell_class.split() != SKIPPED_CELL_CLASS else None
+
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            if tag in SKIPPED_TAGS:
+                self._skip_depth -= 1
+            return
+        if self.done or self._table_depth == 0:
+            return
+
+        if tag == 'td':
+            self._end_cell()
+        elif tag == 'tr':
+            self._end_row()
+        elif tag == 'table':
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._end_row()
+                self.done = True
+
+
+    def handle_data(self, data):
+        if self._cell is not None and not self._skip_depth:
+            self._cell.append(data)
+
+
+    def _end_cell(self):
+        if self._cell is not None:
+            self._row.append(''.join(self._cell).strip())
+            self._cell = None
+
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row:
+            self.rows.append(self._row)
+        self._row = None
+
+
+def parse_schedule_grid(chunks: Iterable[str]) -> Dict[str, List[int]]:
+    """Builds the team x day game grid from the schedule page, fed in chunks"""
+    parser = ScheduleGridParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    parser.close()
 
     raw_schedule = {}
-    for row in soup.findAll('tr'):
-        cells = row.find_all(lambda tag: tag.name == "td" and tag.get("class") != ["cell-bg-1", "mw100"])
-        if len(cells) == 0:
-            continue
-        team_name = get_nba_team_abbreviation(cells[0].text.strip())
+    for cells in parser.rows:
+        team_name = get_nba_team_abbreviation(cells[0])
         if team_name is None:
             continue
+        raw_schedule[team_name] = [1 if game else 0 for game in cells[2:]]
+    return raw_schedule
 
-        games = [td.text.strip() for td in cells[2:]]
-        schedule = [1 if game else 0 for game in games]
-        raw_schedule[team_name] = schedule
 
-    return raw_schedule
+def generate_schedule(html_filename: Optional[str] = SCHEDULE_HTML_FILENAME) -> Dict[str, List[int]]:
+    """Gets the schedule grid page, or a saved copy of it, and returns raw weekly schedule list"""
+    if html_filename is not None:
+        with open(html_filename, mode="r", encoding="utf-8") as file:
+            return parse_schedule_grid(iter(lambda: file.read(1 << 16), ""))
+
+    page = http_client.get(SCHEDULE_URL, ttl=SCHEDULE_TTL)
+    with page.open() as file:
+        return parse_schedule_grid(iter(lambda: file.read(1 << 16), ""))
+
+
+class ScheduleIndex:
+    """Per-team prefix sums over the daily schedule grid, so a day range's games are a difference of two entries"""
+
+    def __init__(self, raw_schedule: Dict[str, List[int]], start_date: date):
+        self.start_date = start_date
+        self.team_rows = {team_name: i for i, team_name in enumerate(raw_schedule)}
+        self.n_days = max((len(games) for games in raw_schedule.values()), default=0)
+
+        self.games = np.zeros((len(raw_schedule), self.n_days), dtype=np.int8)
+        for team_name, games in raw_schedule.items():
+            self.games[self.team_rows[team_name], :len(games)] = games
+        self.cumulative = np.zeros((len(raw_schedule), self.n_days + 1), dtype=np.int16)
+        np.cumsum(self.games, axis=1, out=self.cumulative[:, 1:])
 
 
-global schedule
-schedule = generate_schedule()
+    def games_between(self, team_name: str, start_day: int, end_day: Optional[int] = None) -> int:
+        """Games for team_name on days [start_day, end_day), counted from start_date"""
+        row = self.team_rows.get(team_name)
+        if row is None:
+            return 0
+        end_day = self.n_days if end_day is None else end_day
+        start_day = min(max(start_day, 0), self.n_days)
+        end_day = min(max(end_day, start_day), self.n_days)
+        return int(self.cumulative[row, end_day] - self.cumulative[row, start_day])
 
 
-def refresh_schedule():
-    schedule = generate_schedule()
+    def games_matrix(self, team_names: Iterable[Optional[str]], start_day: int = 0) -> np.ndarray:
+        """teams x days grid of games from start_day on, with a row of no games for unknown teams"""
+        start_day = min(max(start_day, 0), self.n_days)
+        games = np.zeros((1, self.n_days - start_day), dtype=np.int8)
+        games = np.concatenate([self.games[:, start_day:], games])
+        no_games_row = len(games) - 1
+        return games[[self.team_rows.get(team_name, no_games_row) for team_name in team_names]]
 
 
-def get_team_schedule(team_name: str) -> List[int]:
-    return schedule.get(team_name)
+    def games_in_window(self, team_name: str, start: date, end: date) -> Optional[int]:
+        """Games for team_name between two dates, inclusive, or None if the grid doesn't cover them"""
+        start_day, end_day = (start - self.start_date).days, (end - self.start_date).days + 1
+        if start_day < 0 or end_day > self.n_days:
+            return None
+        return self.games_between(team_name, start_day, end_day)
+
+
+def generate_schedule_index() -> ScheduleIndex:
+    # the grid starts on the Monday of the current week
+    week_start = date.today() - timedelta(days=date.today().weekday())
+    return ScheduleIndex(generate_schedule(), week_start)
+
+
+schedule_store = VersionedStore(generate_schedule_index, SCHEDULE_CACHE_FILENAME)
+
+
+def refresh_schedule() -> int:
+    return schedule_store.reload()
+
+
+def get_team_schedule(team_name: str) -> Optional[List[int]]:
+    index = schedule_store.value
+    row = index.team_rows.get(team_name)
+    return index.games[row].tolist() if row is not None else None
 
 
 def get_games_scheduled_by_team(team_name: str) -> int:
-    return sum(get_team_schedule(team_name))
+    return schedule_store.value.games_between(team_name, 0)
 
 
 def get_games_remaining_by_team(team_name: str, current_day: int) -> int:
-    return sum(get_team_schedule(team_name)[current_day:])
-
+    return schedule_store.value.games_between(team_name, current_day)
@@ -0,0 +1,184 @@
+import fcntl
+import mmap
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from config.constants import SNAPSHOT_KEEP_VERSIONS
+from utils.utils import atomic_write
+
+
+# seqlock header: sequence counter (odd while a write is in progress), current version
+HEADER = struct.Struct('<QQ')
+# payload file: magic, version, pickle length, number of out-of-band buffers,
+# followed by an (offset, length) pair per buffer, the pickle, and the aligned buffers
+PAYLOAD_MAGIC = b'FBASNAP1'
+PAYLOAD_HEADER = struct.Struct('<8sQQQ')
+BUFFER_ENTRY = struct.Struct('<QQ')
+BUFFER_ALIGNMENT = 64
+
+PAYLOAD_FILENAME = re.compile(r'^snapshot\.(\d+)$')
+# how often a reader retries an odd counter, backing off up to VERSION_MAX_BACKOFF seconds,
+# before waiting on the writers' lock instead
+VERSION_RETRIES = 20
+VERSION_MAX_BACKOFF = 0.05
+
+
+def _align(offset: int) -> int:
+    return -(-offset // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT
+
+
+class SnapshotFile:
+    """Versioned snapshots shared between processes through memory-mapped files behind a seqlock header"""
+
+    def __init__(self, directory: str, keep: int = SNAPSHOT_KEEP_VERSIONS):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(os.path.join(directory, 'requests'), exist_ok=True)
+        self._header_filename = os.path.join(directory, 'header')
+        fd = os.open(self._header_filename, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.fstat(fd).st_size < HEADER.size:
+                os.ftruncate(fd, HEADER.size)
+            self._header = mmap.mmap(fd, HEADER.size)
+        finally:
+            os.close(fd)
+        self._write_lock = threading.Lock()
+        self._publisher_fd: Optional[int] = None
+
+
+    def _payload_filename(self, version: int) -> str:
+        return os.path.join(self.directory, f'snapshot.{version}')
+
+
+    @property
+    def version(self) -> int:
+        """Latest published version, 0 before the first"""
+        for attempt in range(VERSION_RETRIES):
+            sequence, version = HEADER.unpack_from(self._header)
+            if sequence % 2 == 0 and HEADER.unpack_from(self._header)[0] == sequence:
+                return version
+            time.sleep(min(1e-5 * 2 ** attempt, VERSION_MAX_BACKOFF))
+        # a live writer holds the lock until it is done, so once it is ours, any odd counter was
+        # left by a killed one, whose version was already written in full
+        with open(self._header_filename, mode='rb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            return HEADER.unpack_from(self._header)[1]
+
+
+    def _repair_header(self):
+        """Makes an odd counter left by a killed writer even; the caller holds the writers' lock"""
+        sequence, version = HEADER.unpack_from(self._header)
+        if sequence % 2 == 1:
+            HEADER.pack_into(self._header, 0, sequence + 1, version)
+
+
+    def publish(self, value: Any) -> int:
+        """Writes value as the next version and returns it"""
+        buffers: List[pickle.PickleBuffer] = []
+        data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+
+        entries, offset = [], _align(PAYLOAD_HEADER.size + BUFFER_ENTRY.size * len(raws) + len(data))
+        for raw in raws:
+            entries.append((offset, raw.nbytes))
+            offset = _align(offset + raw.nbytes)
+
+        # writers in other processes, e.g. the gunicorn master and a worker, take turns
+        with self._write_lock, open(self._header_filename, mode='rb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._repair_header()
+            sequence, version = HEADER.unpack_from(self._header)
+            version += 1
+            filename = self._payload_filename(version)
+            with atomic_write(filename) as file:
+                file.write(PAYLOAD_HEADER.pack(PAYLOAD_MAGIC, version, len(data), len(raws)))
+                for entry in entries:
+                    file.write(BUFFER_ENTRY.pack(*entry))
+                file.write(data)
+                for (buffer_offset, _), raw in zip(entries, raws):
+                    file.seek(buffer_offset)
+                    file.write(raw)
+                file.truncate(offset)
+
+            HEADER.pack_into(self._header, 0, sequence + 1, version)
+            HEADER.pack_into(self._header, 0, sequence + 2, version)
+            self._remove_old_payloads(version)
+        return version
+
+
+    def _remove_old_payloads(self, version: int):
+        # readers that already mapped an old payload keep it until they drop it
+        for filename in os.listdir(self.directory):
+            match = PAYLOAD_FILENAME.match(filename)
+            if match is not None and int(match.group(1)) <= version - self.keep:
+                os.remove(os.path.join(self.directory, filename))
+
+
+    def read(self) -> Tuple[int, Any]:
+        """Maps the latest version and returns it with its value, or (0, None) before the first"""
+        while True:
+            version = self.version
+            if version == 0:
+                return 0, None
+            try:
+                with open(self._payload_filename(version), mode='rb') as file:
+                    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                # superseded and removed while this reader was behind; read the newer one
+                continue
+            return version, self._load(mapping)
+
+
+    def _load(self, mapping: mmap.mmap) -> Any:
+        magic, _, data_length, n_buffers = PAYLOAD_HEADER.unpack_from(mapping)
+        if magic != PAYLOAD_MAGIC:
+            raise ValueError(f"Not a snapshot payload in {self.directory}")
+        view = memoryview(mapping)
+        entries = [
+            BUFFER_ENTRY.unpack_from(mapping, PAYLOAD_HEADER.size + BUFFER_ENTRY.size * i) for i in range(n_buffers)
+        ]
+        start = PAYLOAD_HEADER.size + BUFFER_ENTRY.size * n_buffers
+        # the arrays keep views of the mapping, which stays mapped as long as any of them lives
+        return pickle.loads(
+            view[start:start + data_length],
+            buffers=[view[offset:offset + length] for offset, length in entries],
+        )
+
+
+    def try_acquire_publisher(self) -> bool:
+        """Makes this process the one publisher, if none holds the role; it is released on exit"""
+        if self._publisher_fd is not None:
+            return True
+        fd = os.open(os.path.join(self.directory, 'publisher.lock'), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._publisher_fd = fd
+        with self._write_lock, open(self._header_filename, mode='rb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._repair_header()
+        return True
+
+
+    def request(self, key: str):
+        """Asks the publisher for something it doesn't publish yet, e.g. a league to build"""
+        with open(os.path.join(self.directory, 'requests', key), mode='a'):
+            pass
+
+
+    def pop_requests(self) -> List[str]:
+        directory = os.path.join(self.directory, 'requests')
+        keys = os.listdir(directory)
+        for key in keys:
+            try:
+                os.remove(os.path.join(directory, key))
+            except FileNotFoundError:
+                pass
+        return keys
@@ -0,0 +1,101 @@
+import logging
+import os
+import pickle
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+from utils.utils import atomic_write
+
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedStore(Generic[T]):
+    """Holds a dataset that is loaded on first read and replaced wholesale by one reference swap"""
+
+    def __init__(self, loader: Callable[[], T], cache_filename: Optional[str] = None):
+        self._loader = loader
+        self._cache_filename = cache_filename
+        self._reload_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._snapshot: Optional[Tuple[int, T]] = None
+
+
+    @property
+    def value(self) -> T:
+        return self.snapshot()[1]
+
+
+    @property
+    def version(self) -> int:
+        return self.snapshot()[0]
+
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+
+    def snapshot(self) -> Tuple[int, T]:
+        """Returns the version and value as one consistent pair"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._reload_lock:
+                if self._snapshot is None:
+                    self._snapshot = (1, self._load_cold())
+                snapshot = self._snapshot
+        return snapshot
+
+
+    def reload(self) -> int:
+        """Builds a new table and publishes it, returning the new version"""
+        with self._reload_lock:
+            value = self._load()
+            version = self._snapshot[0] + 1 if self._snapshot is not None else 1
+            self._snapshot = (version, value)
+            return version
+
+
+    def adopt(self, version: int, value: T):
+        """Publishes a table built elsewhere, e.g. by another process, under that build's version"""
+        with self._reload_lock:
+            if self._snapshot is None or self._snapshot[0] != version:
+                self._snapshot = (version, value)
+
+
+    def reload_in_background(self) -> Future:
+        """Runs reload() on the store's worker thread; readers keep the old table until it finishes"""
+        with self._reload_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(self.reload)
+
+
+    def _load(self) -> T:
+        value = self._loader()
+        if self._cache_filename is not None:
+            self._write_cache(value)
+        return value
+
+
+    def _load_cold(self) -> T:
+        try:
+            return self._load()
+        except Exception:
+            if self._cache_filename is None or not os.path.exists(self._cache_filename):
+                raise
+            logger.warning(
+                "%s failed, using the copy cached in %s", getattr(self._loader, '__name__', self._loader), self._cache_filename,
+                exc_info=True,
+            )
+            with open(self._cache_filename, mode="rb") as file:
+                return pickle.load(file)
+
+
+    def _write_cache(self, value: T):
+        os.makedirs(os.path.dirname(self._cache_filename) or ".", exist_ok=True)
+        with atomic_write(self._cache_filename) as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,210 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yahoo_fantasy_api as yfa
+from rauth import OAuth2Session
+from yahoo_oauth import OAuth2
+
+from config.constants import LEAGUE_NAME, OAUTH2_JSON_FILENAME, YAHOO_API_TIMEOUT, YAHOO_API_TTLS
+from utils.utils import atomic_write
+
+
+# yfa.League memoizes some calls for the object's lifetime. The proxy outlives many refreshes,
+# so these are reset on every miss, or the backend would never see a new week.
+BACKEND_MEMO_ATTRIBUTES = {
+    'settings': 'settings_cache',
+    'current_week': 'current_week_cache',
+    'week_date_range': 'week_date_range_cache',
+    'positions': 'positions_cache',
+    'free_agents': 'free_agent_cache',
+}
+
+
+logger = logging.getLogger(__name__)
+
+
+class TimeoutOAuth2Session(OAuth2Session):
+    """OAuth2Session whose requests give up after YAHOO_API_TIMEOUT, so a hung Yahoo call
+    can't hold a build's worker thread for long"""
+
+    def request(self, method, url, bearer_auth=True, **req_kwargs):
+        req_kwargs.setdefault('timeout', YAHOO_API_TIMEOUT)
+        return super().request(method, url, bearer_auth=bearer_auth, **req_kwargs)
+
+
+def create_game(oauth2_json_filename: str = OAUTH2_JSON_FILENAME, league_name: str = LEAGUE_NAME) -> yfa.Game:
+    oauth = OAuth2(None, None, from_file=oauth2_json_filename)
+    # yfa replaces the session whenever it refreshes the token, from the service's session_obj
+    oauth.oauth.session_obj = TimeoutOAuth2Session
+    oauth.session = oauth.oauth.get_session(token=oauth.access_token)
+    return yfa.Game(oauth, league_name)
+
+
+class CachedTeam:
+    """Stand-in for yfa.Team whose roster goes through the league's cache"""
+
+    def __init__(self, league: 'CachedLeague', team_key: str):
+        self._league = league
+        self.team_key = team_key
+
+
+    def roster(self):
+        return self._league.roster(self.team_key)
+
+
+class CachedLeague:
+    """Caching proxy around the yfa.League calls made by League, whose cached values must not be mutated"""
+
+    def __init__(
+        self,
+        backend: yfa.League,
+        ttls: Optional[Dict[str, float]] = None,
+        cache_filename: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._backend = backend
+        self._ttls = dict(YAHOO_API_TTLS if ttls is None else ttls)
+        self._cache_filename = cache_filename
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple, Tuple[float, Any]] = self._read_cache()
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._dirty = False
+
+        self.hits = Counter()
+        self.misses = Counter()
+        self.deduplicated = Counter()
+
+
+    def settings(self):
+        return self._call('settings', (), self._backend.settings)
+
+
+    def current_week(self):
+        return self._call('current_week', (), self._backend.current_week)
+
+
+    def week_date_range(self, week: int):
+        return self._call('week_date_range', (week,), lambda: self._backend.week_date_range(week))
+
+
+    def teams(self):
+        return self._call('teams', (), self._backend.teams)
+
+
+    def matchups(self, week: Optional[int] = None):
+        if week is None:
+            return self._call('matchups', (), self._backend.matchups)
+        return self._call('matchups', (week,), lambda: self._backend.matchups(week))
+
+
+    def positions(self):
+        return self._call('positions', (), self._backend.positions)
+
+
+    def free_agents(self, position: str):
+        return self._call('free_agents', (position,), lambda: self._backend.free_agents(position))
+
+
+    def to_team(self, team_key: str) -> CachedTeam:
+        return CachedTeam(self, team_key)
+
+
+    def roster(self, team_key: str):
+        return self._call('roster', (team_key,), lambda: self._backend.to_team(team_key).roster())
+
+
+    def invalidate(self, endpoint: Optional[str] = None):
+        """Drops the cached entries of one endpoint, or all of them"""
+        with self._lock:
+            self._entries = {
+                key: entry for key, entry in self._entries.items() if endpoint is not None and key[0] != endpoint
+            }
+            self._dirty = True
+
+
+    def save(self):
+        """Writes the unexpired entries to cache_filename, if anything changed since the last save"""
+        if self._cache_filename is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = self._clock()
+            entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self._cache_filename) or ".", exist_ok=True)
+        with atomic_write(self._cache_filename) as file:
+            pickle.dump(entries, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+    def _call(self, endpoint: str, args: Tuple, fetch: Callable[[], Any]):
+        key = (endpoint, *args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self.hits[endpoint] += 1
+                return entry[1]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.deduplicated[endpoint] += 1
+            else:
+                self.misses[endpoint] += 1
+                self._in_flight[key] = Future()
+        if future is not None:
+            return future.result()
+
+        try:
+            self._reset_backend_memo(endpoint)
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                future = self._in_flight.pop(key)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttls.get(endpoint, 0), value)
+            self._dirty = True
+            future = self._in_flight.pop(key)
+        future.set_result(value)
+        return value
+
+
+    def _reset_backend_memo(self, endpoint: str):
+        attribute = BACKEND_MEMO_ATTRIBUTES.get(endpoint)
+        if attribute is not None and hasattr(self._backend, attribute):
+            memo = getattr(self._backend, attribute)
+            setattr(self._backend, attribute, {} if isinstance(memo, dict) else None)
+
+
+    def _read_cache(self) -> Dict[Tuple, Tuple[float, Any]]:
+        if self._cache_filename is None or not os.path.exists(self._cache_filename):
+            return {}
+        try:
+            with open(self._cache_filename, mode="rb") as file:
+                return pickle.load(file)
+        except Exception:
+            logger.warning("Ignoring unreadable cache %s", self._cache_filename, exc_info=True)
+            return {}
+
+
+    def to_dict(self):
+        endpoints = sorted(set(self.hits) | set(self.misses) | set(self.deduplicated))
+        return {
+            endpoint: {
+                "hits": self.hits[endpoint],
+                "misses": self.misses[endpoint],
+                "deduplicated": self.deduplicated[endpoint],
+            }
+            for endpoint in endpoints
+        }
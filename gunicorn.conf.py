@@ -0,0 +1,34 @@
+import gc
+
+from config.constants import SERVER_BIND, SERVER_THREADS, SERVER_TIMEOUT, SERVER_WORKERS
+from data.http_client import http_client
+from models.league import reset_roster_executors
+from models.simulation import reset_executors
+
+
+bind = SERVER_BIND
+workers = SERVER_WORKERS
+# threaded workers, so long-lived event streams and slow requests don't hold up a whole process
+worker_class = 'gthread'
+threads = SERVER_THREADS
+timeout = SERVER_TIMEOUT
+# import the app once in the master, which builds the leagues before forking the workers
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # the preloaded objects are never collected, so moving them out of the collector's reach
+    # stops collections in the workers from touching (and copying) their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # only the forking thread survives a fork, so every pool, lock and pooled connection
+    # inherited from the master is replaced here, before the worker starts threads of its own
+    reset_roster_executors()
+    reset_executors()
+    http_client.session.close()
+    refresher = server.app.wsgi().extensions["refresher"]
+    refresher.after_fork()
+    # the leagues were just built by the master
+    refresher.start(refresh_now=False)
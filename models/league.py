@@ -1,82 +1,192 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Dict
+import itertools
+import threading
+from typing import Dict, List, Optional, Tuple
 import yahoo_fantasy_api as yfa
-from data.schedule import get_games_scheduled_by_team, get_games_remaining_by_team
-from data.player_stats import get_player_team
+from config.constants import FREE_AGENT_POSITION, ROSTER_FETCH_MAX_WORKERS, ROSTER_FETCH_TIMEOUT
+from data.schedule import get_games_scheduled_by_team, get_games_remaining_by_team, schedule_store
+from data.player_stats import get_player_projection, stats_store
+from models.lineup import get_active_slots, set_startable_games
 from models.matchup import Matchup
 from models.stats import Stats
 from models.team import Team
 from models.player import Player
-from utils.utils import get_n_games_args, to_matchup_stats_args
+from utils.utils import get_fingerprint, get_n_games_args, to_matchup_stats_args
+
+
+# Every refresh produces a new version, so anything derived from a League can be cached against it
+_versions = itertools.count(1)
+_versions_lock = threading.Lock()
+
+# Roster fetches of every build share one pool per size, so requests that hang until their
+# timeout hold at most max_workers threads instead of leaking a new pool's threads per build
+_roster_executors: Dict[int, ThreadPoolExecutor] = {}
+_roster_executors_lock = threading.Lock()
+
+
+def _get_roster_executor(max_workers: int) -> ThreadPoolExecutor:
+    with _roster_executors_lock:
+        executor = _roster_executors.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="roster-fetch")
+            _roster_executors[max_workers] = executor
+        return executor
+
+
+def reset_roster_executors():
+    """Forgets the pools inherited by a forked process, which has none of their threads"""
+    global _roster_executors, _roster_executors_lock
+    _roster_executors, _roster_executors_lock = {}, threading.Lock()
+
+
+def advance_versions(version: int):
+    """Numbers the Leagues built from now on past version, e.g. of one adopted from another
+    process, so a process taking over the building never goes back to older versions"""
+    global _versions
+    with _versions_lock:
+        _versions = itertools.count(max(next(_versions), version + 1))
 
 
 class League:
     
-    def __init__(self, yfa_league: yfa.League):
+    def __init__(
+        self,
+        yfa_league: yfa.League,
+        max_workers: int = ROSTER_FETCH_MAX_WORKERS,
+        timeout: float = ROSTER_FETCH_TIMEOUT,
+        previous: Optional['League'] = None,
+    ):
         self._yfa_league = yfa_league
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # unchanged teams are shared with the previous snapshot, which is never mutated
+        self._team_cache = previous._team_cache if previous is not None else {}
         self.refresh()
 
 
     def refresh(self):
-        self.name = self._yfa_league.settings()['name']
+        settings = self._yfa_league.settings()
+        self.name = settings['name']
+        # None when the league has no weekly limit
+        self.max_weekly_adds = int(settings['max_weekly_adds']) if settings.get('max_weekly_adds') else None
+        self.positions = self._yfa_league.positions()
         self.current_week = self._yfa_league.current_week()
         self.week_date_range = self._yfa_league.week_date_range(self.current_week)
         self.current_day = self._get_current_day()
+        self.n_teams_rebuilt, self.n_teams_reused = 0, 0
         self.teams, self.matchups = self._generate_teams_and_matchups()
+        self.teams_by_key, self.teams_by_name, self.players_by_id = self._generate_indexes()
+        self._free_agents: Optional[List[Player]] = None
+        with _versions_lock:
+            self.version = next(_versions)
 
 
     def _generate_teams_and_matchups(self):
-        raw_matchups = self._yfa_league.matchups()['fantasy_content']['league'][1]['scoreboard']['0']['matchups']
+        # the scoreboard of current_week, so a rollover between the two calls can't mix weeks
+        raw_matchups = self._yfa_league.matchups(self.current_week)['fantasy_content']['league'][1]['scoreboard']['0']['matchups']
         yfa_league_teams = self._yfa_league.teams()
+        raw_matchups = [
+            raw_matchups[matchup_key]['matchup']['0']['teams']
+            for matchup_key in raw_matchups if matchup_key != 'count'
+        ]
+        rosters = self._fetch_rosters([
+            raw_matchup[i]['team'][0][0]['team_key']
+            for raw_matchup in raw_matchups for i in ('0', '1')
+        ])
+        team_cache = {}
         matchups, teams = [], []
 
-        for matchup_key in raw_matchups:
-            if matchup_key == 'count':
-                continue
+        for raw_matchup in raw_matchups:
+            team1 = self._get_or_generate_team(raw_matchup['0']['team'], yfa_league_teams, rosters, team_cache)
+            team2 = self._get_or_generate_team(raw_matchup['1']['team'], yfa_league_teams, rosters, team_cache)
+            teams.extend([team1, team2])
+            matchups.append(Matchup(team1, team2))
 
-            raw_matchup = raw_matchups[matchup_key]['matchup']['0']['teams']
+        self._team_cache = team_cache
+        return teams, matchups
 
-            team1_key = raw_matchup['0']['team'][0][0]['team_key']
-            team1_current_matchup_stats = Stats(*to_matchup_stats_args(raw_matchup['0']['team'][1]))
-            team1 = self._generate_team(
-                team1_key, 
-                yfa_league_teams[team1_key], 
-                team1_current_matchup_stats,
-                *get_n_games_args(raw_matchup['0']['team'][1])
-            )
-            teams.append(team1)
-
-            team2_key = raw_matchup['1']['team'][0][0]['team_key']
-            team2_current_matchup_stats = Stats(*to_matchup_stats_args(raw_matchup['1']['team'][1]))
-            team2 = self._generate_team(
-                team2_key, 
-                yfa_league_teams[team2_key],
-                team2_current_matchup_stats,
-                *get_n_games_args(raw_matchup['1']['team'][1])
+
+    def _get_or_generate_team(
+        self,
+        raw_team: List,
+        yfa_league_teams: Dict,
+        rosters: Dict[str, List[Dict]],
+        team_cache: Dict[str, Tuple[str, Team]],
+    ) -> Team:
+        """Reuses the previous refresh's Team if none of its inputs changed"""
+        team_key = raw_team[0][0]['team_key']
+        fingerprint = get_fingerprint(
+            self.current_day,
+            stats_store.version,
+            schedule_store.version,
+            self.positions,
+            raw_team,
+            yfa_league_teams[team_key],
+            rosters[team_key],
+        )
+
+        cached = self._team_cache.get(team_key)
+        if cached is not None and cached[0] == fingerprint:
+            team = cached[1]
+            self.n_teams_reused += 1
+        else:
+            team = self._generate_team(
+                yfa_league_teams[team_key],
+                rosters[team_key],
+                Stats(*to_matchup_stats_args(raw_team[1])),
+                *get_n_games_args(raw_team[1])
             )
-            teams.append(team2)
+            self.n_teams_rebuilt += 1
 
-            matchups.append(Matchup(team1, team2))
+        team_cache[team_key] = (fingerprint, team)
+        return team
 
-        return teams, matchups
+
+    def _generate_indexes(self) -> Tuple[Dict[str, Team], Dict[str, Team], Dict[str, Player]]:
+        teams_by_key = {team.team_key: team for team in self.teams}
+        teams_by_name = {team.team_name: team for team in self.teams}
+        players_by_id = {str(player.player_id): player for team in self.teams for player in team.roster}
+        return teams_by_key, teams_by_name, players_by_id
+
+
+    def _fetch_rosters(self, team_keys: List[str]) -> Dict[str, List[Dict]]:
+        """Fetches every team's roster at once, with at most max_workers requests in flight"""
+        executor = _get_roster_executor(self.max_workers)
+        futures = {
+            team_key: executor.submit(self._fetch_roster, team_key)
+            for team_key in team_keys
+        }
+        try:
+            return {
+                team_key: future.result(timeout=self.timeout)
+                for team_key, future in futures.items()
+            }
+        finally:
+            # after a timeout, don't leave this build's remaining requests queued
+            for future in futures.values():
+                future.cancel()
+
+
+    def _fetch_roster(self, team_key: str) -> List[Dict]:
+        return self._yfa_league.to_team(team_key).roster()
 
 
     def _generate_team(
         self, 
-        team_key: str, 
         yfa_team_obj: Dict, 
+        raw_roster: List[Dict],
         current_matchup_stats: Stats,
         team_points: int,
         games_played: int,
         games_remaining: int,
     ) -> Team:
-        
-        yfa_team = self._yfa_league.to_team(team_key)
-
+        roster = self._generate_roster(raw_roster)
+        set_startable_games(roster, schedule_store.value, self.current_day, get_active_slots(self.positions))
         return Team(
             yfa_team_obj['team_key'], 
             yfa_team_obj['name'],
-            self._generate_roster(yfa_team.roster()),
+            roster,
             int(yfa_team_obj['waiver_priority']),
             int(yfa_team_obj['roster_adds']['value']),
             current_matchup_stats,
@@ -89,14 +199,17 @@ class League:
     def _generate_roster(self, raw_roster):
         roster = []
         for player in raw_roster:
-            player_team = get_player_team(player['name'])
+            player_team, player_stats = get_player_projection(
+                player['player_id'], player['name'], player.get('editorial_team_abbr', '')
+            )
             roster.append(Player(
                 player['player_id'],
                 player['name'],
                 player_team,
-                player['status'],
+                player_stats,
+                player.get('status', ''),
                 player['eligible_positions'],
-                player['selected_position'],
+                player.get('selected_position'),
                 get_games_scheduled_by_team(player_team),
                 get_games_remaining_by_team(player_team, self.current_day)
             ))
@@ -110,13 +223,47 @@ class League:
         return min(n_days.days, week_total_n_days.days)
     
     
-    def get_team_by_team_id(self, team_id: str) -> Team:
-        for team in self.teams:
-            if team.team_key == team_id:
-                return team
+    def get_team_by_team_id(self, team_id: str) -> Optional[Team]:
+        return self.teams_by_key.get(team_id)
+
+
+    def get_team_by_team_name(self, team_name: str) -> Optional[Team]:
+        return self.teams_by_name.get(team_name)
+
+
+    def get_player_by_player_id(self, player_id: str) -> Optional[Player]:
+        return self.players_by_id.get(str(player_id))
+
+
+    def get_opponent(self, team_key: str) -> Optional[Team]:
+        for matchup in self.matchups:
+            if matchup.team1.team_key == team_key:
+                return matchup.team2
+            if matchup.team2.team_key == team_key:
+                return matchup.team1
         return None
 
 
+    def __getstate__(self):
+        # a snapshot handed to another process, which can't call Yahoo or rebuild teams from it
+        state = dict(self.__dict__)
+        state['_yfa_league'] = None
+        state['_team_cache'] = {}
+        return state
+
+
+    @property
+    def free_agents_loaded(self) -> bool:
+        return self._free_agents is not None
+
+
+    def get_free_agents(self) -> List[Player]:
+        """Free agents with their projections, fetched on first use and kept for this snapshot"""
+        if self._free_agents is None:
+            self._free_agents = self._generate_roster(self._yfa_league.free_agents(FREE_AGENT_POSITION))
+        return self._free_agents
+
+
     def to_dict(self):
         return {
             "name": self.name,
@@ -0,0 +1,89 @@
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+import numpy as np
+
+from config.constants import INACTIVE_POSITIONS, INJURED_LIST_POSITIONS, SLOT_ASSIGNMENT_CACHE_SIZE
+from data.schedule import ScheduleIndex
+from models.player import Player
+from models.stats import N_STATS
+
+
+# Rough per-game spread of each counting category (FGA, FGM, FTA, FTM, 3PTM, PTS, REB, AST, STL,
+# BLK, TOV), so that each weighs about the same when ranking who starts without an opponent
+DEFAULT_GAME_VALUE_WEIGHTS = np.array([0, 0, 0, 0, 1 / 1.0, 1 / 6.0, 1 / 3.0, 1 / 2.0, 1 / 0.5, 1 / 0.5, -1 / 1.0])
+
+# Positions implied by another, e.g. a PG can always fill a G slot
+IMPLIED_POSITIONS = {'PG': ('G',), 'SG': ('G',), 'SF': ('F',), 'PF': ('F',)}
+
+
+def get_active_slots(positions: Dict[str, Dict]) -> Tuple[str, ...]:
+    """One entry per daily active roster slot, e.g. ('PG', 'SG', 'G', ..., 'Util', 'Util')"""
+    return tuple(
+        name
+        for name, position in positions.items() if name not in INACTIVE_POSITIONS
+        for _ in range(int(position['count']))
+    )
+
+
+def get_slot_eligibility(player: Player) -> FrozenSet[str]:
+    positions = set(player.eligible_positions)
+    for position in player.eligible_positions:
+        positions.update(IMPLIED_POSITIONS.get(position, ()))
+    positions.add('Util')
+    return frozenset(positions)
+
+
+def get_roster_games(players: Iterable[Player], schedule: ScheduleIndex, current_day: int) -> np.ndarray:
+    """players x days games from current_day on, none for injured or injured-list players"""
+    players = list(players)
+    games = schedule.games_matrix((player.team for player in players), current_day)
+    games[[player.status == 'INJ' or player.selected_position in INJURED_LIST_POSITIONS for player in players]] = 0
+    return games
+
+
+@lru_cache(maxsize=SLOT_ASSIGNMENT_CACHE_SIZE)
+def assign_slots(slots: Tuple[str, ...], eligibilities: Tuple[FrozenSet[str], ...]) -> Tuple[bool, ...]:
+    """Which of the players, in order of priority, start in the day's slots, each placed along an augmenting path"""
+    slot_owners = [-1] * len(slots)
+
+    def augment(player: int, seen: List[bool]) -> bool:
+        for slot, position in enumerate(slots):
+            if not seen[slot] and position in eligibilities[player]:
+                seen[slot] = True
+                if slot_owners[slot] == -1 or augment(slot_owners[slot], seen):
+                    slot_owners[slot] = player
+                    return True
+        return False
+
+    return tuple(augment(player, [False] * len(slots)) for player in range(len(eligibilities)))
+
+
+def solve_daily_starts(
+    eligibilities: List[FrozenSet[str]], values: np.ndarray, games: np.ndarray, slots: Tuple[str, ...]
+) -> np.ndarray:
+    """players x days starts, filling each day's slots with the most valuable players who can play"""
+    starts = np.zeros(games.shape, dtype=bool)
+    order = np.argsort(-values, kind='stable')
+    for day in range(games.shape[1]):
+        playing = order[games[order, day] > 0]
+        if len(playing) == 0:
+            continue
+        started = assign_slots(slots, tuple(eligibilities[i] for i in playing))
+        starts[playing, day] = started
+    return starts
+
+
+def set_startable_games(roster: List[Player], schedule: ScheduleIndex, current_day: int, slots: Tuple[str, ...]):
+    """Sets each player's games_startable to the games they start in the solved daily lineups"""
+    if not roster:
+        return
+    stats = np.array([player.stats_vector for player in roster]).reshape(-1, N_STATS)
+    starts = solve_daily_starts(
+        [get_slot_eligibility(player) for player in roster],
+        stats @ DEFAULT_GAME_VALUE_WEIGHTS,
+        get_roster_games(roster, schedule, current_day),
+        slots,
+    )
+    for player, n_starts in zip(roster, starts.sum(axis=1)):
+        player.games_startable = int(n_starts)
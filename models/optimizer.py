@@ -0,0 +1,219 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.constants import INJURED_LIST_POSITIONS, OPTIMIZER_SHORTLIST_FACTOR, OPTIMIZER_TOP_K
+from data.schedule import ScheduleIndex, schedule_store
+from models.league import League
+from models.lineup import get_active_slots, get_roster_games, get_slot_eligibility, solve_daily_starts
+from models.player import Player
+from models.simulation import CATEGORIES, COUNTING_SIGNS, COUNTING_STATS
+from models.stats import FGA, FGM, FTA, FTM, N_STATS, _3PTM, Stats
+from models.team import Team
+
+
+# Breaks ties between players whose categories are all decided, e.g. late in the week
+TIEBREAK_WEIGHTS = 1e-9 * np.array([0, 0, 0, 0, 1, 1, 1, 1, 1, 1, -1])
+
+
+class Move:
+    """An add/drop (or no move, when both are None) with the lineup and category odds it leads to"""
+    __slots__ = (
+        'add', 'drop', 'expected_category_score', 'gain', 'category_win_probabilities', 'projected_stats',
+        'startable_games', 'daily_starts',
+    )
+
+    def __init__(
+        self,
+        add: Optional[Player],
+        drop: Optional[Player],
+        expected_category_score: float,
+        gain: float,
+        category_win_probabilities: np.ndarray,
+        projected_stats: Stats,
+        startable_games: Dict[str, int],
+        daily_starts: List[List[str]],
+    ):
+        self.add = add
+        self.drop = drop
+        self.expected_category_score = expected_category_score
+        self.gain = gain
+        self.category_win_probabilities = category_win_probabilities
+        self.projected_stats = projected_stats
+        self.startable_games = startable_games
+        self.daily_starts = daily_starts
+
+
+    def to_dict(self):
+        return {
+            "add": _player_ref(self.add),
+            "drop": _player_ref(self.drop),
+            "expected_category_score": round(self.expected_category_score, 3),
+            "gain": round(self.gain, 3),
+            "categories": {
+                category: round(float(p), 3) for category, p in zip(CATEGORIES, self.category_win_probabilities)
+            },
+            "projected_stats": self.projected_stats.to_dict(),
+            "startable_games": self.startable_games,
+            "daily_starts": self.daily_starts,
+        }
+
+
+def _player_ref(player: Optional[Player]):
+    return {"player_id": player.player_id, "player_name": player.player_name} if player is not None else None
+
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz & Stegun 7.1.26, within 1.5e-7 of erf
+    z = np.abs(x) / math.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return 0.5 * (1 + np.sign(x) * (1 - poly * np.exp(-z * z)))
+
+
+class CategoryModel:
+    """Normal approximation of the simulation engine's odds of winning each category, over a batch of rosters"""
+
+    def __init__(self, current: np.ndarray, opponent: Team):
+        self.current = current
+        self.opponent_totals = opponent.projected_matchup_stats.to_array()
+        self.opponent_variances = self._variances(
+            self.opponent_totals[None, :], opponent.future_matchup_stats.to_array()[None, :]
+        )[0]
+
+
+    def _variances(self, totals: np.ndarray, future: np.ndarray) -> np.ndarray:
+        """batch x categories variances of the category values"""
+        variances = np.empty((len(totals), len(CATEGORIES)))
+        for i, (attempts, makes) in enumerate(((FGA, FGM), (FTA, FTM))):
+            total_attempts = np.maximum(totals[:, attempts], 1)
+            total_misses = total_attempts - totals[:, makes]
+            future_misses = np.maximum(future[:, attempts] - future[:, makes], 0)
+            variances[:, i] = (
+                total_misses ** 2 * future[:, makes] + totals[:, makes] ** 2 * future_misses
+            ) / total_attempts ** 4
+        variances[:, 2:] = future[:, COUNTING_STATS]
+        threes = np.minimum(future[:, _3PTM], future[:, FGM])
+        variances[:, 3] = 4 * (future[:, FGM] - threes) + 9 * threes + future[:, FTM]
+        return variances
+
+
+    def _margins(self, totals: np.ndarray) -> np.ndarray:
+        """batch x categories leads over the opponent, signed so that positive is winning"""
+        opponent = self.opponent_totals
+        margins = np.empty((len(totals), len(CATEGORIES)))
+        margins[:, 0] = totals[:, FGM] / np.maximum(totals[:, FGA], 1) - opponent[FGM] / max(opponent[FGA], 1)
+        margins[:, 1] = totals[:, FTM] / np.maximum(totals[:, FTA], 1) - opponent[FTM] / max(opponent[FTA], 1)
+        margins[:, 2:] = COUNTING_SIGNS * (totals[:, COUNTING_STATS] - opponent[COUNTING_STATS])
+        return margins
+
+
+    def win_probabilities(self, future: np.ndarray) -> np.ndarray:
+        """batch x categories odds of winning, from batch x stats rest-of-week totals"""
+        totals = self.current + future
+        deviations = np.sqrt(self._variances(totals, future) + self.opponent_variances + 1e-12)
+        return _normal_cdf(self._margins(totals) / deviations)
+
+
+    def marginal_values(self, future: np.ndarray) -> np.ndarray:
+        """Expected category score gained per unit of each stat, i.e. the weights of a per-game line"""
+        totals = self.current + future
+        deviations = np.sqrt(self._variances(totals[None, :], future[None, :])[0] + self.opponent_variances + 1e-12)
+        densities = np.exp(-0.5 * (self._margins(totals[None, :])[0] / deviations) ** 2) / math.sqrt(2 * math.pi)
+        slopes = densities / deviations
+
+        weights = TIEBREAK_WEIGHTS.copy()
+        for i, (attempts, makes) in enumerate(((FGA, FGM), (FTA, FTM))):
+            total_attempts = max(totals[attempts], 1)
+            weights[makes] += slopes[i] / total_attempts
+            weights[attempts] -= slopes[i] * totals[makes] / total_attempts ** 2
+        weights[COUNTING_STATS] += COUNTING_SIGNS * slopes[2:]
+        return weights
+
+
+def start_lineups(values: np.ndarray, games: np.ndarray, n_active: int) -> np.ndarray:
+    """batch x players x days starts: on each day, the n_active most valuable players with a game"""
+    playing = games > 0
+    ranked = np.where(playing, values[:, :, None], -np.inf)
+    order = np.argsort(-ranked, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(values.shape[1])[None, :, None], axis=1)
+    return playing & (ranks < n_active)
+
+
+def rank_moves(
+    team: Team,
+    opponent: Team,
+    free_agents: List[Player],
+    schedule: ScheduleIndex,
+    current_day: int,
+    slots: Tuple[str, ...],
+    adds_remaining: Optional[int],
+    k: int = OPTIMIZER_TOP_K,
+) -> Tuple[Move, List[Move]]:
+    """Scores keeping the roster and every single add/drop, returning the no-move baseline and the top k moves"""
+    # players in IL slots never play, and can't be dropped to make room for an add
+    roster = [player for player in team.roster if player.selected_position not in INJURED_LIST_POSITIONS]
+    if adds_remaining is not None and adds_remaining <= 0:
+        free_agents = []
+    players = roster + free_agents
+
+    stats = np.array([player.stats_vector for player in players]).reshape(-1, N_STATS)
+    games = get_roster_games(players, schedule, current_day)
+
+    model = CategoryModel(team.current_matchup_stats.to_array(), opponent)
+    n_roster, n_free_agents = len(roster), len(free_agents)
+    # players are ranked by what a game of theirs adds to the current roster's expected score
+    values = stats @ model.marginal_values(games[:n_roster].sum(axis=1) @ stats[:n_roster])
+
+    # candidate c = (free agent f, dropped player r), with c = 0 keeping the roster as is
+    members = np.tile(np.arange(n_roster), (n_free_agents * n_roster + 1, 1))
+    adds, drops = np.divmod(np.arange(n_free_agents * n_roster), n_roster)
+    members[1 + np.arange(len(adds)), drops] = n_roster + adds
+
+    starts = start_lineups(values[members], games[members], len(slots))
+    scores = model.win_probabilities(np.einsum('cp,cps->cs', starts.sum(axis=2), stats[members])).sum(axis=1)
+
+    shortlist = np.concatenate([[0], np.argsort(-scores[1:], kind='stable')[:k * OPTIMIZER_SHORTLIST_FACTOR] + 1])
+    eligibilities = [get_slot_eligibility(player) for player in players]
+    for c in shortlist:
+        starts[c] = solve_daily_starts([eligibilities[i] for i in members[c]], values[members[c]], games[members[c]], slots)
+    startable_games = starts[shortlist].sum(axis=2)
+    future = np.einsum('cp,cps->cs', startable_games, stats[members[shortlist]])
+    probabilities = model.win_probabilities(future)
+    scores = probabilities.sum(axis=1)
+
+    def to_move(i: int) -> Move:
+        c = shortlist[i]
+        candidate_players = [players[p] for p in members[c]]
+        return Move(
+            free_agents[adds[c - 1]] if c else None,
+            roster[drops[c - 1]] if c else None,
+            float(scores[i]),
+            float(scores[i] - scores[0]),
+            probabilities[i],
+            Stats.from_array(model.current + future[i]),
+            {str(player.player_id): int(n) for player, n in zip(candidate_players, startable_games[i])},
+            [[str(player.player_id) for player, started in zip(candidate_players, day) if started] for day in starts[c].T],
+        )
+
+    best = np.argsort(-scores[1:], kind='stable')[:k] + 1
+    return to_move(0), [to_move(i) for i in best if scores[i] > scores[0]]
+
+
+def optimize_moves(league: League, team: Team, k: int = OPTIMIZER_TOP_K) -> Tuple[Move, List[Move]]:
+    """Best add/drops for team against its current opponent, within its weekly adds"""
+    adds_remaining = None
+    if league.max_weekly_adds is not None:
+        adds_remaining = league.max_weekly_adds - team.roster_adds
+    return rank_moves(
+        team,
+        league.get_opponent(team.team_key),
+        league.get_free_agents(),
+        schedule_store.value,
+        league.current_day,
+        get_active_slots(league.positions),
+        adds_remaining,
+        k,
+    )
@@ -1,16 +1,25 @@
-from typing import List
+from typing import List, Optional
 
 from config.constants import PlayerPosition
-from data.player_stats import get_player_stats
+from models.stats import Stats
+
+
+# Shared by every player without projections
+NO_STATS_VECTOR = Stats().to_array()
 
 
 class Player:
+    __slots__ = (
+        'player_id', 'player_name', 'team', 'status', 'eligible_positions', 'selected_position',
+        'stats', 'stats_vector', 'games_scheduled', 'games_remaining', 'games_startable',
+    )
 
     def __init__(
         self, 
         player_id: str, 
         player_name: str, 
         player_team: str,
+        stats: Optional[Stats],
         status: str, 
         eligible_positions: List[PlayerPosition], 
         selected_position: PlayerPosition,
@@ -23,9 +32,12 @@ class Player:
         self.status = status
         self.eligible_positions = eligible_positions
         self.selected_position = selected_position
-        self.stats = get_player_stats(player_name)
+        self.stats = stats
+        self.stats_vector = self.stats.to_array() if self.stats is not None else NO_STATS_VECTOR
         self.games_scheduled = games_scheduled
         self.games_remaining = games_remaining if status != "INJ" else 0
+        # lowered by the lineup solver to the games that fit in the daily active slots
+        self.games_startable = self.games_remaining
         
 
     def to_dict(self):
@@ -34,9 +46,10 @@ class Player:
             "name": self.player_name,
             "team": self.team,
             "status": self.status,
-            "stats": self.stats.to_dict(),
+            "stats": self.stats.to_dict() if self.stats is not None else None,
             "games_scheduled": self.games_scheduled,
             "games_remaining": self.games_remaining,
+            "games_startable": self.games_startable,
             "eligible_positions": [pos for pos in self.eligible_positions],
             "selected_position": self.selected_position
         }
@@ -0,0 +1,182 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.constants import SIMULATION_BATCH_SIZE, SIMULATION_MAX_WORKERS, SIMULATIONS_PER_MATCHUP
+from models.matchup import Matchup
+from models.stats import AST, BLK, FGA, FGM, FTA, FTM, PTS, REB, STL, TOV, _3PTM
+from models.team import Team
+
+
+# Head-to-head categories, compared on the simulated week totals
+CATEGORIES = ('FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV')
+N_CATEGORIES = len(CATEGORIES)
+
+# +1 where the higher total wins the category, -1 where the lower one does
+CATEGORY_SIGNS = np.array([1, 1, 1, 1, 1, 1, 1, 1, -1])
+
+# Stat columns of the counting categories, i.e. CATEGORIES after FG% and FT%, and their signs
+COUNTING_STATS = [_3PTM, PTS, REB, AST, STL, BLK, TOV]
+COUNTING_SIGNS = CATEGORY_SIGNS[2:]
+
+# one pool per size, so a caller asking for a different max_workers gets that many processes
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+class MatchupSimulation:
+    """Outcome frequencies of a matchup's simulated weeks, from team1's ("0") and team2's ("1") side"""
+    __slots__ = (
+        'team_keys', 'n_simulations', 'category_win_probabilities', 'category_tie_probabilities',
+        'expected_category_scores', 'win_probabilities',
+    )
+
+    def __init__(self, team_keys: Tuple[str, str], n_simulations: int, counts: Tuple[np.ndarray, ...]):
+        category_wins, category_ties, category_scores, wins = counts
+        self.team_keys = team_keys
+        self.n_simulations = n_simulations
+        self.category_win_probabilities = category_wins / n_simulations
+        self.category_tie_probabilities = category_ties / n_simulations
+        self.expected_category_scores = category_scores / n_simulations
+        self.win_probabilities = wins / n_simulations
+
+
+    def to_dict(self):
+        return {
+            "team_keys": list(self.team_keys),
+            "n_simulations": self.n_simulations,
+            "categories": {
+                category: {
+                    "0": round(float(self.category_win_probabilities[0, i]), 4),
+                    "1": round(float(self.category_win_probabilities[1, i]), 4),
+                    "tie": round(float(self.category_tie_probabilities[i]), 4),
+                }
+                for i, category in enumerate(CATEGORIES)
+            },
+            "expected_category_score": {
+                "0": round(float(self.expected_category_scores[0]), 2),
+                "1": round(float(self.expected_category_scores[1]), 2),
+            },
+            "win_probability": {
+                "0": round(float(self.win_probabilities[0]), 4),
+                "1": round(float(self.win_probabilities[1]), 4),
+                "tie": round(float(self.win_probabilities[2]), 4),
+            },
+        }
+
+
+def _get_rates(team: Team) -> Tuple[np.ndarray, np.ndarray]:
+    """Current totals, and Poisson rates of 2PM, 3PM, FG misses, FTM, FT misses, REB, AST, STL, BLK, TOV"""
+    future = team.future_matchup_stats.to_array()
+    three_pointers = min(future[_3PTM], future[FGM])
+    rates = np.array([
+        future[FGM] - three_pointers,
+        three_pointers,
+        max(future[FGA] - future[FGM], 0),
+        future[FTM],
+        max(future[FTA] - future[FTM], 0),
+        future[REB],
+        future[AST],
+        future[STL],
+        future[BLK],
+        future[TOV],
+    ])
+    return team.current_matchup_stats.to_array(), rates
+
+
+def _draw_categories(rng: np.random.Generator, current: np.ndarray, rates: np.ndarray, n: int) -> np.ndarray:
+    """n x categories matrix of simulated week totals, signed so that higher always wins"""
+    draws = rng.poisson(rates, size=(n, len(rates)))
+    twos, threes, fg_misses, ftm, ft_misses = draws[:, 0], draws[:, 1], draws[:, 2], draws[:, 3], draws[:, 4]
+
+    fgm = current[FGM] + twos + threes
+    fga = current[FGA] + twos + threes + fg_misses
+    total_ftm = current[FTM] + ftm
+    fta = current[FTA] + ftm + ft_misses
+
+    categories = np.empty((n, N_CATEGORIES))
+    np.divide(fgm, fga, out=categories[:, 0], where=fga > 0)
+    categories[fga <= 0, 0] = 0
+    np.divide(total_ftm, fta, out=categories[:, 1], where=fta > 0)
+    categories[fta <= 0, 1] = 0
+    categories[:, 2] = current[_3PTM] + threes
+    categories[:, 3] = current[PTS] + 2 * twos + 3 * threes + ftm
+    categories[:, 4:] = current[[REB, AST, STL, BLK, TOV]] + draws[:, 5:]
+    return categories * CATEGORY_SIGNS
+
+
+def _simulate(
+    team1_rates: Tuple[np.ndarray, np.ndarray],
+    team2_rates: Tuple[np.ndarray, np.ndarray],
+    n_simulations: int,
+    seed: np.random.SeedSequence,
+) -> Tuple[np.ndarray, ...]:
+    """Runs the simulated weeks in batches, returning outcome counts"""
+    rng = np.random.default_rng(seed)
+    category_wins = np.zeros((2, N_CATEGORIES), dtype=np.int64)
+    category_ties = np.zeros(N_CATEGORIES, dtype=np.int64)
+    category_scores = np.zeros(2, dtype=np.int64)
+    wins = np.zeros(3, dtype=np.int64)
+
+    for start in range(0, n_simulations, SIMULATION_BATCH_SIZE):
+        n = min(SIMULATION_BATCH_SIZE, n_simulations - start)
+        categories1 = _draw_categories(rng, *team1_rates, n)
+        categories2 = _draw_categories(rng, *team2_rates, n)
+
+        won1 = categories1 > categories2
+        won2 = categories1 < categories2
+        category_wins[0] += won1.sum(axis=0)
+        category_wins[1] += won2.sum(axis=0)
+        category_ties += (~won1 & ~won2).sum(axis=0)
+
+        scores1, scores2 = won1.sum(axis=1), won2.sum(axis=1)
+        category_scores += scores1.sum(), scores2.sum()
+        wins += (scores1 > scores2).sum(), (scores1 < scores2).sum(), (scores1 == scores2).sum()
+
+    return category_wins, category_ties, category_scores, wins
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = _executors[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return executor
+
+
+def reset_executors():
+    """Forgets the pools inherited by a forked process, which has only their handles and
+    none of their management threads"""
+    global _executors, _executors_lock
+    _executors, _executors_lock = {}, threading.Lock()
+
+
+def simulate_matchup(
+    matchup: Matchup, n_simulations: int = SIMULATIONS_PER_MATCHUP, seed: Optional[int] = None
+) -> MatchupSimulation:
+    return simulate_matchups([matchup], n_simulations, seed, max_workers=1)[0]
+
+
+def simulate_matchups(
+    matchups: List[Matchup],
+    n_simulations: int = SIMULATIONS_PER_MATCHUP,
+    seed: Optional[int] = None,
+    max_workers: int = SIMULATION_MAX_WORKERS,
+) -> List[MatchupSimulation]:
+    """Simulates every matchup's rest of week, spread over a shared process pool if max_workers > 1"""
+    seeds = np.random.SeedSequence(seed).spawn(len(matchups))
+    args = [
+        (_get_rates(matchup.team1), _get_rates(matchup.team2), n_simulations, matchup_seed)
+        for matchup, matchup_seed in zip(matchups, seeds)
+    ]
+    if max_workers > 1 and len(matchups) > 1:
+        counts = list(_get_executor(max_workers).map(_simulate, *zip(*args)))
+    else:
+        counts = [_simulate(*matchup_args) for matchup_args in args]
+
+    return [
+        MatchupSimulation((matchup.team1.team_key, matchup.team2.team_key), n_simulations, matchup_counts)
+        for matchup, matchup_counts in zip(matchups, counts)
+    ]
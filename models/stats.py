@@ -1,41 +1,99 @@
-from dataclasses import dataclass
+import numpy as np
+
+
+# Column order of every stats vector/matrix, matches the Stats fields
+STAT_FIELDS = ('FGA', 'FGM', 'FTA', 'FTM', '_3PTM', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV')
+N_STATS = len(STAT_FIELDS)
+FGA, FGM, FTA, FTM, _3PTM, PTS, REB, AST, STL, BLK, TOV = range(N_STATS)
 
 
-@dataclass
 class Stats:
-    # Base stats
-    FGA: int = 0
-    FGM: int = 0
-    FTA: int = 0
-    FTM: int = 0
-    _3PTM: int = 0
-    PTS: int = 0
-    REB: int = 0
-    AST: int = 0
-    STL: int = 0
-    BLK: int = 0
-    TOV: int = 0
-
-    # Team matchup info
-    # TEAM_POINTS: int
-    # GAMES_REMAINING: int
-    # GAMES_IN_PROGRESS: int
-    # GAMES_COMPLETED: int
-    
+    # Slotted rather than a dataclass (dataclass(slots=True) needs Python 3.10)
+    __slots__ = STAT_FIELDS + ('_array',)
+
+    def __init__(
+        self,
+        FGA: float = 0,
+        FGM: float = 0,
+        FTA: float = 0,
+        FTM: float = 0,
+        _3PTM: float = 0,
+        PTS: float = 0,
+        REB: float = 0,
+        AST: float = 0,
+        STL: float = 0,
+        BLK: float = 0,
+        TOV: float = 0,
+    ):
+        self.FGA = FGA
+        self.FGM = FGM
+        self.FTA = FTA
+        self.FTM = FTM
+        self._3PTM = _3PTM
+        self.PTS = PTS
+        self.REB = REB
+        self.AST = AST
+        self.STL = STL
+        self.BLK = BLK
+        self.TOV = TOV
+        self._array = None
+
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # a changed field makes the vector built by to_array stale
+        if name != '_array':
+            object.__setattr__(self, '_array', None)
+
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in STAT_FIELDS)
+        return f"Stats({values})"
+
+
+    def __eq__(self, other):
+        if isinstance(other, Stats):
+            return all(getattr(self, field) == getattr(other, field) for field in STAT_FIELDS)
+        return NotImplemented
+
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in STAT_FIELDS)
+
+
+    def __setstate__(self, state):
+        for field, value in zip(STAT_FIELDS, state):
+            setattr(self, field, value)
+        self._array = None
+
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> 'Stats':
+        return cls(*array.tolist())
+
+
+    def to_array(self) -> np.ndarray:
+        """Read-only vector of the stats, built once and shared by every caller"""
+        if self._array is None:
+            array = np.array(self.__getstate__(), dtype=np.float64)
+            array.flags.writeable = False
+            self._array = array
+        return self._array
+
 
     def to_dict(self):
         return {
-            "FGA": self.FGA,
-            "FGM": self.FGM,
-            "FTA": self.FTA,
-            "FTM": self.FTM,
-            "_3PTM": self._3PTM,
-            "PTS": self.PTS,
-            "REB": self.REB,
-            "AST": self.AST,
-            "STL": self.STL,
-            "BLK": self.BLK,
-            "TOV": self.TOV,
+            "FGA": round(self.FGA, 1),
+            "FGM": round(self.FGM, 1),
+            "FTA": round(self.FTA, 1),
+            "FTM": round(self.FTM, 1),
+            "_3PTM": round(self._3PTM, 1),
+            "PTS": round(self.PTS, 1),
+            "REB": round(self.REB, 1),
+            "AST": round(self.AST, 1),
+            "STL": round(self.STL, 1),
+            "BLK": round(self.BLK, 1),
+            "TOV": round(self.TOV, 1),
             # "TEAM_POINTS": self.TEAM_POINTS,
             # "GAMES_REMAINING": self.GAMES_REMAINING,
             # "GAMES_IN_PROGRESS": self.GAMES_IN_PROGRESS,
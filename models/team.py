@@ -1,9 +1,15 @@
 from typing import List
-from models.stats import Stats
+import numpy as np
+from models.stats import N_STATS, Stats
 from models.player import Player
 
 
 class Team:
+    __slots__ = (
+        'team_key', 'team_name', 'roster', 'waiver_priority', 'roster_adds', 'current_matchup_stats',
+        'stats_matrix', 'future_matchup_stats', 'projected_matchup_stats', 'team_points',
+        'games_played', 'games_remaining', '__weakref__',
+    )
 
     def __init__(
         self, 
@@ -31,11 +37,12 @@ class Team:
         
     
     def _generate_matchup_stats(self, current_matchup_stats: Stats):
-        future_stats = Stats()
-        for player in self.roster:
-            future_stats = future_stats + (player.stats * player.games_remaining)
-        projected_stats = current_matchup_stats + future_stats
-        return future_stats, projected_stats
+        # players x stats matrix of per-game projections, folded with startable games in one product
+        self.stats_matrix = np.array([player.stats_vector for player in self.roster]).reshape(-1, N_STATS)
+        games_startable = np.array([player.games_startable for player in self.roster], dtype=np.float64)
+        future_stats = games_startable @ self.stats_matrix
+        projected_stats = current_matchup_stats.to_array() + future_stats
+        return Stats.from_array(future_stats), Stats.from_array(projected_stats)
 
 
     def to_dict(self):
@@ -0,0 +1,121 @@
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.constants import VALUATION_PAGE_SIZE, VALUATION_POOL_SIZE
+from data.player_stats import stats_store
+from data.schedule import ScheduleIndex, schedule_store
+from models.simulation import CATEGORIES, COUNTING_SIGNS, COUNTING_STATS
+from models.stats import FGA, FGM, FTA, FTM, N_STATS
+
+# Keys the valuation table can be sorted by, besides the categories
+SORT_KEYS = ('value', 'weekly_value', 'games_remaining', 'name')
+
+_cached: Optional[Tuple[int, 'PlayerValuations']] = None
+_cache_lock = threading.Lock()
+
+
+class PlayerValuations:
+    """Per-game category z-scores of every projected player, scaled by the top pool_size players"""
+
+    def __init__(self, names: List[str], teams: List[str], per_game: np.ndarray, pool_size: int = VALUATION_POOL_SIZE):
+        self.names = names
+        self.teams = teams
+        self.per_game = per_game
+
+        z_scores = self._z_scores(np.arange(len(names)))
+        pool = np.argsort(-z_scores.sum(axis=1), kind='stable')[:pool_size]
+        self.z_scores = self._z_scores(pool)
+        self.z_scores.flags.writeable = False
+
+
+    def _z_scores(self, pool: np.ndarray) -> np.ndarray:
+        per_game, pool_stats = self.per_game, self.per_game[pool]
+        values = np.empty((len(per_game), len(CATEGORIES)))
+        for i, (attempts, makes) in enumerate(((FGA, FGM), (FTA, FTM))):
+            pool_pct = pool_stats[:, makes].sum() / max(pool_stats[:, attempts].sum(), 1e-9)
+            values[:, i] = per_game[:, makes] - pool_pct * per_game[:, attempts]
+        values[:, 2:] = COUNTING_SIGNS * per_game[:, COUNTING_STATS]
+
+        pool_values = values[pool]
+        deviations = pool_values.std(axis=0)
+        return (values - pool_values.mean(axis=0)) / np.where(deviations > 0, deviations, 1)
+
+
+    def values(self, punt: Iterable[str] = ()) -> np.ndarray:
+        """Total z-score per game over the categories not punted"""
+        kept = np.array([category not in punt for category in CATEGORIES])
+        return self.z_scores[:, kept].sum(axis=1)
+
+
+    def games_remaining(self, schedule: ScheduleIndex, current_day: int) -> np.ndarray:
+        return schedule.games_matrix(self.teams, current_day).sum(axis=1)
+
+
+    def table(
+        self,
+        schedule: ScheduleIndex,
+        current_day: int,
+        punt: Iterable[str] = (),
+        sort: str = 'value',
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = VALUATION_PAGE_SIZE,
+    ) -> Tuple[int, List[Dict]]:
+        """Total row count and one sorted page of rows, with per-game and schedule-adjusted weekly value"""
+        punt = set(punt)
+        values = self.values(punt)
+        games_remaining = self.games_remaining(schedule, current_day)
+        weekly_values = values * games_remaining
+        ranks = np.empty(len(values), dtype=np.int64)
+        ranks[np.argsort(-values, kind='stable')] = np.arange(1, len(values) + 1)
+
+        if sort == 'name':
+            order = sorted(range(len(self.names)), key=self.names.__getitem__, reverse=descending)
+        else:
+            keys = {
+                'value': values,
+                'weekly_value': weekly_values,
+                'games_remaining': games_remaining,
+                **{category: self.z_scores[:, i] for i, category in enumerate(CATEGORIES)},
+            }[sort]
+            order = np.argsort(-keys if descending else keys, kind='stable')
+
+        rows = []
+        for i in order[offset:offset + limit]:
+            rows.append({
+                "rank": int(ranks[i]),
+                "name": self.names[i],
+                "team": self.teams[i],
+                "games_remaining": int(games_remaining[i]),
+                "value": round(float(values[i]), 2),
+                "weekly_value": round(float(weekly_values[i]), 2),
+                "z_scores": {category: round(float(z), 2) for category, z in zip(CATEGORIES, self.z_scores[i])},
+            })
+        return len(self.names), rows
+
+
+def get_player_valuations() -> PlayerValuations:
+    """Valuations of the current projections, recomputed only when the stats version changes"""
+    global _cached
+    version, (player_stats, player_teams, _) = stats_store.snapshot()
+    cached = _cached
+    if cached is None or cached[0] != version:
+        with _cache_lock:
+            if _cached is None or _cached[0] != version:
+                names = list(player_stats)
+                per_game = np.array([player_stats[name].to_array() for name in names]).reshape(-1, N_STATS)
+                _cached = (version, PlayerValuations(names, [player_teams[name] for name in names], per_game))
+            cached = _cached
+    return cached[1]
+
+
+def get_current_day(schedule: ScheduleIndex) -> int:
+    return (date.today() - schedule.start_date).days
+
+
+def get_valuation_table(**kwargs) -> Tuple[int, List[Dict]]:
+    schedule = schedule_store.value
+    return get_player_valuations().table(schedule, get_current_day(schedule), **kwargs)
@@ -1,3 +1,8 @@
 #!/bin/sh
-export FLASK_APP=./main.py
-pipenv run flask --debug run -h localhost -p 5001
\ No newline at end of file
+# ./start.sh runs the flask development server, ./start.sh prod runs gunicorn (gunicorn.conf.py)
+if [ "$1" = "prod" ]; then
+    pipenv run gunicorn -c gunicorn.conf.py wsgi:app
+else
+    export FLASK_APP=./main.py
+    pipenv run flask --debug run -h localhost -p 5001
+fi
@@ -0,0 +1,3 @@
+# Tests run offline like the benchmarks: upstream pages are replayed from data/fixtures and the
+# disk caches go to a scratch directory. Imported first, before config.constants reads them.
+import benchmarks  # noqa: F401
@@ -0,0 +1,181 @@
+import copy
+import json
+
+import pytest
+
+from api.app import create_app
+from api.events import LeagueEventStream, Subscriber, json_patch
+from benchmarks.fake_league import FakeGame
+from config.constants import EVENT_MAX_STREAMS
+from data.refresher import LeagueRefresher
+
+
+def apply_patch(state, patch):
+    state = copy.deepcopy(state)
+    for operation in patch:
+        path = [part.replace('~1', '/').replace('~0', '~') for part in operation['path'].split('/')[1:]]
+        if not path:
+            state = operation['value']
+            continue
+        *parents, key = path
+        target = state
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if isinstance(target, list):
+            key = int(key)
+        if operation['op'] == 'remove':
+            del target[key]
+        else:
+            target[key] = operation['value']
+    return state
+
+
+def parse_frame(frame: bytes):
+    fields = dict(line.split(': ', 1) for line in frame.decode('utf-8').strip().split('\n'))
+    return fields['id'], fields['event'], json.loads(fields['data'])
+
+
+def get_state(points, week=10):
+    return {
+        'current_week': week,
+        'matchups': [['t.1', 't.2']],
+        'teams': {key: {'team_points': value, 'stats': {'PTS': value * 10}} for key, value in points.items()},
+    }
+
+
+@pytest.mark.parametrize('old, new', [
+    ({'a': 1, 'b': [1, 2]}, {'a': 2, 'b': [1, 3]}),
+    ({'a': 1, 'b/c': 2, 'd~': 3}, {'b/c': 4, 'd~': 3, 'e': 5}),
+    ({'a': [1, 2]}, {'a': [1, 2, 3]}),
+    ({'a': {'b': 1}}, {'a': None}),
+    ([1, 2], {'a': 1}),
+])
+def test_patch_turns_old_into_new(old, new):
+    assert apply_patch(old, json_patch(old, new)) == new
+
+
+def test_unchanged_values_give_no_patch():
+    state = get_state({'t.1': 1, 't.2': 2})
+    assert json_patch(state, copy.deepcopy(state)) == []
+
+
+def test_patches_follow_the_published_states():
+    stream = LeagueEventStream()
+    states = [
+        get_state({'t.1': 1, 't.2': 2}),
+        get_state({'t.1': 3, 't.2': 2}),
+        get_state({'t.1': 3, 't.3': 0}, week=11),
+    ]
+    stream.publish(1, states[0])
+    subscriber = stream.subscribe()
+    _, frames = subscriber.get(0)
+    _, event, state = parse_frame(frames[0])
+    assert event == 'snapshot' and state == states[0]
+
+    for version, new in enumerate(states[1:], start=2):
+        stream.publish(version, new)
+        _, frames = subscriber.get(0)
+        event_id, event, patch = parse_frame(frames[0])
+        assert (event, event_id) == ('patch', f'{stream.epoch}:{version}')
+        state = apply_patch(state, patch)
+        assert state == new
+
+
+def test_older_versions_are_ignored():
+    stream = LeagueEventStream()
+    stream.publish(2, get_state({'t.1': 1}))
+    stream.publish(1, get_state({'t.1': 5}))
+    assert stream.version == 2
+    assert parse_frame(stream.subscribe().get(0)[1][0])[2] == get_state({'t.1': 1})
+
+
+def test_unchanged_state_sends_nothing_but_advances_the_version():
+    stream = LeagueEventStream()
+    stream.publish(1, get_state({'t.1': 1}))
+    subscriber = stream.subscribe()
+    subscriber.get(0)
+    stream.publish(2, get_state({'t.1': 1}))
+    assert subscriber.get(0) == (False, [])
+    assert stream.version == 2
+
+
+def test_resume_from_since():
+    stream = LeagueEventStream(history_size=3)
+    states = [get_state({'t.1': points}) for points in range(6)]
+    for version, state in enumerate(states, start=1):
+        stream.publish(version, state)
+
+    # the last 3 patches apply to versions 3 to 5
+    resumed = stream.subscribe(f'{stream.epoch}:4').get(0)[1]
+    assert [parse_frame(frame)[1] for frame in resumed] == ['patch', 'patch']
+    state = states[3]
+    for frame in resumed:
+        state = apply_patch(state, parse_frame(frame)[2])
+    assert state == states[-1]
+
+    assert stream.subscribe(f'{stream.epoch}:6').get(0) == (False, [])
+
+
+@pytest.mark.parametrize('since', [None, 'not-an-id', 'other:4', '{epoch}:1', '{epoch}:7'])
+def test_unknown_or_expired_cursors_get_a_snapshot(since):
+    stream = LeagueEventStream(history_size=3)
+    states = [get_state({'t.1': points}) for points in range(6)]
+    for version, state in enumerate(states, start=1):
+        stream.publish(version, state)
+    frames = stream.subscribe(since and since.format(epoch=stream.epoch)).get(0)[1]
+    assert len(frames) == 1
+    event_id, event, state = parse_frame(frames[0])
+    assert (event_id, event, state) == (f'{stream.epoch}:6', 'snapshot', states[-1])
+
+
+def test_slow_subscriber_goes_stale_and_resyncs_to_a_snapshot():
+    stream = LeagueEventStream()
+    stream.publish(1, get_state({'t.1': 0}))
+    subscriber = Subscriber(max_size=2)
+    stream._subscribers.append(subscriber)
+    for version in range(2, 6):
+        stream.publish(version, get_state({'t.1': version}))
+    stale, frames = subscriber.get(0)
+    assert stale and frames == []
+    # dropped frames are never delivered, nor further ones until the snapshot
+    stream.publish(6, get_state({'t.1': 6}))
+    assert subscriber.get(0) == (True, [])
+
+    stream.resync(subscriber)
+    stale, frames = subscriber.get(0)
+    assert not stale
+    assert [parse_frame(frame)[1:] for frame in frames] == [('snapshot', get_state({'t.1': 6}))]
+
+
+def test_stream_resyncs_a_stale_subscriber():
+    stream = LeagueEventStream()
+    stream.publish(1, get_state({'t.1': 0}))
+    frames = stream.stream(heartbeat=0)
+    assert parse_frame(next(frames))[1] == 'snapshot'
+    subscriber = stream._subscribers[0]
+    for version in range(2, 3 + subscriber.max_size):
+        stream.publish(version, get_state({'t.1': version}))
+    _, event, state = parse_frame(next(frames))
+    assert event == 'snapshot' and state == get_state({'t.1': 2 + subscriber.max_size})
+    frames.close()
+    assert stream.n_subscribers == 0
+
+
+def test_streams_past_the_cap_are_turned_away():
+    refresher = LeagueRefresher(FakeGame(n_teams=4), api_cache_directory=None, history_directory=None)
+    refresher.refresh()
+    client = create_app(refresher).test_client()
+    responses = [client.get('/api/0/events', buffered=False) for _ in range(EVENT_MAX_STREAMS)]
+    assert all(response.status_code == 200 for response in responses)
+    refused = client.get('/api/0/events', buffered=False)
+    assert refused.status_code == 503 and 'Retry-After' in refused.headers
+    assert json.loads(client.get('/api/status').data)['event_streams'] == EVENT_MAX_STREAMS
+
+    # a client going away frees its slot
+    responses.pop().close()
+    responses.append(client.get('/api/0/events', buffered=False))
+    assert responses[-1].status_code == 200
+    # last in first out, as each holds a request context on this thread
+    for response in reversed(responses):
+        response.close()
+    assert json.loads(client.get('/api/status').data)['event_streams'] == 0
@@ -0,0 +1,117 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from api.app import create_app
+from benchmarks.fake_league import FakeGame
+from data.history import HistoryRecorder, HistoryStore
+from data.refresher import LeagueRefresher
+from models.stats import N_STATS
+
+
+LEAGUE_ID = '454.l.1'
+
+
+def append(store: HistoryStore, week: int, timestamp: float, points: float = 0.0):
+    teams = {
+        'team': np.array([1, 2]),
+        'team_points': np.array([points, points + 1]),
+        'current_matchup_stats': np.full((2, N_STATS), timestamp),
+        'projected_matchup_stats': np.zeros((2, N_STATS)),
+    }
+    players = {
+        'player': np.array([10, 20, 30]),
+        'team': np.array([1, 1, 2]),
+        'stats': np.full((3, N_STATS), timestamp),
+        'games_remaining': np.array([3, 2, 1]),
+        'games_startable': np.array([3, 1, 1]),
+    }
+    store.append(LEAGUE_ID, week, timestamp, teams, players)
+
+
+def test_reads_the_rows_in_range(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for timestamp in range(10):
+        append(store, 1, timestamp, points=timestamp)
+    history = store.team_history(LEAGUE_ID, f'{LEAGUE_ID}.t.2', 3, 6)
+    assert history['timestamps'] == [3, 4, 5, 6]
+    assert history['team_points'] == [4, 5, 6, 7]
+
+    history = store.player_history(LEAGUE_ID, 30, 8, 100)
+    assert history['timestamps'] == [8, 9]
+    assert history['team_keys'] == [f'{LEAGUE_ID}.t.2'] * 2
+    assert store.team_history(LEAGUE_ID, f'{LEAGUE_ID}.t.1', 20, 30)['timestamps'] == []
+
+
+def test_reads_across_sealed_and_open_weeks(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for timestamp in range(6):
+        append(store, 1 + timestamp // 2, timestamp)
+    # the next week seals the previous ones
+    assert sorted(path.name for path in (tmp_path / LEAGUE_ID).iterdir() if path.name.startswith('week_')) == [
+        'week_1.npz', 'week_2.npz', 'week_3',
+    ]
+    assert store.player_history(LEAGUE_ID, 10, 1, 4)['timestamps'] == [1, 2, 3, 4]
+    # and another process reading the same directory sees the same
+    assert HistoryStore(str(tmp_path)).player_history(LEAGUE_ID, 10, 0, 5)['timestamps'] == list(range(6))
+
+    store.seal(LEAGUE_ID, 3)
+    assert store.player_history(LEAGUE_ID, 10, 0, 5)['timestamps'] == list(range(6))
+    with pytest.raises(ValueError):
+        append(store, 3, 6)
+
+
+def test_timestamps_never_go_back(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    append(store, 1, 5)
+    append(store, 1, 4)
+    assert store.team_history(LEAGUE_ID, f'{LEAGUE_ID}.t.1', 0, 10)['timestamps'] == [5, 5]
+
+
+def test_recording_failures_are_logged_not_raised(tmp_path, caplog):
+    refresher = LeagueRefresher(FakeGame(n_teams=4), api_cache_directory=None, history_directory=None)
+    refresher.refresh()
+    # a file where the store's directory should be
+    (tmp_path / 'history').write_text('')
+    HistoryRecorder(HistoryStore(str(tmp_path / 'history'))).record(LEAGUE_ID, refresher.leagues[0])
+    assert 'Recording history of league' in caplog.text
+
+
+def test_reads_during_a_seal_see_every_row(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for timestamp in range(20):
+        append(store, 1, timestamp)
+    counts, done = [], threading.Event()
+
+    def read():
+        reader = HistoryStore(str(tmp_path))
+        while not done.is_set():
+            counts.append(len(reader.player_history(LEAGUE_ID, 20, 0, 100)['timestamps']))
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    for week in range(2, 12):
+        append(store, week, 20 + week)
+    done.set()
+    thread.join()
+    assert counts and all(count >= 20 for count in counts)
+    assert counts == sorted(counts)
+
+
+@pytest.mark.parametrize('team_key, status', [
+    ('no-dots', 400),
+    ('454.l.1.t.x', 400),
+    ('other.l.9.t.1', 404),
+    ('{league_id}.t.1', 200),
+])
+def test_team_history_endpoint_checks_the_team_key(tmp_path, team_key, status):
+    refresher = LeagueRefresher(FakeGame(n_teams=4), api_cache_directory=None, history_directory=str(tmp_path))
+    refresher.refresh()
+    client = create_app(refresher).test_client()
+    team_key = team_key.format(league_id=refresher.league_ids[0])
+    response = client.get(f'/api/0/history/team_key/{team_key}')
+    assert response.status_code == status
+    if status == 200:
+        assert json.loads(response.data)['team_key'] == team_key
@@ -0,0 +1,81 @@
+import itertools
+import random
+
+from datetime import date
+
+import numpy as np
+
+from data.schedule import ScheduleIndex
+from models.lineup import assign_slots, get_roster_games, solve_daily_starts
+from models.player import Player
+
+
+SLOTS = ('PG', 'SG', 'G', 'SF', 'PF', 'F', 'C', 'C', 'Util', 'Util')
+POSITIONS = ('PG', 'SG', 'G', 'SF', 'PF', 'F', 'C')
+
+
+def best_starts(slots, eligibilities):
+    """Exhaustively, the startable set that benches no player for a lower priority one"""
+    best = tuple(False for _ in eligibilities)
+    for started in itertools.product((True, False), repeat=len(eligibilities)):
+        players = [player for player, start in enumerate(started) if start]
+        if len(players) > len(slots) or started <= best:
+            continue
+        if any(
+            all(slot in eligibilities[player] for player, slot in zip(players, assigned))
+            for assigned in itertools.permutations(slots, len(players))
+        ):
+            best = started
+    return best
+
+
+def test_higher_priority_player_starts():
+    assert assign_slots(('C',), (frozenset({'C', 'Util'}), frozenset({'C', 'Util'}))) == (True, False)
+
+
+def test_earlier_player_moves_to_make_room():
+    # the guard takes PG first, then moves to G so the point guard can start too
+    eligibilities = (frozenset({'PG', 'G', 'Util'}), frozenset({'PG', 'Util'}))
+    assert assign_slots(('PG', 'G'), eligibilities) == (True, True)
+
+
+def test_matches_exhaustive_search():
+    rng = random.Random(0)
+    slots = ('PG', 'G', 'F', 'C', 'Util')
+    for _ in range(200):
+        eligibilities = tuple(
+            frozenset(rng.sample(POSITIONS, rng.randint(1, 2)) + ['Util'] * rng.randint(0, 1))
+            for _ in range(rng.randint(1, 7))
+        )
+        assert assign_slots(slots, eligibilities) == best_starts(slots, eligibilities), eligibilities
+
+
+def test_daily_starts_fill_slots_by_value():
+    eligibilities = [frozenset({'C', 'Util'})] * 3
+    values = np.array([1.0, 3.0, 2.0])
+    games = np.array([[1, 1], [1, 0], [1, 1]])
+    starts = solve_daily_starts(eligibilities, values, games, ('C', 'Util'))
+    # day 0: the two most valuable of three; day 1: both players with a game
+    assert starts.tolist() == [[False, True], [True, False], [True, True]]
+
+
+def test_daily_starts_never_exceed_slots():
+    rng = np.random.default_rng(0)
+    eligibilities = [frozenset(rng.choice(POSITIONS, 2).tolist() + ['Util']) for _ in range(15)]
+    games = rng.integers(0, 2, (15, 7))
+    starts = solve_daily_starts(eligibilities, rng.random(15), games, SLOTS)
+    assert (starts.sum(axis=0) <= len(SLOTS)).all()
+    assert not (starts & (games == 0)).any()
+
+
+def test_roster_games_only_drop_injured_players():
+    schedule = ScheduleIndex({'LAL': [1, 0, 1, 0, 0, 0, 0], 'BOS': [0, 0, 0, 1, 0, 1, 0]}, date(2024, 1, 1))
+    players = [
+        # no games left from day 3, but available: only the days from current_day on count
+        Player('1', 'A', 'LAL', None, '', ['PG'], 'PG', 2, 0),
+        Player('2', 'B', 'BOS', None, 'INJ', ['C'], 'C', 2, 2),
+        Player('3', 'C', 'BOS', None, '', ['C'], 'IL', 2, 2),
+        Player('4', 'D', 'BOS', None, '', ['C'], 'BN', 2, 2),
+    ]
+    assert get_roster_games(players, schedule, 3).tolist() == [[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [1, 0, 1, 0]]
+    assert get_roster_games(players, schedule, 0)[0].tolist() == [1, 0, 1, 0, 0, 0, 0]
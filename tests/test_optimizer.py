@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from api.app import create_app
+from benchmarks.fake_league import FakeGame, FakeLeague
+from config.constants import INJURED_LIST_POSITIONS, OPTIMIZER_MAX_K
+from data.refresher import LeagueRefresher
+from models.league import League
+from models.lineup import get_active_slots
+from models.optimizer import optimize_moves
+
+
+@pytest.fixture(scope='module')
+def league():
+    return League(FakeLeague(n_teams=4, n_free_agents=40, current_day=0))
+
+
+def test_moves_improve_on_the_baseline_best_first(league):
+    team = league.teams[0]
+    baseline, moves = optimize_moves(league, team, k=5)
+    assert baseline.add is None and baseline.drop is None and baseline.gain == 0
+    assert 0 < len(moves) <= 5
+    assert all(move.gain > 0 for move in moves)
+    assert [move.gain for move in moves] == sorted((move.gain for move in moves), reverse=True)
+
+    free_agents = {player.player_id for player in league.get_free_agents()}
+    roster = {player.player_id for player in team.roster if player.selected_position not in INJURED_LIST_POSITIONS}
+    assert all(move.add.player_id in free_agents and move.drop.player_id in roster for move in moves)
+    assert len({(move.add.player_id, move.drop.player_id) for move in moves}) == len(moves)
+
+
+def test_lineups_never_start_more_players_than_slots(league):
+    n_slots = len(get_active_slots(league.positions))
+    baseline, moves = optimize_moves(league, league.teams[1], k=3)
+    for move in [baseline, *moves]:
+        assert all(len(day) <= n_slots for day in move.daily_starts)
+        assert sum(move.startable_games.values()) == sum(len(day) for day in move.daily_starts)
+
+
+def test_no_moves_without_adds_remaining(league):
+    team = league.teams[2]
+    max_weekly_adds = league.max_weekly_adds
+    league.max_weekly_adds = team.roster_adds
+    try:
+        assert optimize_moves(league, team)[1] == []
+    finally:
+        league.max_weekly_adds = max_weekly_adds
+
+
+@pytest.mark.parametrize('k, status', [('0', 400), (str(OPTIMIZER_MAX_K + 1), 400), ('-1', 400), ('x', 400), ('2', 200)])
+def test_moves_endpoint_checks_k(k, status):
+    refresher = LeagueRefresher(FakeGame(n_teams=4, n_free_agents=20), api_cache_directory=None, history_directory=None)
+    refresher.refresh()
+    refresher.load_free_agents(refresher.leagues[0]).result()
+    client = create_app(refresher).test_client()
+    response = client.get(f'/api/0/team_key/{refresher.leagues[0].teams[0].team_key}/moves?k={k}')
+    assert response.status_code == status
+    if status == 200:
+        assert len(json.loads(response.data)['moves']) <= 2
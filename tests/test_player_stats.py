@@ -0,0 +1,59 @@
+import pytest
+
+from data.player_stats import PlayerIdentityIndex
+
+
+PROJECTIONS = {
+    'Jalen Williams': 'OKC',
+    'Jaylin Williams': 'OKC',
+    'Gary Trent Jr': 'MIL',
+    'Robert Williams III': 'POR',
+    'Jaren Jackson Jr': 'MEM',
+}
+
+
+def get_index(projections=PROJECTIONS) -> PlayerIdentityIndex:
+    return PlayerIdentityIndex(projections.keys(), projections.values())
+
+
+@pytest.mark.parametrize('name, team, expected', [
+    # two players on one team a letter apart keep their own projections
+    ('Jalen Williams', 'OKC', 'Jalen Williams'),
+    ('Jaylin Williams', 'OKC', 'Jaylin Williams'),
+    ('Jaren Jackson Jr.', 'MEM', 'Jaren Jackson Jr'),
+    ('Gary Trent Jr.', 'MIL', 'Gary Trent Jr'),
+])
+def test_exact_names_match(name, team, expected):
+    index = get_index()
+    assert index.resolve('1', name, team) == expected
+    assert index.fuzzy_matched == {} and index.unmatched == {}
+
+
+@pytest.mark.parametrize('name, team, expected', [
+    ('Gary Trent', 'MIL', 'Gary Trent Jr'),
+    ('Robert Williams', 'POR', 'Robert Williams III'),
+    ('Robert Williams III', 'POR', 'Robert Williams III'),
+    ('Jaren Jackson', 'MEM', 'Jaren Jackson Jr'),
+])
+def test_suffixes_are_ignored_when_matching(name, team, expected):
+    assert get_index().resolve('1', name, team) == expected
+
+
+def test_a_missing_namesake_is_not_matched_to_the_other():
+    index = get_index({'Jalen Williams': 'OKC'})
+    assert index.resolve('1', 'Jaylin Williams', 'OKC') is None
+    assert index.unmatched == {'1': 'Jaylin Williams'}
+
+
+def test_fuzzy_matches_stay_on_the_players_team():
+    index = get_index()
+    assert index.resolve('1', 'Gary Trent', 'POR') is None
+    assert index.resolve('2', 'Gary Trent', 'MIL') == 'Gary Trent Jr'
+    assert index.fuzzy_matched == {'2': ('Gary Trent', 'Gary Trent Jr')}
+
+
+def test_names_are_resolved_once_per_player_id():
+    index = get_index()
+    assert index.resolve('1', 'Jalen Williams', 'OKC') == 'Jalen Williams'
+    # e.g. Yahoo renaming the player later on
+    assert index.resolve('1', 'Jaylin Williams', 'OKC') == 'Jalen Williams'
@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+import data.projections
+from config.constants import PLAYER_STATS_FILENAME
+from data.player_stats import iter_stats_records
+from data.projections import UpdatePanelReader, is_update_panel_response, iter_projection_records
+
+
+RESPONSE_FILENAME = 'response.html'
+
+# Saved a few projection updates apart from player_stats.txt, so their stats differ
+UPDATED_PLAYERS = {'Tyrese Haliburton', 'Goga Bitadze', 'Andre Drummond', 'Wendell Carter Jr'}
+
+
+def read_response_records():
+    with open(RESPONSE_FILENAME, mode='r', encoding='utf-8', newline='') as file:
+        return list(iter_projection_records(file))
+
+
+def test_response_matches_player_stats_file():
+    records = {name: (team, stats) for name, team, stats in read_response_records()}
+    with open(PLAYER_STATS_FILENAME, mode='r') as file:
+        expected = {name: (team, stats) for name, team, stats in iter_stats_records(file)}
+
+    assert is_update_panel_response(RESPONSE_FILENAME)
+    assert not is_update_panel_response(PLAYER_STATS_FILENAME)
+    # the response lists a few more players than were copied by hand
+    assert set(expected) <= set(records)
+    for name, (team, stats) in expected.items():
+        assert records[name][0] == team, name
+        if name not in UPDATED_PLAYERS:
+            assert records[name][1] == stats, name
+
+
+def test_records_do_not_depend_on_chunk_boundaries(monkeypatch):
+    expected = read_response_records()
+    # splits segment headers, cells and the table marker across reads
+    monkeypatch.setattr(data.projections, 'CHUNK_SIZE', 997)
+    assert read_response_records() == expected
+
+
+def test_update_panel_reader_segments():
+    # lengths count every character of the content, including '|' and '\r\n'
+    response = '1|#||4|8|updatePanel|Panel1|a|b\r\nc|d|0|hiddenField|__VIEWSTATE||'
+    segments = [
+        (segment_type, segment_id, ''.join(content))
+        for segment_type, segment_id, content in UpdatePanelReader(io.StringIO(response, newline=''))
+    ]
+    assert segments == [('#', '', '4'), ('updatePanel', 'Panel1', 'a|b\r\nc|d'), ('hiddenField', '__VIEWSTATE', '')]
+
+
+def test_update_panel_reader_skips_unread_content():
+    response = '3|updatePanel|Panel1|abc|2|updatePanel|Panel2|de|'
+    segment_ids = [segment_id for _, segment_id, _ in UpdatePanelReader(io.StringIO(response, newline=''))]
+    assert segment_ids == ['Panel1', 'Panel2']
+
+
+@pytest.mark.parametrize('response', ['5|updatePanel|Panel1|abc', '3|updatePanel|Panel1|abcX'])
+def test_update_panel_reader_rejects_malformed_responses(response):
+    with pytest.raises(ValueError):
+        list(UpdatePanelReader(io.StringIO(response, newline='')))
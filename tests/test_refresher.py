@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+import threading
+import time
+
+from benchmarks.fake_league import FakeGame
+from data.refresher import LeagueRefresher, get_next_data_refresh_time
+
+
+def create_refresher(**kwargs) -> LeagueRefresher:
+    return LeagueRefresher(FakeGame(n_teams=4), api_cache_directory=None, history_directory=None, **kwargs)
+
+
+def test_data_refreshes_at_3am_eastern():
+    # 02:59 and 03:00 EST, i.e. UTC-5 in January
+    before = datetime(2024, 1, 10, 7, 59, tzinfo=timezone.utc)
+    at = datetime(2024, 1, 10, 8, 0, tzinfo=timezone.utc)
+    assert get_next_data_refresh_time(before) == at
+    assert get_next_data_refresh_time(at) == datetime(2024, 1, 11, 8, 0, tzinfo=timezone.utc)
+    # EDT, UTC-4 in July
+    assert get_next_data_refresh_time(datetime(2024, 7, 10, 12, 0, tzinfo=timezone.utc)) == datetime(
+        2024, 7, 11, 7, 0, tzinfo=timezone.utc
+    )
+
+
+def test_week_rollover_reloads_the_data(monkeypatch):
+    refresher = create_refresher()
+    reloads = []
+    monkeypatch.setattr(refresher, '_reload_data', lambda: reloads.append(refresher.leagues[0].current_week))
+    refresher.refresh()
+    refresher.refresh()
+    assert reloads == []
+
+    backend = refresher._game.leagues[0]
+    monkeypatch.setattr(backend, 'current_week', lambda: 11)
+    refresher._get_api_league(refresher.league_ids[0]).invalidate()
+    version = refresher.leagues[0].version
+    refresher.refresh()
+    # once, and the league is built again against the reloaded data
+    assert reloads == [11]
+    assert refresher.leagues[0].version == version + 2
+    refresher.refresh()
+    assert reloads == [11]
+
+
+def test_followers_report_requested_leagues_as_warming(tmp_path):
+    publisher = create_refresher(snapshot_directory=str(tmp_path))
+    publisher.snapshots.leagues.request('stale')
+    follower = create_refresher(snapshot_directory=str(tmp_path))
+    # requests left by a previous run are dropped on startup
+    assert publisher.snapshots.leagues.pop_requests() == []
+
+    follower.discover()
+    assert follower.to_dict()['leagues'][0]['status'] == 'cold'
+    assert follower.get_league(0) is None
+    assert follower.to_dict()['leagues'][0]['status'] == 'warming'
+    assert publisher.snapshots.leagues.pop_requests() == [follower.league_ids[0]]
+
+
+def test_unchanged_teams_are_reused():
+    refresher = create_refresher()
+    refresher.refresh()
+    status = refresher.to_dict()['leagues'][0]
+    assert (status['n_teams_rebuilt'], status['n_teams_reused']) == (4, 0)
+
+    teams = refresher.leagues[0].teams
+    refresher._get_api_league(refresher.league_ids[0]).invalidate()
+    refresher.refresh()
+    status = refresher.to_dict()['leagues'][0]
+    assert (status['n_teams_rebuilt'], status['n_teams_reused']) == (0, 4)
+    assert all(new is old for new, old in zip(refresher.leagues[0].teams, teams))
+
+
+def test_start_discovers_the_leagues_in_the_background(monkeypatch):
+    refresher = create_refresher(league_interval=60)
+    released = threading.Event()
+    league_ids = refresher._game.league_ids
+    monkeypatch.setattr(refresher._game, 'league_ids', lambda year: released.wait(5) and league_ids(year))
+    refresher.start()
+    try:
+        # e.g. while Yahoo is slow to answer
+        assert refresher.get_entry(0) == (None, None)
+        released.set()
+        deadline = time.time() + 5
+        while refresher.get_league(0) is None and time.time() < deadline:
+            time.sleep(0.01)
+        league_id, league = refresher.get_entry(0)
+        assert league_id == refresher._game.league_ids(year=0)[0] and league is not None
+    finally:
+        refresher.stop()
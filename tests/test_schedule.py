@@ -0,0 +1,33 @@
+from datetime import date
+
+from data.schedule import ScheduleIndex
+
+
+MONDAY = date(2024, 11, 4)
+
+
+def get_index() -> ScheduleIndex:
+    return ScheduleIndex({'BOS': [1, 0, 1, 1, 0, 0, 1], 'LAL': [0, 1, 0, 1, 0, 1, 0]}, MONDAY)
+
+
+def test_games_between_days():
+    index = get_index()
+    assert index.games_between('BOS', 0) == 4
+    assert index.games_between('BOS', 2, 4) == 2
+    assert index.games_between('LAL', 3) == 2
+    # no such team, or days past the grid
+    assert index.games_between('XYZ', 0) == 0
+    assert index.games_between('BOS', 7, 10) == 0
+
+
+def test_games_in_window_counts_both_ends():
+    index = get_index()
+    assert index.games_in_window('BOS', MONDAY, date(2024, 11, 10)) == 4
+    assert index.games_in_window('LAL', date(2024, 11, 5), date(2024, 11, 7)) == 2
+    assert index.games_in_window('BOS', date(2024, 11, 6), date(2024, 11, 6)) == 1
+
+
+def test_games_in_window_has_no_count_outside_the_grid():
+    index = get_index()
+    assert index.games_in_window('BOS', date(2024, 11, 3), date(2024, 11, 5)) is None
+    assert index.games_in_window('BOS', date(2024, 11, 9), date(2024, 11, 11)) is None
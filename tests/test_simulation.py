@@ -0,0 +1,12 @@
+from models.simulation import _get_executor, reset_executors
+
+
+def test_each_pool_size_gets_its_own_pool():
+    two, three = _get_executor(2), _get_executor(3)
+    try:
+        assert two is _get_executor(2)
+        assert (two._max_workers, three._max_workers) == (2, 3)
+    finally:
+        two.shutdown()
+        three.shutdown()
+        reset_executors()
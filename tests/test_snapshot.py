@@ -0,0 +1,125 @@
+import mmap
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from api.responses import SerializedResponse
+from data.snapshot import HEADER, SnapshotFile
+
+
+def get_mapping(array: np.ndarray):
+    """What an array's memory ultimately belongs to"""
+    base = array
+    while not isinstance(base, memoryview) and getattr(base, 'base', None) is not None:
+        base = base.base
+    return base.obj if isinstance(base, memoryview) else base
+
+
+def test_read_returns_latest_version(tmp_path):
+    snapshots = SnapshotFile(str(tmp_path))
+    assert snapshots.read() == (0, None)
+    assert snapshots.publish({'n': 1}) == 1
+    assert snapshots.publish({'n': 2}) == 2
+    # e.g. another process, mapping the same directory
+    assert SnapshotFile(str(tmp_path)).read() == (2, {'n': 2})
+
+
+def test_arrays_are_views_of_the_mapping(tmp_path):
+    snapshots = SnapshotFile(str(tmp_path))
+    snapshots.publish({'stats': np.arange(12.0).reshape(3, 4)})
+    _, value = snapshots.read()
+    assert value['stats'].tolist() == np.arange(12.0).reshape(3, 4).tolist()
+    assert not value['stats'].flags.writeable
+    assert isinstance(get_mapping(value['stats']), mmap.mmap)
+
+
+def test_serialized_responses_are_views_of_the_mapping(tmp_path):
+    serialized = SerializedResponse({'teams': list(range(100))})
+    snapshots = SnapshotFile(str(tmp_path))
+    snapshots.publish(serialized)
+    _, value = snapshots.read()
+    assert isinstance(value.body, memoryview) and bytes(value.body) == serialized.body
+    assert value.etag == serialized.etag
+    # compressed by the publisher, not by each reader
+    assert bytes(value.encoded('gzip')) == serialized.encoded('gzip')
+    # and still pickled in band for anything else
+    assert pickle.loads(pickle.dumps(serialized)).body == serialized.body
+
+
+def test_old_payloads_are_removed_but_stay_readable_while_mapped(tmp_path):
+    snapshots = SnapshotFile(str(tmp_path), keep=2)
+    snapshots.publish({'stats': np.ones(4)})
+    _, old = snapshots.read()
+    for _ in range(3):
+        snapshots.publish({'stats': np.zeros(4)})
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith('snapshot.')) == ['snapshot.3', 'snapshot.4']
+    assert old['stats'].tolist() == [1.0] * 4
+
+
+def test_version_waits_out_a_write_in_progress(tmp_path):
+    snapshots = SnapshotFile(str(tmp_path))
+    snapshots.publish({'n': 1})
+    # a writer between making the counter odd and even again
+    HEADER.pack_into(snapshots._header, 0, 3, 99)
+
+    def finish_write():
+        time.sleep(0.05)
+        HEADER.pack_into(snapshots._header, 0, 4, 2)
+
+    writer = threading.Thread(target=finish_write)
+    start = time.perf_counter()
+    writer.start()
+    assert SnapshotFile(str(tmp_path)).version == 2
+    assert time.perf_counter() - start >= 0.05
+    writer.join()
+
+
+def test_a_killed_writer_does_not_hang_readers(tmp_path):
+    snapshots = SnapshotFile(str(tmp_path))
+    snapshots.publish({'n': 1})
+    # killed between making the counter odd and even again, so nobody holds the lock
+    HEADER.pack_into(snapshots._header, 0, 3, 2)
+    start = time.perf_counter()
+    assert SnapshotFile(str(tmp_path)).version == 2
+    assert time.perf_counter() - start < 5
+
+    # and the new publisher repairs the counter
+    assert SnapshotFile(str(tmp_path)).try_acquire_publisher()
+    assert HEADER.unpack_from(snapshots._header) == (4, 2)
+
+
+def test_concurrent_readers_never_see_a_torn_version(tmp_path):
+    snapshots = SnapshotFile(str(tmp_path))
+    reader = SnapshotFile(str(tmp_path))
+    versions, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            versions.append(reader.version)
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    for n in range(1, 51):
+        snapshots.publish({'n': n})
+    done.set()
+    thread.join()
+    assert set(versions) <= set(range(51))
+    assert versions == sorted(versions)
+
+
+def test_one_publisher_at_a_time(tmp_path):
+    first, second = SnapshotFile(str(tmp_path)), SnapshotFile(str(tmp_path))
+    assert first.try_acquire_publisher()
+    assert first.try_acquire_publisher()
+    assert not second.try_acquire_publisher()
+
+
+def test_requests_are_popped_once(tmp_path):
+    publisher, follower = SnapshotFile(str(tmp_path)), SnapshotFile(str(tmp_path))
+    follower.request('454.l.1')
+    follower.request('454.l.1')
+    assert publisher.pop_requests() == ['454.l.1']
+    assert publisher.pop_requests() == []
@@ -0,0 +1,20 @@
+import pickle
+
+from models.stats import PTS, Stats
+
+
+def test_to_array_is_shared_until_a_field_changes():
+    stats = Stats(PTS=10, REB=5)
+    array = stats.to_array()
+    assert stats.to_array() is array and not array.flags.writeable
+    stats.PTS = 12
+    assert stats.to_array()[PTS] == 12
+    assert array[PTS] == 10
+
+
+def test_pickling_keeps_the_fields():
+    stats = Stats(*range(11))
+    stats.to_array()
+    restored = pickle.loads(pickle.dumps(stats))
+    assert restored == stats
+    assert restored.to_array().tolist() == list(range(11))
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from utils.utils import atomic_write
+
+
+def test_atomic_write_replaces_the_file_once_written(tmp_path):
+    filename = str(tmp_path / 'data.json')
+    with atomic_write(filename, mode='w') as file:
+        file.write('new')
+        assert not os.path.exists(filename)
+    assert open(filename).read() == 'new'
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_failed_atomic_write_leaves_the_file_and_no_temporary_file(tmp_path):
+    filename = str(tmp_path / 'data.json')
+    with open(filename, 'w') as file:
+        file.write('old')
+    with pytest.raises(ValueError):
+        with atomic_write(filename, mode='w') as file:
+            file.write('partial')
+            raise ValueError
+    assert open(filename).read() == 'old'
+    assert os.listdir(tmp_path) == ['data.json']
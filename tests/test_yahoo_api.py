@@ -0,0 +1,102 @@
+import threading
+import time
+
+from benchmarks.fake_league import FakeLeague
+from config.constants import YAHOO_API_TTLS
+from data.yahoo_api import CachedLeague
+from models.league import League
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingBackend:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.n_calls = 0
+        self.week = 10
+
+    def current_week(self):
+        self.n_calls += 1
+        time.sleep(self.latency)
+        return self.week
+
+
+def test_entries_expire_after_their_ttl():
+    backend, clock = CountingBackend(), Clock()
+    league = CachedLeague(backend, ttls={'current_week': 60}, clock=clock)
+    assert league.current_week() == 10
+    backend.week = 11
+    clock.now += 59
+    assert league.current_week() == 10
+    clock.now += 1
+    assert league.current_week() == 11
+    assert backend.n_calls == 2
+    assert (league.hits['current_week'], league.misses['current_week']) == (1, 2)
+
+
+def test_endpoints_without_a_ttl_are_not_cached():
+    backend = CountingBackend()
+    league = CachedLeague(backend, ttls={}, clock=Clock())
+    league.current_week()
+    league.current_week()
+    assert backend.n_calls == 2
+
+
+def test_invalidate_drops_entries():
+    backend = CountingBackend()
+    league = CachedLeague(backend, ttls={'current_week': 60}, clock=Clock())
+    league.current_week()
+    league.invalidate('current_week')
+    league.current_week()
+    assert backend.n_calls == 2
+
+
+def test_week_rolls_over_with_the_scoreboard():
+    assert YAHOO_API_TTLS['current_week'] <= YAHOO_API_TTLS['matchups']
+
+
+def test_saved_entries_survive_a_restart_until_they_expire(tmp_path):
+    backend, clock = CountingBackend(), Clock()
+    cache_filename = str(tmp_path / 'league.pickle')
+    league = CachedLeague(backend, ttls={'current_week': 60}, cache_filename=cache_filename, clock=clock)
+    league.current_week()
+    league.save()
+    restarted = CachedLeague(backend, ttls={'current_week': 60}, cache_filename=cache_filename, clock=clock)
+    restarted.current_week()
+    assert backend.n_calls == 1
+    clock.now += 60
+    CachedLeague(backend, ttls={'current_week': 60}, cache_filename=cache_filename, clock=clock).current_week()
+    assert backend.n_calls == 2
+
+
+def test_concurrent_misses_share_one_call():
+    backend = CountingBackend(latency=0.05)
+    league = CachedLeague(backend, ttls={'current_week': 60}, clock=Clock())
+    threads = [threading.Thread(target=league.current_week) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.n_calls == 1
+    assert league.deduplicated['current_week'] == 7
+
+
+def test_fake_backend_builds_a_league():
+    backend = FakeLeague(n_teams=4, roster_size=5, n_free_agents=10, current_day=2)
+    api_league = CachedLeague(backend)
+    league = League(api_league)
+    assert [team.team_key for team in league.teams] == backend.team_keys
+    assert all(len(team.roster) == 5 for team in league.teams)
+    assert (league.current_week, league.current_day) == (10, 2)
+    assert len(league.matchups) == 2
+
+    # a rebuild within the TTLs is served from the cache
+    n_calls = backend.n_calls
+    League(api_league, previous=league)
+    assert backend.n_calls == n_calls
@@ -1,8 +1,19 @@
+from contextlib import contextmanager
+from functools import lru_cache
+import hashlib
+import json
 import math
-from typing import List
+import os
+import re
+import threading
+from typing import IO, Iterator, List, Tuple
 import unicodedata
 
 
+# Everything clean_text drops from an ASCII string
+ASCII_PUNCTUATION_PATTERN = re.compile(r"[^A-Za-z0-9\s'-]")
+
+
 def to_matchup_stats_args(raw: str) -> List[int]:
     stats = raw['team_stats']['stats']
     for raw_stat in stats:
@@ -27,7 +38,7 @@ def to_matchup_stats_args(raw: str) -> List[int]:
             tov = int(stat['value'])
 
     return [
-        int(fgm), int(fga), int(ftm), int(fta), _3ptm, pts, reb, ast, stl, blk, tov,
+        int(fga), int(fgm), int(fta), int(ftm), _3ptm, pts, reb, ast, stl, blk, tov,
     ]
 
 
@@ -40,6 +51,12 @@ def get_n_games_args(raw: str) -> List[int]:
     return [team_points, games_completed, games_remaining + games_in_progress]
 
 
+def parse_shooting_ratio(cell: str) -> Tuple[float, float]:
+    """Parses "0.560(12.3/22.0)" into (attempts, makes)"""
+    makes, _, attempts = cell.partition("(")[2].partition(")")[0].partition("/")
+    return float(attempts), float(makes)
+
+
 def get_nba_team_abbreviation(team_name: str) -> str:
     nba_teams = {
         "Atlanta Hawks": "ATL",
@@ -89,6 +106,10 @@ def get_adapted_team_abbreviation(team_name: str) -> str:
 
 
 def clean_text(input_str: str) -> str:
+    # Fast path: ASCII names have no accents, so only strip punctuation
+    if input_str.isascii():
+        return ASCII_PUNCTUATION_PATTERN.sub('', input_str)
+
     # Remove accents
     normalized = unicodedata.normalize('NFD', input_str)
     no_accents = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
@@ -97,11 +118,44 @@ def clean_text(input_str: str) -> str:
     return cleaned
 
 
+# Yahoo names that differ from the projections' spelling, after cleaning
+INTERESTING_NAMES = {
+    'PJ Washington Jr': 'PJ Washington',
+    'Nic Claxton': 'Nicolas Claxton',
+    'Alex Sarr': 'Alexandre Sarr'
+}
+
+
+@lru_cache(maxsize=4096)
 def get_cleaned_player_name(player_name: str) -> str:
     name = clean_text(player_name)
-    interesting_names = {
-        'PJ Washington Jr': 'PJ Washington',
-        'Nic Claxton': 'Nicolas Claxton',
-        'Alex Sarr': 'Alexandre Sarr'
-    }
-    return interesting_names.get(name, name)
+    return INTERESTING_NAMES.get(name, name)
+
+
+def get_fingerprint(*payloads) -> str:
+    """Stable hash of raw API payloads, used to detect changes between refreshes"""
+    raw = json.dumps(payloads, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def get_tmp_filename(filename: str) -> str:
+    """Where to write filename before replacing it, unique to the writing process and thread,
+    since e.g. gunicorn workers sharing a cache directory may write the same file at once"""
+    return f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+@contextmanager
+def atomic_write(filename: str, mode: str = "wb") -> Iterator[IO]:
+    """Opens a temporary file that replaces filename once written, so readers never see
+    a partial file. If writing fails, the temporary file is removed and filename is untouched"""
+    tmp_filename = get_tmp_filename(filename)
+    try:
+        with open(tmp_filename, mode=mode) as file:
+            yield file
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_filename)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,17 @@
+from api.app import create_app, warm_caches
+from config.constants import SERVER_SIMULATION_WORKERS, SNAPSHOT_DIRECTORY
+from data.refresher import LeagueRefresher
+from data.yahoo_api import create_game
+
+
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app (./start.sh prod).
+# gunicorn preloads this module once, in the master, so the leagues, projections and schedule
+# are built before any worker is forked and every worker shares them copy-on-write.
+# From the post_fork hook, one worker then takes over refreshing and publishes each new
+# snapshot through SNAPSHOT_DIRECTORY, which the other workers map instead of refreshing.
+refresher = LeagueRefresher(create_game(), snapshot_directory=SNAPSHOT_DIRECTORY)
+refresher.refresh()
+# before publishing, so the snapshot carries the responses the app renders
+app = create_app(refresher, simulation_workers=SERVER_SIMULATION_WORKERS)
+warm_caches(refresher)
+refresher.publish_snapshot()